@@ -3,8 +3,14 @@ Flask app chính cho Bookstore API
 """
 from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
+from flask_migrate import Migrate
 from config import Config
 from models import db
+from utils.cache import cache
+from utils import db_pool
+from utils.db_routing import read_cache_scope, READ_CACHE_SCOPES
+from utils.password_hasher import password_hasher
+from utils.image_processing import image_processor
 from routes.auth import auth_bp
 from routes.books import books_bp
 from routes.cart import cart_bp
@@ -13,6 +19,10 @@ from routes.admin import admin_bp
 from routes.chatbot import chatbot_bp
 from routes.upload import upload_bp
 from routes.banners import banners_bp
+from routes.images import images_bp
+from business.components.stock_reservation import StockReservation
+from cli import register_commands, init_db_lock, init_database
+from seed_data import seed_database
 
 def create_app():
     """Tạo và cấu hình Flask app"""
@@ -32,6 +42,23 @@ def create_app():
     
     # Khởi tạo database
     db.init_app(app)
+    db_pool.init_app(app, db)
+    
+    # Schema migrations (Alembic): flask db upgrade
+    Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
+    
+    # Cache catalog (key tách theo primary/replica, client vừa ghi bỏ qua cache)
+    cache.init_app(app, key_scope=read_cache_scope, key_scopes=READ_CACHE_SCOPES)
+    
+    # bcrypt trên pool giới hạn (admission control)
+    password_hasher.init_app(app)
+    
+    # Xử lý ảnh upload (resize/WebP) trên pool giới hạn
+    image_processor.init_app(app)
+    
+    # Giữ hàng tạm thời cho giỏ hàng (sweeper xóa hold hết hạn)
+    if app.config['STOCK_HOLDS_ENABLED']:
+        StockReservation.init_app(app)
     
     # Đăng ký blueprints (phải đăng ký trước catch-all routes)
     app.register_blueprint(auth_bp, url_prefix='/api')
@@ -42,6 +69,8 @@ def create_app():
     app.register_blueprint(chatbot_bp, url_prefix='/api')
     app.register_blueprint(upload_bp, url_prefix='/api')
     app.register_blueprint(banners_bp, url_prefix='/api')
+    # Ảnh public: /img/<key> (ngoài /api, nginx cache)
+    app.register_blueprint(images_bp)
     
     # Route để serve frontend (phải đặt sau API routes)
     @app.route('/', defaults={'path': ''})
@@ -71,20 +100,23 @@ def create_app():
         # Với các file khác (images, etc), trả về 404 ngay lập tức để tránh loop
         return jsonify({'error': 'File not found'}), 404
     
-    # Tạo database tables
-    with app.app_context():
-        db.create_all()
+    @app.errorhandler(413)
+    def request_entity_too_large(error):
+        return jsonify({'error': f'Request quá lớn. Kích thước tối đa: {app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)}MB'}), 413
+    
+    # CLI: flask init-db, flask seed (schema/seed không chạy lúc import hay khi worker khởi động)
+    register_commands(app)
     
     return app
 
 # Create app instance for Gunicorn
 app = create_app()
 
-# Seed database data
-from seed_data import seed_database
-with app.app_context():
-    seed_database()
-
 if __name__ == '__main__':
+    # Chạy dev: tự migrate và seed trước khi start server
+    with app.app_context():
+        with init_db_lock():
+            init_database()
+            seed_database()
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -4,6 +4,7 @@ Business Components
 from .book_validator import BookValidator
 from .order_validator import OrderValidator
 from .cart_validator import CartValidator
+from .stock_reservation import StockReservation
 
-__all__ = ['BookValidator', 'OrderValidator', 'CartValidator']
+__all__ = ['BookValidator', 'OrderValidator', 'CartValidator', 'StockReservation']
 
@@ -3,6 +3,7 @@ Book Business Validator
 """
 from typing import Dict, Optional, Tuple, List
 from decimal import Decimal
+from utils.image_processing import validate_variant_set
 
 
 class BookValidator:
@@ -75,6 +76,10 @@ class BookValidator:
             except (ValueError, TypeError):
                 return False, 'Trọng lượng không hợp lệ'
         
+        error = validate_variant_set(data.get('image_variants'))
+        if error:
+            return False, error
+        
         return True, None
     
     @staticmethod
@@ -119,6 +124,15 @@ class BookValidator:
             except (ValueError, TypeError):
                 return False, 'Số lượng tồn kho không hợp lệ'
         
+        # Validate stock_delta if provided (nhập/xuất kho tương đối)
+        if 'stock_delta' in data:
+            if 'stock' in data:
+                return False, 'Không thể cập nhật đồng thời stock và stock_delta'
+            try:
+                int(data['stock_delta'])
+            except (ValueError, TypeError):
+                return False, 'stock_delta không hợp lệ'
+        
         # Validate optional fields
         if 'pages' in data and data['pages']:
             try:
@@ -136,8 +150,46 @@ class BookValidator:
             except (ValueError, TypeError):
                 return False, 'Trọng lượng không hợp lệ'
         
+        error = validate_variant_set(data.get('image_variants'))
+        if error:
+            return False, error
+        
         return True, None
     
+    MAX_BATCH_ITEMS = 1000
+    BATCH_FIELDS = ['id', 'price', 'stock', 'stock_delta']
+    
+    @staticmethod
+    def validate_batch(items) -> Tuple[bool, Optional[str]]:
+        """
+        Validate danh sách item của batch update giá/tồn kho
+        Returns: (is_valid, error_message)
+        """
+        if not isinstance(items, list) or not items:
+            return False, 'items phải là danh sách không rỗng'
+        if len(items) > BookValidator.MAX_BATCH_ITEMS:
+            return False, f'Tối đa {BookValidator.MAX_BATCH_ITEMS} items mỗi batch'
+        return True, None
+    
+    @staticmethod
+    def validate_batch_item(item) -> Tuple[bool, Optional[str]]:
+        """
+        Validate một item {id, price?, stock?, stock_delta?}
+        Returns: (is_valid, error_message)
+        """
+        if not isinstance(item, dict):
+            return False, 'Item không hợp lệ'
+        if not isinstance(item.get('id'), int) or isinstance(item.get('id'), bool):
+            return False, 'id không hợp lệ'
+        
+        unknown = [field for field in item if field not in BookValidator.BATCH_FIELDS]
+        if unknown:
+            return False, f'Trường không được hỗ trợ: {", ".join(unknown)}'
+        if not any(field in item for field in ('price', 'stock', 'stock_delta')):
+            return False, 'Cần ít nhất một trong price, stock, stock_delta'
+        
+        return BookValidator.validate_update({field: value for field, value in item.items() if field != 'id'})
+    
     @staticmethod
     def validate_stock_available(book_stock: int, requested_quantity: int) -> Tuple[bool, Optional[str]]:
         """
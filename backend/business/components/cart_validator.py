@@ -4,6 +4,7 @@ Cart Business Validator
 from typing import Dict, Optional, Tuple
 from data.book_dao import BookDAO
 from data.cart_dao import CartDAO
+from business.components.stock_reservation import StockReservation
 
 
 class CartValidator:
@@ -29,8 +30,9 @@ class CartValidator:
         current_quantity = existing_cart.quantity if existing_cart else 0
         total_quantity = current_quantity + quantity
         
-        # Validate stock availability
-        if book.stock < total_quantity:
+        # Validate stock availability; khi bật reservation, StockReservation.hold kiểm tra
+        # (trừ hàng đang được user khác giữ) dưới lock trong cùng transaction với giỏ hàng
+        if not StockReservation.is_enabled() and book.stock < total_quantity:
             return False, f'Số lượng sách không đủ (còn {book.stock} cuốn)'
         
         return True, None
@@ -58,7 +60,7 @@ class CartValidator:
         if not book:
             return False, 'Sách không tồn tại'
         
-        if book.stock < quantity:
+        if not StockReservation.is_enabled() and book.stock < quantity:
             return False, f'Số lượng sách không đủ (còn {book.stock} cuốn)'
         
         return True, None
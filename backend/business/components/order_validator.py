@@ -4,6 +4,7 @@ Order Business Validator
 from typing import Dict, Optional, List, Tuple
 from data.cart_dao import CartDAO
 from data.book_dao import BookDAO
+from business.components.stock_reservation import StockReservation
 
 
 class OrderValidator:
@@ -30,14 +31,20 @@ class OrderValidator:
         if not cart_items:
             return False, 'Giỏ hàng trống'
         
+        # Hàng đang được user khác giữ (nếu bật reservation)
+        held = {}
+        if StockReservation.is_enabled():
+            held = StockReservation.held_by_others(user_id, [item.book_id for item in cart_items])
+        
         # Validate stock for each cart item
         for cart_item in cart_items:
             book = BookDAO.get_by_id(cart_item.book_id)
             if not book:
                 return False, f'Sách với ID {cart_item.book_id} không tồn tại'
             
-            if book.stock < cart_item.quantity:
-                return False, f'Sách "{book.title}" không đủ số lượng (còn {book.stock} cuốn)'
+            available = book.stock - held.get(book.id, 0)
+            if available < cart_item.quantity:
+                return False, f'Sách "{book.title}" không đủ số lượng (còn {max(available, 0)} cuốn)'
         
         return True, None
     
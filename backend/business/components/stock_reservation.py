@@ -0,0 +1,139 @@
+"""
+Stock Reservation Component
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from data.book_dao import BookDAO
+from data.stock_hold_dao import StockHoldDAO
+from models import db
+
+
+class StockReservation:
+    """
+    Giữ hàng tạm thời cho sách trong giỏ (bật bằng STOCK_HOLDS_ENABLED).
+    Thêm vào giỏ tạo/gia hạn một hold có hạn STOCK_HOLD_TTL_SECONDS;
+    tồn kho khả dụng = stock - tổng các hold còn hạn của user khác.
+    
+    hold() khóa dòng sách và kiểm tra lại trong database, cùng transaction với thay đổi giỏ hàng;
+    available_stocks() đọc cache trong process (có thể trễ) nên chỉ dùng để hiển thị (giỏ hàng).
+    """
+    
+    MAX_CACHE_ENTRIES = 10000
+    
+    # book_id -> (hết hạn (monotonic), stock, tổng hold còn hạn)
+    _cache: Dict[int, Tuple[float, int, int]] = {}
+    _cache_lock = threading.Lock()
+    _sweeper_pid: Optional[int] = None
+    
+    @staticmethod
+    def is_enabled() -> bool:
+        """Reservation layer có được bật không"""
+        return current_app.config.get('STOCK_HOLDS_ENABLED', False)
+    
+    @staticmethod
+    def _stock_and_held(book_id: int) -> Tuple[int, int]:
+        """(stock, tổng hold còn hạn) của sách, cache trong process AVAILABLE_STOCK_CACHE_TTL giây"""
+        now = time.monotonic()
+        with StockReservation._cache_lock:
+            entry = StockReservation._cache.get(book_id)
+        if entry and entry[0] > now:
+            return entry[1], entry[2]
+        
+        book = BookDAO.get_by_id(book_id)
+        stock = book.stock if book else 0
+        held = StockHoldDAO.get_held_quantities([book_id]).get(book_id, 0)
+        
+        expires = now + current_app.config['AVAILABLE_STOCK_CACHE_TTL']
+        with StockReservation._cache_lock:
+            if len(StockReservation._cache) >= StockReservation.MAX_CACHE_ENTRIES:
+                StockReservation._cache.clear()
+            StockReservation._cache[book_id] = (expires, stock, held)
+        return stock, held
+    
+    @staticmethod
+    def available_stocks(book_ids: List[int], user_id: Optional[int] = None) -> Dict[int, int]:
+        """
+        Tồn kho khả dụng theo book_id (không tính hold của chính user_id) để hiển thị,
+        có thể trễ tới AVAILABLE_STOCK_CACHE_TTL giây - không dùng để quyết định giữ hàng
+        """
+        own = StockHoldDAO.get_user_quantities(user_id, book_ids) if user_id is not None else {}
+        available = {}
+        for book_id in book_ids:
+            stock, held = StockReservation._stock_and_held(book_id)
+            held_by_others = max(held - own.get(book_id, 0), 0)
+            available[book_id] = max(stock - held_by_others, 0)
+        return available
+    
+    @staticmethod
+    def held_by_others(user_id: int, book_ids: List[int]) -> Dict[int, int]:
+        """Số lượng đang được user khác giữ (đọc trực tiếp database, dùng khi checkout)"""
+        return StockHoldDAO.get_held_quantities(book_ids, exclude_user_id=user_id)
+    
+    @staticmethod
+    def hold(user_id: int, book_id: int, quantity: int) -> Optional[str]:
+        """
+        Giữ quantity cuốn cho user (thay thế hold cũ và gia hạn), chưa commit:
+        khóa dòng sách (SELECT ... FOR UPDATE) rồi kiểm tra stock - hold còn hạn của user khác
+        trong database, nên các request đồng thời (khác worker) không giữ quá số sách còn.
+        Caller commit cùng transaction với thay đổi giỏ hàng rồi gọi invalidate(book_id).
+        Returns: error_message (None nếu giữ được)
+        """
+        book = BookDAO.get_by_id_for_update(book_id)
+        if not book:
+            return 'Sách không tồn tại'
+        held = StockHoldDAO.get_held_quantities([book_id], exclude_user_id=user_id).get(book_id, 0)
+        available = max(book.stock - held, 0)
+        if available < quantity:
+            return f'Số lượng sách không đủ (còn {available} cuốn)'
+        
+        ttl = current_app.config['STOCK_HOLD_TTL_SECONDS']
+        StockHoldDAO.upsert(user_id, book_id, quantity, datetime.utcnow() + timedelta(seconds=ttl), commit=False)
+        return None
+    
+    @staticmethod
+    def release(user_id: int, book_id: Optional[int] = None, commit: bool = True) -> None:
+        """Bỏ hold của user (một sách hoặc tất cả)"""
+        StockHoldDAO.delete_by_user(user_id, book_id, commit=commit)
+        StockReservation.invalidate(book_id)
+    
+    @staticmethod
+    def invalidate(book_id: Optional[int] = None) -> None:
+        """Xóa cache tồn kho khả dụng (một sách hoặc tất cả)"""
+        with StockReservation._cache_lock:
+            if book_id is None:
+                StockReservation._cache.clear()
+            else:
+                StockReservation._cache.pop(book_id, None)
+    
+    @staticmethod
+    def init_app(app) -> None:
+        """Đăng ký sweeper xóa hold hết hạn (mỗi worker process một thread)"""
+        @app.before_request
+        def _ensure_stock_hold_sweeper():
+            if StockReservation._sweeper_pid != os.getpid():
+                StockReservation._sweeper_pid = os.getpid()
+                thread = threading.Thread(
+                    target=StockReservation._run_sweeper,
+                    args=(app, app.config['STOCK_HOLD_SWEEP_INTERVAL']),
+                    name='stock-hold-sweeper',
+                    daemon=True
+                )
+                thread.start()
+    
+    @staticmethod
+    def _run_sweeper(app, interval: int) -> None:
+        """Vòng lặp background: định kỳ xóa các hold đã hết hạn"""
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    StockHoldDAO.delete_expired()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.warning(f'Lỗi xóa stock hold hết hạn: {e}')
+                finally:
+                    db.session.remove()
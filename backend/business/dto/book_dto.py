@@ -16,8 +16,10 @@ class BookDTO:
                  publish_date: Optional[str] = None, distributor: Optional[str] = None,
                  dimensions: Optional[str] = None, pages: Optional[int] = None,
                  weight: Optional[int] = None, created_at: Optional[datetime] = None,
-                 updated_at: Optional[datetime] = None):
+                 updated_at: Optional[datetime] = None, external_id: Optional[str] = None,
+                 image_variants: Optional[dict] = None):
         self.id = id
+        self.external_id = external_id
         self.title = title
         self.author = author
         self.category = category
@@ -25,6 +27,7 @@ class BookDTO:
         self.price = price
         self.stock = stock
         self.image_url = image_url
+        self.image_variants = image_variants
         self.publisher = publisher
         self.publish_date = publish_date
         self.distributor = distributor
@@ -38,6 +41,7 @@ class BookDTO:
         """Convert DTO to dictionary"""
         return {
             'id': self.id,
+            'external_id': self.external_id,
             'title': self.title,
             'author': self.author,
             'category': self.category,
@@ -45,6 +49,7 @@ class BookDTO:
             'price': float(self.price) if self.price else None,
             'stock': self.stock,
             'image_url': self.image_url,
+            'image_variants': self.image_variants,
             'publisher': self.publisher,
             'publish_date': self.publish_date,
             'distributor': self.distributor,
@@ -60,6 +65,7 @@ class BookDTO:
         """Create DTO from SQLAlchemy model"""
         return cls(
             id=book_model.id,
+            external_id=book_model.external_id,
             title=book_model.title,
             author=book_model.author,
             category=book_model.category,
@@ -67,6 +73,7 @@ class BookDTO:
             price=book_model.price,
             stock=book_model.stock,
             image_url=book_model.image_url,
+            image_variants=book_model.image_variants,
             publisher=book_model.publisher,
             publish_date=book_model.publish_date,
             distributor=book_model.distributor,
@@ -82,6 +89,7 @@ class BookDTO:
         """Create DTO from dictionary"""
         return cls(
             id=data.get('id'),
+            external_id=data.get('external_id'),
             title=data.get('title'),
             author=data.get('author'),
             category=data.get('category'),
@@ -89,6 +97,7 @@ class BookDTO:
             price=Decimal(str(data['price'])) if data.get('price') else None,
             stock=data.get('stock', 0),
             image_url=data.get('image_url'),
+            image_variants=data.get('image_variants'),
             publisher=data.get('publisher'),
             publish_date=data.get('publish_date'),
             distributor=data.get('distributor'),
@@ -11,13 +11,15 @@ class CartDTO:
     
     def __init__(self, id: int = None, user_id: int = None, book_id: int = None,
                  quantity: int = 1, book: Optional[BookDTO] = None,
-                 created_at: Optional[datetime] = None):
+                 created_at: Optional[datetime] = None, available_stock: Optional[int] = None):
         self.id = id
         self.user_id = user_id
         self.book_id = book_id
         self.quantity = quantity
         self.book = book
         self.created_at = created_at
+        # Tồn kho khả dụng cho user (chỉ khi bật STOCK_HOLDS_ENABLED)
+        self.available_stock = available_stock
     
     def to_dict(self) -> dict:
         """Convert DTO to dictionary"""
@@ -27,7 +29,8 @@ class CartDTO:
             'book_id': self.book_id,
             'quantity': self.quantity,
             'book': self.book.to_dict() if self.book else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'available_stock': self.available_stock
         }
     
     @classmethod
@@ -51,6 +54,7 @@ class CartDTO:
             book_id=data.get('book_id'),
             quantity=data.get('quantity', 1),
             book=BookDTO.from_dict(data['book']) if data.get('book') else None,
-            created_at=datetime.fromisoformat(data['created_at']) if data.get('created_at') else None
+            created_at=datetime.fromisoformat(data['created_at']) if data.get('created_at') else None,
+            available_stock=data.get('available_stock')
         )
 
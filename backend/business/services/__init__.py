@@ -6,6 +6,7 @@ from .book_service import BookService
 from .cart_service import CartService
 from .order_service import OrderService
 from .admin_service import AdminService
+from .book_import_service import BookImportService
 
-__all__ = ['AuthService', 'BookService', 'CartService', 'OrderService', 'AdminService']
+__all__ = ['AuthService', 'BookService', 'CartService', 'OrderService', 'AdminService', 'BookImportService']
 
@@ -1,14 +1,22 @@
 """
 Admin Business Service
 """
-from typing import Dict, Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List, Iterator
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import csv
+import io
+import json
 from data.user_dao import UserDAO
 from data.order_dao import OrderDAO
 from data.book_dao import BookDAO
+from data.sales_stats_dao import SalesStatsDAO
 from business.dto.user_dto import UserDTO
 from business.dto.order_dto import OrderDTO
-from models import db, Order, Book, OrderItem
-from sqlalchemy import func, desc
+from business.components.order_validator import OrderValidator
+from models import db
+from utils.db_routing import replica_reads
+from utils.authorization import access_cache
 
 
 class AdminService:
@@ -38,75 +46,187 @@ class AdminService:
             if not updated_user:
                 return None, 'User không tồn tại'
             
+            # Khóa/mở khóa có hiệu lực ngay, không chờ cache phân quyền hết hạn
+            access_cache.invalidate(user_id)
+            
             return UserDTO.from_model(updated_user), None
             
         except Exception as e:
             db.session.rollback()
             return None, f'Lỗi cập nhật trạng thái user: {str(e)}'
     
+    EXPORT_FORMATS = ['ndjson', 'csv']
+    CSV_COLUMNS = ['id', 'user_id', 'status', 'payment_status', 'total_amount',
+                   'shipping_address', 'items', 'created_at', 'updated_at']
+    
+    @staticmethod
+    def _parse_order_filters(status: str = '', user_id: Optional[int] = None,
+                             date_from: str = '', date_to: str = '') -> Tuple[Dict, Optional[str]]:
+        """
+        Parse filter cho danh sách đơn hàng (date dạng YYYY-MM-DD, date_to tính cả ngày đó)
+        Returns: (filters, error_message)
+        """
+        if status:
+            is_valid, error = OrderValidator.validate_status(status)
+            if not is_valid:
+                return {}, error
+        
+        try:
+            start = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+            end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1) if date_to else None
+        except ValueError:
+            return {}, 'Ngày không hợp lệ (định dạng YYYY-MM-DD)'
+        
+        return {'status': status or None, 'user_id': user_id,
+                'date_from': start, 'date_to': end}, None
+    
+    @staticmethod
+    def get_orders(page: int = 1, per_page: int = 20, status: str = '', user_id: Optional[int] = None,
+                   date_from: str = '', date_to: str = '') -> Tuple[List[OrderDTO], int, int, Optional[str]]:
+        """
+        Get orders with pagination and filters
+        Returns: (orders, total, pages, error_message)
+        """
+        try:
+            filters, error = AdminService._parse_order_filters(status, user_id, date_from, date_to)
+            if error:
+                return [], 0, 0, error
+            
+            orders, total, pages = OrderDAO.search(page, per_page, **filters)
+            order_dtos = [OrderDTO.from_model(order) for order in orders]
+            return order_dtos, total, pages, None
+        except Exception as e:
+            return [], 0, 0, f'Lỗi lấy danh sách đơn hàng: {str(e)}'
+    
     @staticmethod
-    def get_all_orders() -> Tuple[List[OrderDTO], Optional[str]]:
+    def get_orders_by_cursor(cursor: Optional[str] = None, per_page: int = 20, total_mode: str = 'none',
+                             status: str = '', user_id: Optional[int] = None, date_from: str = '',
+                             date_to: str = '') -> Tuple[List[OrderDTO], Optional[str], Optional[int], bool, Optional[str]]:
         """
-        Get all orders
-        Returns: (orders, error_message)
+        Get orders with keyset (cursor) pagination and filters
+        Returns: (orders, next_cursor, total, total_is_estimate, error_message)
         """
         try:
-            orders = OrderDAO.get_all()
+            filters, error = AdminService._parse_order_filters(status, user_id, date_from, date_to)
+            if error:
+                return [], None, None, False, error
+            
+            orders, next_cursor, total, is_estimate = OrderDAO.get_page_by_cursor(
+                cursor, per_page, total_mode, **filters
+            )
             order_dtos = [OrderDTO.from_model(order) for order in orders]
-            return order_dtos, None
+            return order_dtos, next_cursor, total, is_estimate, None
+        except ValueError as e:
+            return [], None, None, False, str(e)
         except Exception as e:
-            return [], f'Lỗi lấy danh sách đơn hàng: {str(e)}'
+            return [], None, None, False, f'Lỗi lấy danh sách đơn hàng: {str(e)}'
+    
+    @staticmethod
+    def export_orders(export_format: str = 'ndjson', status: str = '', user_id: Optional[int] = None,
+                      date_from: str = '', date_to: str = '') -> Tuple[Optional[Iterator[str]], Optional[str]]:
+        """
+        Export orders khớp filter dưới dạng NDJSON hoặc CSV (stream từng dòng)
+        Returns: (line_iterator, error_message)
+        """
+        if export_format not in AdminService.EXPORT_FORMATS:
+            return None, f'Định dạng không hợp lệ. Phải là một trong: {", ".join(AdminService.EXPORT_FORMATS)}'
+        
+        filters, error = AdminService._parse_order_filters(status, user_id, date_from, date_to)
+        if error:
+            return None, error
+        
+        orders = OrderDAO.iter_filtered(**filters)
+        if export_format == 'csv':
+            return AdminService._iter_orders_csv(orders), None
+        return (json.dumps(OrderDTO.from_model(order).to_dict(), ensure_ascii=False) + '\n'
+                for order in orders), None
+    
+    @staticmethod
+    def _iter_orders_csv(orders) -> Iterator[str]:
+        """Stream CSV: header rồi mỗi order một dòng, items dạng 'book_id x quantity @ price; ...'"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(AdminService.CSV_COLUMNS)
+        
+        for order in orders:
+            order_dict = OrderDTO.from_model(order).to_dict()
+            order_dict['items'] = '; '.join(
+                f"{item['book_id']} x {item['quantity']} @ {item['price']}"
+                for item in order_dict['order_items']
+            )
+            writer.writerow([order_dict[column] for column in AdminService.CSV_COLUMNS])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        
+        # Trường hợp không có order nào
+        if buffer.tell():
+            yield buffer.getvalue()
     
     @staticmethod
-    def get_statistics() -> Tuple[Optional[Dict], Optional[str]]:
+    def _parse_day_range(date_from: str = '', date_to: str = '') -> Tuple[Optional[date], Optional[date], Optional[str]]:
+        """
+        Parse khoảng ngày YYYY-MM-DD (tính cả hai đầu) cho các truy vấn trên bảng rollup
+        Returns: (start, end, error_message)
         """
-        Get admin statistics
+        try:
+            start = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+            end = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+        except ValueError:
+            return None, None, 'Ngày không hợp lệ (định dạng YYYY-MM-DD)'
+        return start, end, None
+    
+    @staticmethod
+    def get_statistics(date_from: str = '', date_to: str = '') -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Get admin statistics từ các bảng rollup theo ngày (order_daily_stats, book_daily_sales),
+        không quét bảng orders. date_from/date_to (YYYY-MM-DD, tính cả hai đầu) để drill-down.
         Returns: (statistics_dict, error_message)
         """
+        start, end, error = AdminService._parse_day_range(date_from, date_to)
+        if error:
+            return None, error
+        
         try:
-            # Total revenue (from completed and paid orders)
-            total_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-                Order.status == 'completed',
-                Order.payment_status == 'paid'
-            ).scalar() or 0
+            # Chỉ đọc -> dùng read replica nếu có
+            with replica_reads():
+                status_totals = SalesStatsDAO.get_status_totals(start, end)
+                daily_totals = SalesStatsDAO.get_daily_totals(start, end)
+                top_books = SalesStatsDAO.get_top_books('completed', 10, start, end)
             
-            # Total orders
-            total_orders = Order.query.count()
+            # Total revenue (from completed and paid orders)
+            total_revenue = sum(
+                (revenue or 0 for status, payment_status, count, revenue in status_totals
+                 if status == 'completed' and payment_status == 'paid'), Decimal('0')
+            )
             
             # Orders by status
-            orders_by_status = db.session.query(
-                Order.status,
-                func.count(Order.id)
-            ).group_by(Order.status).all()
-            
-            # Convert to dict for easy access
-            orders_by_status_dict = {status: count for status, count in orders_by_status}
-            
-            # Individual order counts
-            pending_orders = orders_by_status_dict.get('pending', 0)
-            confirmed_orders = orders_by_status_dict.get('confirmed', 0)
-            completed_orders = orders_by_status_dict.get('completed', 0)
-            cancelled_orders = orders_by_status_dict.get('cancelled', 0)
-            
-            # Top selling books (top 10)
-            top_books = db.session.query(
-                Book.id,
-                Book.title,
-                Book.author,
-                func.sum(OrderItem.quantity).label('total_sold')
-            ).join(OrderItem).join(Order).filter(
-                Order.status == 'completed'
-            ).group_by(Book.id, Book.title, Book.author).order_by(
-                desc('total_sold')
-            ).limit(10).all()
+            orders_by_status_dict = {}
+            for status, payment_status, count, revenue in status_totals:
+                orders_by_status_dict[status] = orders_by_status_dict.get(status, 0) + int(count or 0)
+            orders_by_status_dict = {status: count for status, count in orders_by_status_dict.items() if count}
+            
+            # Drill-down theo ngày (revenue tính như total_revenue)
+            daily = {}
+            for day, status, payment_status, count, revenue in daily_totals:
+                if not count:
+                    continue
+                day = str(day)
+                entry = daily.setdefault(day, {'date': day, 'orders': 0, 'revenue': 0.0, 'orders_by_status': {}})
+                entry['orders'] += count
+                entry['orders_by_status'][status] = entry['orders_by_status'].get(status, 0) + count
+                if status == 'completed' and payment_status == 'paid':
+                    entry['revenue'] += float(revenue)
             
             statistics = {
+                'date_from': date_from or None,
+                'date_to': date_to or None,
                 'total_revenue': float(total_revenue),
-                'total_orders': total_orders,
-                'pending_orders': pending_orders,
-                'confirmed_orders': confirmed_orders,
-                'completed_orders': completed_orders,
-                'cancelled_orders': cancelled_orders,
+                'total_orders': sum(orders_by_status_dict.values()),
+                'pending_orders': orders_by_status_dict.get('pending', 0),
+                'confirmed_orders': orders_by_status_dict.get('confirmed', 0),
+                'completed_orders': orders_by_status_dict.get('completed', 0),
+                'cancelled_orders': orders_by_status_dict.get('cancelled', 0),
                 'orders_by_status': orders_by_status_dict,
                 'top_books': [
                     {
@@ -116,11 +236,94 @@ class AdminService:
                         'total_sold': int(total_sold)
                     }
                     for book_id, title, author, total_sold in top_books
-                ]
+                ],
+                'daily': list(daily.values())
             }
             
             return statistics, None
             
         except Exception as e:
             return None, f'Lỗi lấy thống kê: {str(e)}'
-
+    
+    ANALYTICS_GRANULARITIES = ['day', 'week', 'month']
+    ANALYTICS_GROUPS = ['category', 'author']
+    
+    @staticmethod
+    def _period_start(day: date, granularity: str) -> date:
+        """Ngày bắt đầu của kỳ chứa day (tuần bắt đầu từ thứ Hai)"""
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
+    
+    @staticmethod
+    def get_sales_analytics(granularity: str = 'day', group_by: str = '', status: str = 'completed',
+                            date_from: str = '', date_to: str = '') -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Doanh thu / số lượng bán theo ngày, tuần hoặc tháng, có thể tách theo category hoặc author.
+        Đọc từ bảng rollup theo ngày (book_daily_sales, order_daily_stats) nên số dòng xử lý
+        chỉ phụ thuộc số ngày x số nhóm, không phụ thuộc số đơn hàng.
+        Returns: (analytics_dict, error_message)
+        """
+        if granularity not in AdminService.ANALYTICS_GRANULARITIES:
+            return None, f'granularity không hợp lệ. Phải là một trong: {", ".join(AdminService.ANALYTICS_GRANULARITIES)}'
+        if group_by and group_by not in AdminService.ANALYTICS_GROUPS:
+            return None, f'group_by không hợp lệ. Phải là một trong: {", ".join(AdminService.ANALYTICS_GROUPS)}'
+        is_valid, error = OrderValidator.validate_status(status)
+        if not is_valid:
+            return None, error
+        
+        start, end, error = AdminService._parse_day_range(date_from, date_to)
+        if error:
+            return None, error
+        
+        try:
+            # Chỉ đọc -> dùng read replica nếu có
+            with replica_reads():
+                sales = SalesStatsDAO.get_book_sales_by_day(status, group_by or None, start, end)
+                order_counts = [] if group_by else SalesStatsDAO.get_order_counts_by_day(status, start, end)
+            
+            # Gộp các dòng theo ngày thành kỳ (period, group)
+            buckets = {}
+            for day, group, units, revenue in sales:
+                key = (AdminService._period_start(day, granularity), group)
+                bucket = buckets.setdefault(key, {'units': 0, 'revenue': Decimal('0')})
+                bucket['units'] += int(units or 0)
+                bucket['revenue'] += revenue or 0
+            
+            orders = {}
+            for day, count in order_counts:
+                period = AdminService._period_start(day, granularity)
+                orders[period] = orders.get(period, 0) + int(count or 0)
+            
+            series = []
+            for (period, group), bucket in sorted(buckets.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+                if not bucket['units']:
+                    continue
+                point = {'period': period.isoformat(), 'units': bucket['units'], 'revenue': float(bucket['revenue'])}
+                if group_by:
+                    point[group_by] = group
+                else:
+                    point['orders'] = orders.get(period, 0)
+                series.append(point)
+            
+            analytics = {
+                'granularity': granularity,
+                'group_by': group_by or None,
+                'status': status,
+                'date_from': date_from or None,
+                'date_to': date_to or None,
+                'series': series,
+                'totals': {
+                    'units': sum(point['units'] for point in series),
+                    'revenue': float(sum(bucket['revenue'] for bucket in buckets.values()))
+                }
+            }
+            if not group_by:
+                analytics['totals']['orders'] = sum(orders.values())
+            
+            return analytics, None
+            
+        except Exception as e:
+            return None, f'Lỗi lấy thống kê bán hàng: {str(e)}'
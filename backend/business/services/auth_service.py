@@ -4,13 +4,17 @@ Authentication Business Service
 from typing import Dict, Optional, Tuple
 from data.user_dao import UserDAO
 from business.dto.user_dto import UserDTO
-from utils.helpers import hash_password, check_password, validate_email, validate_password
+from utils.helpers import validate_email, validate_password
+from utils.password_hasher import password_hasher, PasswordHasherBusy
 from models import db
 
 
 class AuthService:
     """Business service for authentication operations"""
     
+    # Pool hash password đã đầy (route trả về 503)
+    BUSY_ERROR = 'Hệ thống đang bận, vui lòng thử lại sau'
+    
     @staticmethod
     def register(username: str, email: str, password: str, full_name: Optional[str] = None) -> Tuple[Optional[UserDTO], Optional[str]]:
         """
@@ -36,8 +40,8 @@ class AuthService:
             if UserDAO.exists_by_email(email):
                 return None, 'Email đã tồn tại'
             
-            # Create user
-            password_hash = hash_password(password)
+            # Create user (bcrypt chạy trên pool của password_hasher)
+            password_hash = password_hasher.hash(password)
             new_user = UserDAO.create(
                 username=username.strip(),
                 email=email.strip(),
@@ -48,6 +52,8 @@ class AuthService:
             
             return UserDTO.from_model(new_user), None
             
+        except PasswordHasherBusy:
+            return None, AuthService.BUSY_ERROR
         except Exception as e:
             db.session.rollback()
             return None, f'Lỗi đăng ký: {str(e)}'
@@ -65,14 +71,23 @@ class AuthService:
             # Find user
             user = UserDAO.get_by_username(username)
             
-            if not user or not check_password(password, user.password_hash):
+            if not user or not password_hasher.verify(password, user.password_hash):
                 return None, 'Username hoặc password không đúng'
             
             if not user.is_active:
                 return None, 'Tài khoản đã bị khóa'
             
+            # BCRYPT_ROUNDS đã đổi -> hash lại bằng cost mới (bỏ qua nếu đang quá tải)
+            if password_hasher.needs_rehash(user.password_hash):
+                try:
+                    UserDAO.update_password_hash(user.id, password_hasher.hash(password))
+                except PasswordHasherBusy:
+                    pass
+            
             return UserDTO.from_model(user), None
             
+        except PasswordHasherBusy:
+            return None, AuthService.BUSY_ERROR
         except Exception as e:
             return None, f'Lỗi đăng nhập: {str(e)}'
     
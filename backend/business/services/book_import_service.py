@@ -0,0 +1,197 @@
+"""
+Book Import/Export Business Service (CSV / JSONL)
+"""
+import csv
+import io
+import json
+from typing import Dict, Optional, Tuple, List, Iterator, IO
+from data.book_dao import BookDAO
+from business.components.book_validator import BookValidator
+from business.services.book_service import BookService
+from models import db
+from utils.helpers import normalize_search_text
+
+
+class BookImportService:
+    """Import hàng loạt (upsert theo external_id) và export catalog dạng stream"""
+
+    FORMATS = ['csv', 'jsonl']
+    COLUMNS = ['external_id', 'title', 'author', 'category', 'description', 'price', 'stock',
+               'image_url', 'publisher', 'publish_date', 'distributor', 'dimensions', 'pages', 'weight']
+    OPTIONAL_TEXT_FIELDS = ['description', 'image_url', 'publisher', 'publish_date', 'distributor', 'dimensions']
+    DEFAULT_BATCH_SIZE = 1000
+    MAX_REPORTED_ERRORS = 1000
+
+    @staticmethod
+    def _iter_records(stream: IO[str], import_format: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+        """
+        Đọc từng dòng dữ liệu từ file
+        Returns (yield): (line_number, record, parse_error)
+        """
+        if import_format == 'csv':
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record, None
+            return
+
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None, 'JSON không hợp lệ'
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, 'Mỗi dòng phải là một JSON object'
+                continue
+            yield line_number, record, None
+
+    @staticmethod
+    def _prepare_row(record: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Validate một dòng (cùng rule với tạo sách) và chuẩn hóa thành giá trị cột của books
+        Returns: (row, error_message)
+        """
+        data = {}
+        for column in BookImportService.COLUMNS:
+            value = record.get(column)
+            data[column] = value.strip() if isinstance(value, str) else value
+
+        external_id = data['external_id']
+        if external_id is None or external_id == '':
+            return None, 'Thiếu trường external_id'
+        external_id = str(external_id)
+        if len(external_id) > 100:
+            return None, 'external_id không được vượt quá 100 ký tự'
+
+        # Validate trên dạng chuỗi (như CSV) để giá/tồn kho bằng 0 trong JSONL không bị coi là thiếu trường
+        is_valid, error = BookValidator.validate_create(
+            {column: str(value) for column, value in data.items() if value is not None and value != ''}
+        )
+        if not is_valid:
+            return None, error
+
+        row = {
+            'external_id': external_id,
+            'title': str(data['title']),
+            'author': str(data['author']),
+            'category': str(data['category']),
+            'price': float(data['price']),
+            'stock': int(data['stock']),
+            'pages': int(data['pages']) if data['pages'] else None,
+            'weight': int(data['weight']) if data['weight'] else None
+        }
+        for column in BookImportService.OPTIONAL_TEXT_FIELDS:
+            row[column] = str(data[column]) if data[column] else None
+        row['search_text'] = normalize_search_text(row['title'], row['author'], row['description'], row['publisher'])
+        return row, None
+
+    @staticmethod
+    def _upsert_batch(batch: List[Tuple[int, Dict]], summary: Dict) -> None:
+        """Upsert một batch trong một transaction; lỗi database -> cả batch được báo lỗi"""
+        # Trùng external_id trong cùng batch: dòng sau ghi đè dòng trước
+        rows = {}
+        for line_number, row in batch:
+            rows[row['external_id']] = row
+
+        try:
+            inserted, updated = BookDAO.upsert_by_external_id(list(rows.values()))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for line_number, row in batch:
+                BookImportService._add_error(summary, line_number, row['external_id'], f'Lỗi lưu sách: {str(e)}')
+            return
+
+        summary['inserted'] += inserted
+        summary['updated'] += updated
+        summary['duplicates'] += len(batch) - len(rows)
+
+    @staticmethod
+    def _add_error(summary: Dict, line_number: int, external_id: Optional[str], error: str) -> None:
+        summary['failed'] += 1
+        if len(summary['errors']) < BookImportService.MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line_number, 'external_id': external_id, 'error': error})
+        else:
+            summary['errors_truncated'] = True
+
+    @staticmethod
+    def import_books(stream: IO[str], import_format: str = 'csv',
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Import sách từ CSV (có header) hoặc JSONL, upsert theo external_id.
+        Dữ liệu được đọc dạng stream và ghi theo batch (mỗi batch một câu INSERT ... ON CONFLICT
+        và một commit); dòng lỗi được báo lại theo số dòng, không làm hỏng cả batch.
+        Returns: (summary, error_message)
+        """
+        if import_format not in BookImportService.FORMATS:
+            return None, f'Định dạng không hợp lệ. Phải là một trong: {", ".join(BookImportService.FORMATS)}'
+
+        summary = {'processed': 0, 'inserted': 0, 'updated': 0, 'duplicates': 0, 'failed': 0,
+                   'errors': [], 'errors_truncated': False}
+        batch = []
+        try:
+            for line_number, record, error in BookImportService._iter_records(stream, import_format):
+                summary['processed'] += 1
+                if error is None:
+                    row, error = BookImportService._prepare_row(record)
+                if error:
+                    external_id = record.get('external_id') if record else None
+                    BookImportService._add_error(summary, line_number, external_id, error)
+                    continue
+
+                batch.append((line_number, row))
+                if len(batch) >= batch_size:
+                    BookImportService._upsert_batch(batch, summary)
+                    batch = []
+
+            BookImportService._upsert_batch(batch, summary)
+        except (csv.Error, UnicodeDecodeError) as e:
+            return None, f'File không hợp lệ: {str(e)}'
+        finally:
+            if summary['inserted'] or summary['updated']:
+                BookService.invalidate_cache()
+
+        return summary, None
+
+    @staticmethod
+    def export_books(export_format: str = 'csv') -> Tuple[Optional[Iterator[str]], Optional[str]]:
+        """
+        Export toàn bộ catalog dạng CSV hoặc JSONL (stream từng dòng, cùng cột với import)
+        Returns: (line_iterator, error_message)
+        """
+        if export_format not in BookImportService.FORMATS:
+            return None, f'Định dạng không hợp lệ. Phải là một trong: {", ".join(BookImportService.FORMATS)}'
+
+        books = BookDAO.iter_all()
+        if export_format == 'csv':
+            return BookImportService._iter_books_csv(books), None
+        return (json.dumps(BookImportService._export_row(book), ensure_ascii=False) + '\n'
+                for book in books), None
+
+    @staticmethod
+    def _export_row(book) -> Dict:
+        row = {'id': book.id}
+        row.update({column: getattr(book, column) for column in BookImportService.COLUMNS})
+        row['price'] = float(book.price)
+        return row
+
+    @staticmethod
+    def _iter_books_csv(books) -> Iterator[str]:
+        """Stream CSV: header rồi mỗi sách một dòng"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        columns = ['id'] + BookImportService.COLUMNS
+        writer.writerow(columns)
+
+        for book in books:
+            row = BookImportService._export_row(book)
+            writer.writerow(['' if row[column] is None else row[column] for column in columns])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+        # Trường hợp không có sách nào
+        if buffer.tell():
+            yield buffer.getvalue()
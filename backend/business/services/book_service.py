@@ -1,16 +1,69 @@
 """
 Book Business Service
 """
+from datetime import datetime
+from decimal import Decimal
 from typing import Dict, Optional, Tuple, List
+from flask import current_app
 from data.book_dao import BookDAO
 from business.dto.book_dto import BookDTO
 from business.components.book_validator import BookValidator
 from models import db
+from utils.cache import cache
+from utils.helpers import normalize_search_text
+from utils.http_cache import collection_version
+
+# Namespace cache: danh sách/categories/authors và chi tiết từng sách
+LIST_CACHE = 'books'
+DETAIL_CACHE = 'book'
 
 
 class BookService:
     """Business service for book operations"""
     
+    @staticmethod
+    def get_catalog_version() -> Tuple[Optional[str], Optional[datetime], Optional[str]]:
+        """
+        Version hiện tại của catalog (dùng cho ETag và làm một phần cache key)
+        Returns: (version, last_modified, error_message)
+        """
+        try:
+            def load_version():
+                max_updated_at, count = BookDAO.get_collection_version()
+                return {
+                    'version': collection_version(max_updated_at, count),
+                    'last_modified': max_updated_at.isoformat() if max_updated_at else None
+                }
+            
+            cached = cache.get_or_set(LIST_CACHE, 'version', load_version,
+                                      ttl=current_app.config['CACHE_VERSION_TTL'])
+            last_modified = datetime.fromisoformat(cached['last_modified']) if cached['last_modified'] else None
+            return cached['version'], last_modified, None
+        except Exception as e:
+            return None, None, f'Lỗi lấy version catalog: {str(e)}'
+    
+    @staticmethod
+    def get_book_version(book_id: int) -> Tuple[Optional[str], Optional[datetime], Optional[str]]:
+        """
+        Version của một sách theo updated_at của chính nó (ETag và cache key chi tiết),
+        không đổi khi các sách khác thay đổi
+        Returns: (version, last_modified, error_message) - version None nếu sách không tồn tại
+        """
+        try:
+            def load_version():
+                updated_at = BookDAO.get_updated_at(book_id)
+                return {
+                    'version': collection_version(updated_at, 1) if updated_at else None,
+                    'last_modified': updated_at.isoformat() if updated_at else None
+                }
+            
+            cached = cache.get_or_set(DETAIL_CACHE, cache.make_key('version', book_id), load_version,
+                                      ttl=current_app.config['CACHE_VERSION_TTL'])
+            last_modified = datetime.fromisoformat(cached['last_modified']) if cached['last_modified'] else None
+            return cached['version'], last_modified, None
+        except Exception as e:
+            return None, None, f'Lỗi lấy version sách: {str(e)}'
+    
     @staticmethod
     def get_books(page: int = 1, per_page: int = 12, search: str = '',
                  category: str = '', author: str = '') -> Tuple[List[BookDTO], int, int]:
@@ -19,12 +72,44 @@ class BookService:
         Returns: (books, total, pages)
         """
         try:
+            # Key gồm version catalog: nội dung cache luôn khớp với ETag đang trả về
+            version, _, _ = BookService.get_catalog_version()
+            key = cache.make_key(version=version, page=page, per_page=per_page,
+                                 search=normalize_search_text(search), category=category, author=author)
+            cached = cache.get(LIST_CACHE, key)
+            if cached is not None:
+                return [BookDTO.from_dict(book) for book in cached['books']], cached['total'], cached['pages']
+            
             books, total, pages = BookDAO.search(page, per_page, search, category, author)
             book_dtos = [BookDTO.from_model(book) for book in books]
+            cache.set(LIST_CACHE, key, {
+                'books': [book.to_dict() for book in book_dtos],
+                'total': total,
+                'pages': pages
+            })
             return book_dtos, total, pages
         except Exception as e:
             return [], 0, 0
     
+    @staticmethod
+    def get_books_by_cursor(cursor: Optional[str] = None, per_page: int = 12, search: str = '',
+                            category: str = '', author: str = '', total_mode: str = 'none'
+                            ) -> Tuple[List[BookDTO], Optional[str], Optional[int], bool, Optional[str]]:
+        """
+        Get books with keyset (cursor) pagination and filters
+        Returns: (books, next_cursor, total, total_is_estimate, error_message)
+        """
+        try:
+            books, next_cursor, total, is_estimate = BookDAO.search_by_cursor(
+                cursor, per_page, search, category, author, total_mode
+            )
+            book_dtos = [BookDTO.from_model(book) for book in books]
+            return book_dtos, next_cursor, total, is_estimate, None
+        except ValueError as e:
+            return [], None, None, False, str(e)
+        except Exception as e:
+            return [], None, None, False, f'Lỗi lấy danh sách sách: {str(e)}'
+    
     @staticmethod
     def get_book(book_id: int) -> Tuple[Optional[BookDTO], Optional[str]]:
         """
@@ -32,15 +117,65 @@ class BookService:
         Returns: (BookDTO, error_message)
         """
         try:
+            # Key gồm updated_at của sách: nội dung cache luôn khớp với ETag đang trả về
+            version, _, _ = BookService.get_book_version(book_id)
+            key = cache.make_key(book_id, version=version) if version else None
+            cached = cache.get(DETAIL_CACHE, key) if key else None
+            if cached is not None:
+                return BookDTO.from_dict(cached), None
+            
             book = BookDAO.get_by_id(book_id)
             if not book:
                 return None, 'Sách không tồn tại'
             
-            return BookDTO.from_model(book), None
+            book_dto = BookDTO.from_model(book)
+            if key:
+                cache.set(DETAIL_CACHE, key, book_dto.to_dict())
+            return book_dto, None
             
         except Exception as e:
             return None, f'Lỗi lấy chi tiết sách: {str(e)}'
     
+    @staticmethod
+    def get_categories() -> Tuple[List[str], Optional[str]]:
+        """
+        Get all categories (cached)
+        Returns: (categories, error_message)
+        """
+        try:
+            version, _, _ = BookService.get_catalog_version()
+            return cache.get_or_set(LIST_CACHE, cache.make_key('categories', version=version),
+                                    BookDAO.get_categories), None
+        except Exception as e:
+            return [], f'Lỗi lấy danh sách thể loại: {str(e)}'
+    
+    @staticmethod
+    def get_authors() -> Tuple[List[str], Optional[str]]:
+        """
+        Get all authors (cached)
+        Returns: (authors, error_message)
+        """
+        try:
+            version, _, _ = BookService.get_catalog_version()
+            return cache.get_or_set(LIST_CACHE, cache.make_key('authors', version=version),
+                                    BookDAO.get_authors), None
+        except Exception as e:
+            return [], f'Lỗi lấy danh sách tác giả: {str(e)}'
+    
+    @staticmethod
+    def invalidate_cache(book_ids: Optional[List[int]] = None) -> None:
+        """
+        Xóa cache sau khi sách thay đổi: danh sách/categories/authors (version catalog) và
+        version của các sách trong book_ids (None: mọi sách, vd. import hàng loạt).
+        Cache chi tiết có updated_at của sách trong key nên chỉ các sách này phải đọc lại
+        """
+        cache.invalidate(LIST_CACHE)
+        if book_ids is None:
+            cache.invalidate(DETAIL_CACHE)
+            return
+        for book_id in book_ids:
+            cache.delete(DETAIL_CACHE, cache.make_key('version', book_id))
+    
     @staticmethod
     def create_book(data: Dict) -> Tuple[Optional[BookDTO], Optional[str]]:
         """
@@ -62,6 +197,7 @@ class BookService:
                 stock=int(data['stock']),
                 description=data.get('description'),
                 image_url=data.get('image_url'),
+                image_variants=data.get('image_variants'),
                 publisher=data.get('publisher'),
                 publish_date=data.get('publish_date'),
                 distributor=data.get('distributor'),
@@ -70,6 +206,7 @@ class BookService:
                 weight=data.get('weight')
             )
             
+            BookService.invalidate_cache([new_book.id])
             return BookDTO.from_model(new_book), None
             
         except Exception as e:
@@ -93,15 +230,89 @@ class BookService:
             if not is_valid:
                 return None, error
             
-            # Update book
-            updated_book = BookDAO.update(book_id, **data)
+            # Nhập/xuất kho tương đối: cộng trừ atomic trong database để không
+            # ghi đè các đơn hàng đang trừ kho cùng lúc
+            data = dict(data)
+            stock_delta = data.pop('stock_delta', None)
+            if stock_delta is not None:
+                _, failed = BookDAO.adjust_stock({book_id: int(stock_delta)})
+                if failed:
+                    db.session.rollback()
+                    return None, 'Số lượng tồn kho không đủ để xuất'
+            
+            # Update book (dùng lại book đã load, không query lại)
+            updated_book = BookDAO.update_fields(book, **data)
             
+            BookService.invalidate_cache([book_id])
             return BookDTO.from_model(updated_book), None
             
         except Exception as e:
             db.session.rollback()
             return None, f'Lỗi cập nhật sách: {str(e)}'
     
+    @staticmethod
+    def batch_update_books(items: List[Dict]) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        Cập nhật giá/tồn kho nhiều sách trong một transaction:
+        1. Validate từng item, loại id không tồn tại (một query)
+        2. stock_delta: một câu UPDATE có điều kiện (BookDAO.adjust_stock), item không đủ hàng bị loại
+        3. price/stock: một câu UPDATE ... CASE cho các item còn lại
+        4. Commit một lần, bỏ cache catalog một lần
+        Item lỗi không làm hỏng các item khác.
+        Returns: (results theo thứ tự items, error_message)
+        """
+        is_valid, error = BookValidator.validate_batch(items)
+        if not is_valid:
+            return None, error
+        
+        try:
+            results = []
+            valid = {}
+            for item in items:
+                book_id = item.get('id')
+                is_valid, error = BookValidator.validate_batch_item(item)
+                if is_valid and book_id in valid:
+                    is_valid, error = False, 'id bị lặp trong batch'
+                results.append({'id': book_id, 'success': is_valid, 'error': error})
+                if is_valid:
+                    valid[book_id] = item
+            
+            existing = set(BookDAO.get_existing_ids(list(valid)))
+            for result in results:
+                if result['success'] and result['id'] not in existing:
+                    result.update(success=False, error='Sách không tồn tại')
+                    valid.pop(result['id'])
+            
+            # Nhập/xuất kho tương đối (atomic, không âm)
+            deltas = {book_id: int(item['stock_delta']) for book_id, item in valid.items() if 'stock_delta' in item}
+            _, failed = BookDAO.adjust_stock(deltas)
+            for result in results:
+                if result['success'] and result['id'] in failed:
+                    result.update(success=False, error='Số lượng tồn kho không đủ để xuất')
+                    valid.pop(result['id'])
+            
+            # Giá / tồn kho tuyệt đối
+            BookDAO.set_price_and_stock(
+                {book_id: Decimal(str(item['price'])) for book_id, item in valid.items() if 'price' in item},
+                {book_id: int(item['stock']) for book_id, item in valid.items() if 'stock' in item}
+            )
+            
+            current = BookDAO.get_price_and_stock(list(valid))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return None, f'Lỗi cập nhật sách: {str(e)}'
+        
+        if valid:
+            BookService.invalidate_cache(list(valid))
+        
+        for result in results:
+            if result['success']:
+                price, stock = current[result['id']]
+                result.update(price=float(price), stock=stock)
+                del result['error']
+        return results, None
+    
     @staticmethod
     def delete_book(book_id: int) -> Tuple[bool, Optional[str]]:
         """
@@ -113,6 +324,7 @@ class BookService:
             if not success:
                 return False, 'Sách không tồn tại'
             
+            BookService.invalidate_cache([book_id])
             return True, None
             
         except Exception as e:
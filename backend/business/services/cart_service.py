@@ -6,6 +6,7 @@ from data.cart_dao import CartDAO
 from data.book_dao import BookDAO
 from business.dto.cart_dto import CartDTO
 from business.components.cart_validator import CartValidator
+from business.components.stock_reservation import StockReservation
 from models import db
 
 
@@ -21,6 +22,10 @@ class CartService:
         try:
             cart_items = CartDAO.get_by_user_id(user_id)
             cart_dtos = [CartDTO.from_model(item) for item in cart_items]
+            if StockReservation.is_enabled():
+                available = StockReservation.available_stocks([dto.book_id for dto in cart_dtos], user_id)
+                for dto in cart_dtos:
+                    dto.available_stock = available.get(dto.book_id)
             total_items = CartDAO.get_total_items(user_id)
             return cart_dtos, total_items
         except Exception as e:
@@ -38,18 +43,33 @@ class CartService:
             if not is_valid:
                 return None, error
             
+            reservations_enabled = StockReservation.is_enabled()
+            if reservations_enabled:
+                # Khóa dòng sách trước khi đọc giỏ hàng (giữ tới commit)
+                BookDAO.get_by_id_for_update(book_id)
+            
             # Check if item already exists in cart
             existing_cart = CartDAO.get_by_user_and_book(user_id, book_id)
+            new_quantity = existing_cart.quantity + quantity if existing_cart else quantity
+            
+            # Giữ hàng và đổi giỏ trong cùng một transaction
+            if reservations_enabled:
+                error = StockReservation.hold(user_id, book_id, new_quantity)
+                if error:
+                    db.session.rollback()
+                    return None, error
             
             if existing_cart:
                 # Update quantity
-                new_quantity = existing_cart.quantity + quantity
-                updated_cart = CartDAO.update_quantity(existing_cart.id, new_quantity)
-                return CartDTO.from_model(updated_cart), None
+                cart_item = CartDAO.update_quantity(existing_cart.id, new_quantity, commit=False)
             else:
                 # Create new cart item
-                new_cart = CartDAO.create(user_id, book_id, quantity)
-                return CartDTO.from_model(new_cart), None
+                cart_item = CartDAO.create(user_id, book_id, quantity, commit=False)
+            db.session.commit()
+            
+            if reservations_enabled:
+                StockReservation.invalidate(book_id)
+            return CartDTO.from_model(cart_item), None
             
         except Exception as e:
             db.session.rollback()
@@ -67,8 +87,21 @@ class CartService:
             if not is_valid:
                 return None, error
             
+            # Giữ hàng và cập nhật giỏ trong cùng một transaction
+            reservations_enabled = StockReservation.is_enabled()
+            cart_item = CartDAO.get_by_id(cart_id)
+            if reservations_enabled:
+                error = StockReservation.hold(user_id, cart_item.book_id, quantity)
+                if error:
+                    db.session.rollback()
+                    return None, error
+            
             # Update cart item
-            updated_cart = CartDAO.update_quantity(cart_id, quantity)
+            updated_cart = CartDAO.update_quantity(cart_id, quantity, commit=False)
+            db.session.commit()
+            
+            if reservations_enabled:
+                StockReservation.invalidate(updated_cart.book_id)
             return CartDTO.from_model(updated_cart), None
             
         except Exception as e:
@@ -87,8 +120,15 @@ class CartService:
             if not is_valid:
                 return False, error
             
-            # Delete cart item
-            success = CartDAO.delete(cart_id)
+            # Delete cart item (và bỏ hold tương ứng)
+            cart_item = CartDAO.get_by_id(cart_id)
+            book_id = cart_item.book_id
+            success = CartDAO.delete(cart_id, commit=False)
+            if success and StockReservation.is_enabled():
+                StockReservation.release(user_id, book_id, commit=False)
+            db.session.commit()
+            if success and StockReservation.is_enabled():
+                StockReservation.invalidate(book_id)
             return success, None
             
         except Exception as e:
@@ -0,0 +1,105 @@
+"""
+Image Garbage Collection Business Service
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from data.image_ref_dao import ImageRefDAO
+from utils.storage import storage_service
+
+
+class ImageGCService:
+    """Dọn object ảnh trên MinIO không còn được books/banners tham chiếu"""
+
+    FOLDERS = ['books', 'banners']
+    DEFAULT_BATCH_SIZE = 1000
+    # Ảnh vừa upload chưa được gán cho sách/banner nào: chỉ xóa nhóm cũ hơn khoảng này
+    DEFAULT_MIN_AGE_HOURS = 24
+    MAX_REPORTED_KEYS = 100
+    MAX_REPORTED_URLS = 5
+
+    @staticmethod
+    def object_group(object_name: str) -> str:
+        """
+        Đơn vị tham chiếu/xóa: variant set <folder>/<sha256>/* là một nhóm (chỉ cần một
+        variant còn được dùng là giữ cả nhóm), file gốc <folder>/<name> là một nhóm
+        """
+        parts = object_name.split('/')
+        return '/'.join(parts[:2]) if len(parts) > 2 else object_name
+
+    @staticmethod
+    def collect(dry_run: bool = True, min_age_hours: float = DEFAULT_MIN_AGE_HOURS,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        1. Đọc mọi URL ảnh trong books/banners (stream) -> tập nhóm đang được dùng;
+           URL của storage này mà không xác định được key (vd. IMAGE_BASE_URL/MINIO_BUCKET
+           cấu hình sai) -> dừng, không xóa gì (tránh xóa ảnh đang dùng)
+        2. Liệt kê object dưới books/ và banners/, gom theo nhóm
+        3. Nhóm không được tham chiếu và không có object nào mới hơn min_age_hours -> xóa
+           theo batch (DeleteObjects), dry_run chỉ báo cáo
+        Returns: (report, error_message)
+        """
+        if batch_size < 1 or batch_size > 1000:
+            return None, 'batch_size không hợp lệ (1-1000)'
+        if min_age_hours < 0:
+            return None, 'min_age_hours không hợp lệ'
+
+        referenced = set()
+        unmapped = []
+        for url in ImageRefDAO.iter_image_urls():
+            key = storage_service.object_key_from_url(url)
+            if key:
+                referenced.add(ImageGCService.object_group(key))
+            elif storage_service.is_own_url(url):
+                unmapped.append(url)
+        if unmapped:
+            return None, (f'{len(unmapped)} URL ảnh không xác định được object key '
+                          f'(kiểm tra IMAGE_BASE_URL/MINIO_BUCKET), dừng GC: '
+                          f'{", ".join(unmapped[:ImageGCService.MAX_REPORTED_URLS])}')
+
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=min_age_hours)
+        report = {'dry_run': dry_run, 'scanned_objects': 0, 'referenced_groups': len(referenced),
+                  'orphaned_groups': 0, 'orphaned_objects': 0, 'orphaned_bytes': 0, 'skipped_recent': 0,
+                  'deleted_objects': 0, 'errors': [], 'orphaned_keys': [], 'orphaned_keys_truncated': False}
+
+        # Nhóm chưa được tham chiếu: group -> [last_modified mới nhất, [(object_name, size)]]
+        candidates = {}
+        for folder in ImageGCService.FOLDERS:
+            for object_name, size, last_modified in storage_service.iter_objects(f'{folder}/'):
+                report['scanned_objects'] += 1
+                group = ImageGCService.object_group(object_name)
+                if group in referenced:
+                    continue
+                entry = candidates.setdefault(group, [last_modified, []])
+                if last_modified and (entry[0] is None or last_modified > entry[0]):
+                    entry[0] = last_modified
+                entry[1].append((object_name, size))
+
+        batch = []
+        for group, (last_modified, objects) in candidates.items():
+            if last_modified and last_modified > cutoff:
+                report['skipped_recent'] += len(objects)
+                continue
+            report['orphaned_groups'] += 1
+            for object_name, size in objects:
+                report['orphaned_objects'] += 1
+                report['orphaned_bytes'] += size or 0
+                if len(report['orphaned_keys']) < ImageGCService.MAX_REPORTED_KEYS:
+                    report['orphaned_keys'].append(object_name)
+                else:
+                    report['orphaned_keys_truncated'] = True
+                batch.append(object_name)
+                if len(batch) >= batch_size:
+                    ImageGCService._delete_batch(batch, dry_run, report)
+                    batch = []
+        ImageGCService._delete_batch(batch, dry_run, report)
+
+        return report, None
+
+    @staticmethod
+    def _delete_batch(batch, dry_run: bool, report: Dict) -> None:
+        if dry_run or not batch:
+            return
+        errors = storage_service.delete_files(batch)
+        report['deleted_objects'] += len(batch) - len(errors)
+        for object_name, message in errors:
+            report['errors'].append({'key': object_name, 'error': message})
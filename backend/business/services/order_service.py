@@ -3,6 +3,7 @@ Order Business Service
 """
 from typing import Dict, Optional, Tuple, List
 from data.order_dao import OrderDAO
+from data.sales_stats_dao import SalesStatsDAO
 from business.dto.order_dto import OrderDTO
 from business.components.order_validator import OrderValidator
 from business.workflows.order_workflow import OrderWorkflow
@@ -66,10 +67,16 @@ class OrderService:
             if not is_valid:
                 return None, error
             
-            # Update order
-            updated_order = OrderDAO.update_status(order_id, status, payment_status)
-            if not updated_order:
+            # Lock order để chuyển rollup thống kê đúng từ trạng thái cũ sang mới
+            order = OrderDAO.get_by_id_for_update(order_id)
+            if not order:
                 return None, 'Đơn hàng không tồn tại'
+            previous_status, previous_payment_status = order.status, order.payment_status
+            
+            # Update order + rollup trong cùng transaction
+            updated_order = OrderDAO.update_status(order_id, status, payment_status, commit=False)
+            SalesStatsDAO.move_order(updated_order, previous_status, previous_payment_status)
+            OrderDAO.commit()
             
             return OrderDTO.from_model(updated_order), None
             
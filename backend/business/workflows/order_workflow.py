@@ -6,7 +6,10 @@ from decimal import Decimal
 from data.cart_dao import CartDAO
 from data.book_dao import BookDAO
 from data.order_dao import OrderDAO, OrderItemDAO
+from data.sales_stats_dao import SalesStatsDAO
 from business.components.order_validator import OrderValidator
+from business.components.stock_reservation import StockReservation
+from business.services.book_service import BookService
 from business.dto.order_dto import OrderDTO, OrderItemDTO
 from models import db
 
@@ -17,16 +20,17 @@ class OrderWorkflow:
     @staticmethod
     def create_order(user_id: int, shipping_address: str) -> Tuple[Optional[OrderDTO], Optional[str]]:
         """
-        Complete workflow for creating an order:
+        Complete workflow for creating an order (một transaction, commit một lần):
         1. Validate order data
         2. Get cart items
-        3. Validate stock for each item
-        4. Calculate total amount
+        3. Lock all books in one SELECT ... FOR UPDATE (theo thứ tự id)
+        4. Validate stock and calculate total amount
         5. Create order
-        6. Create order items
-        7. Update book stock
-        8. Clear cart
-        9. Commit transaction
+        6. Bulk insert order items
+        7. Reserve stock with one conditional UPDATE (BookDAO.reserve_stock)
+        8. Clear cart (và bỏ stock hold của user nếu bật reservation)
+        9. Cộng đơn vào bảng thống kê (order_daily_stats, book_daily_sales)
+        10. Commit transaction
         
         Returns: (OrderDTO, error_message)
         """
@@ -36,32 +40,43 @@ class OrderWorkflow:
             if not is_valid:
                 return None, error
             
-            # Step 2: Get cart items
+            # Step 2: Get cart items (gộp theo book_id)
             cart_items = CartDAO.get_by_user_id(user_id)
+            quantities = {}
+            for cart_item in cart_items:
+                quantities[cart_item.book_id] = quantities.get(cart_item.book_id, 0) + cart_item.quantity
+            
+            # Step 3: Lock books
+            books = BookDAO.get_by_ids_for_update(sorted(quantities))
+            
+            # Hàng đang được user khác giữ (đọc sau khi đã lock sách)
+            reservations_enabled = StockReservation.is_enabled()
+            held = StockReservation.held_by_others(user_id, list(quantities)) if reservations_enabled else {}
             
-            # Step 3 & 4: Calculate total and prepare order items data
+            # Step 4: Validate stock (double check, dưới lock) and calculate total
             total_amount = Decimal('0')
             order_items_data = []
             
-            for cart_item in cart_items:
-                book = BookDAO.get_by_id(cart_item.book_id)
+            for book_id, quantity in quantities.items():
+                book = books.get(book_id)
                 if not book:
                     db.session.rollback()
-                    return None, f'Sách với ID {cart_item.book_id} không tồn tại'
+                    return None, f'Sách với ID {book_id} không tồn tại'
                 
-                # Validate stock (double check)
-                if book.stock < cart_item.quantity:
+                available = book.stock - held.get(book_id, 0)
+                if available < quantity:
+                    # Dựng message trước rollback: rollback expire book, đọc title sau đó phải query lại
+                    error = f'Sách "{book.title}" không đủ số lượng (còn {max(available, 0)} cuốn)'
                     db.session.rollback()
-                    return None, f'Sách "{book.title}" không đủ số lượng (còn {book.stock} cuốn)'
+                    return None, error
                 
                 # Calculate item total
                 item_price = Decimal(str(book.price))
-                item_total = item_price * cart_item.quantity
-                total_amount += item_total
+                total_amount += item_price * quantity
                 
                 order_items_data.append({
                     'book_id': book.id,
-                    'quantity': cart_item.quantity,
+                    'quantity': quantity,
                     'price': item_price
                 })
             
@@ -74,27 +89,35 @@ class OrderWorkflow:
                 payment_status='pending'
             )
             
-            # Step 6: Create order items and update stock
-            for item_data in order_items_data:
-                # Create order item
-                OrderItemDAO.create(
-                    order_id=new_order.id,
-                    book_id=item_data['book_id'],
-                    quantity=item_data['quantity'],
-                    price=item_data['price']
-                )
-                
-                # Step 7: Update book stock
-                BookDAO.update_stock(item_data['book_id'], -item_data['quantity'])
+            order_id = new_order.id
+            
+            # Step 6: Create order items
+            OrderItemDAO.bulk_create(order_id, order_items_data)
+            
+            # Step 7: Update book stock
+            _, failed = BookDAO.reserve_stock(quantities)
+            if failed:
+                titles = ', '.join(f'"{books[book_id].title}"' for book_id in failed)
+                db.session.rollback()
+                return None, f'Sách {titles} không đủ số lượng, vui lòng thử lại'
             
             # Step 8: Clear cart
-            CartDAO.delete_by_user_id(user_id)
+            CartDAO.delete_by_user_id(user_id, commit=False)
+            if reservations_enabled:
+                StockReservation.release(user_id, commit=False)
             
-            # Step 9: Commit transaction
+            # Step 9: Update sales rollups
+            SalesStatsDAO.record_order(new_order.created_at.date(), new_order.status,
+                                       new_order.payment_status, total_amount, order_items_data)
+            
+            # Step 10: Commit transaction
             OrderDAO.commit()
             
-            # Convert to DTO
-            order_dto = OrderDTO.from_model(new_order)
+            # Tồn kho đã đổi -> bỏ cache catalog và chi tiết các sách trong đơn
+            BookService.invalidate_cache(list(quantities))
+            
+            # Convert to DTO (reload order kèm items)
+            order_dto = OrderDTO.from_model(OrderDAO.get_by_user_and_id(user_id, order_id))
             
             return order_dto, None
             
@@ -0,0 +1,157 @@
+"""
+Flask CLI commands: khởi tạo schema và seed dữ liệu
+
+    flask init-db   # áp dụng migrations (Alembic)
+    flask seed      # seed dữ liệu mẫu (bỏ qua nếu đã có dữ liệu)
+    flask rebuild-stats  # tính lại bảng thống kê bán hàng từ orders
+    flask import-books FILE  # import sách hàng loạt (CSV/JSONL, upsert theo external_id)
+    flask export-books FILE  # export catalog (CSV/JSONL)
+    flask gc-images [--delete]  # dọn ảnh trên MinIO không còn được books/banners dùng (mặc định dry-run)
+"""
+from contextlib import contextmanager
+import click
+from flask.cli import with_appcontext
+from flask_migrate import upgrade, stamp
+from sqlalchemy import inspect, text
+from models import db
+from data.sales_stats_dao import SalesStatsDAO
+from business.services.book_import_service import BookImportService
+from business.services.image_gc_service import ImageGCService
+from seed_data import seed_database
+
+# Khóa advisory (Postgres) để nhiều replica khởi động cùng lúc không chạy song song.
+# Dùng khóa mức transaction: qua PgBouncer (transaction pooling) khóa mức session có thể
+# bị giữ lại trên server connection đã trả về pool hoặc unlock nhầm connection khác
+INIT_DB_LOCK_ID = 7204001
+
+# Revision ứng với schema do db.create_all() tạo trước khi có migrations
+BASELINE_REVISION = '0001'
+
+
+@contextmanager
+def init_db_lock():
+    """
+    Giữ pg_advisory_xact_lock trong lúc migrate/seed (không làm gì với DB khác).
+    Transaction giữ khóa mở đến khi xong nên PgBouncer ghim một server connection cho nó;
+    khóa tự nhả khi transaction kết thúc (kể cả khi process chết)
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+    with db.engine.connect() as connection, connection.begin():
+        connection.execute(text('SELECT pg_advisory_xact_lock(:lock_id)'), {'lock_id': INIT_DB_LOCK_ID})
+        yield
+
+
+def init_database():
+    """Áp dụng migrations; database cũ (tạo bằng create_all, chưa có alembic_version) được stamp baseline trước"""
+    tables = inspect(db.engine).get_table_names()
+    if 'users' in tables and 'alembic_version' not in tables:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Tạo/cập nhật schema database bằng migrations"""
+    with init_db_lock():
+        init_database()
+    click.echo('✅ Database schema is up to date')
+
+
+@click.command('seed')
+@with_appcontext
+def seed_command():
+    """Seed dữ liệu mẫu (idempotent)"""
+    with init_db_lock():
+        seed_database()
+
+
+@click.command('rebuild-stats')
+@with_appcontext
+def rebuild_stats_command():
+    """Tính lại order_daily_stats/book_daily_sales từ orders (một transaction)"""
+    order_rows, book_rows = SalesStatsDAO.rebuild()
+    db.session.commit()
+    click.echo(f'✅ Rebuilt sales stats: {order_rows} order_daily_stats rows, {book_rows} book_daily_sales rows')
+
+
+def _file_format(path, file_format):
+    """Định dạng theo --format hoặc đuôi file"""
+    if file_format:
+        return file_format
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+@click.command('import-books')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(BookImportService.FORMATS), default=None,
+              help='csv hoặc jsonl (mặc định theo đuôi file)')
+@click.option('--batch-size', default=BookImportService.DEFAULT_BATCH_SIZE, show_default=True)
+@with_appcontext
+def import_books_command(path, file_format, batch_size):
+    """Import sách từ CSV/JSONL, upsert theo external_id"""
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        summary, error = BookImportService.import_books(stream, _file_format(path, file_format), batch_size)
+    if error:
+        raise click.ClickException(error)
+
+    for row_error in summary['errors']:
+        click.echo(f"Dòng {row_error['line']} ({row_error['external_id']}): {row_error['error']}", err=True)
+    click.echo(f"✅ Imported books: {summary['inserted']} inserted, {summary['updated']} updated, "
+               f"{summary['failed']} failed ({summary['processed']} rows)")
+
+
+@click.command('export-books')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'file_format', type=click.Choice(BookImportService.FORMATS), default=None,
+              help='csv hoặc jsonl (mặc định theo đuôi file)')
+@with_appcontext
+def export_books_command(path, file_format):
+    """Export toàn bộ catalog ra file CSV/JSONL"""
+    lines, error = BookImportService.export_books(_file_format(path, file_format))
+    if error:
+        raise click.ClickException(error)
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        output.writelines(lines)
+    click.echo(f'✅ Exported books to {path}')
+
+
+@click.command('gc-images')
+@click.option('--delete', 'delete', is_flag=True, default=False,
+              help='Xóa thật (mặc định chỉ báo cáo, dry-run)')
+@click.option('--min-age-hours', default=ImageGCService.DEFAULT_MIN_AGE_HOURS, show_default=True, type=float,
+              help='Chỉ xóa ảnh upload cũ hơn khoảng này (ảnh mới có thể chưa được gán cho sách/banner)')
+@click.option('--batch-size', default=ImageGCService.DEFAULT_BATCH_SIZE, show_default=True)
+@with_appcontext
+def gc_images_command(delete, min_age_hours, batch_size):
+    """Dọn object ảnh không còn được tham chiếu (chạy định kỳ bằng cron)"""
+    report, error = ImageGCService.collect(dry_run=not delete, min_age_hours=min_age_hours, batch_size=batch_size)
+    if error:
+        raise click.ClickException(error)
+
+    for object_name in report['orphaned_keys']:
+        click.echo(object_name)
+    if report['orphaned_keys_truncated']:
+        click.echo('...')
+    for delete_error in report['errors']:
+        click.echo(f"Lỗi xóa {delete_error['key']}: {delete_error['error']}", err=True)
+
+    summary = (f"{report['orphaned_objects']} orphaned objects in {report['orphaned_groups']} groups "
+               f"({report['orphaned_bytes']} bytes), {report['skipped_recent']} recent objects skipped, "
+               f"{report['scanned_objects']} scanned")
+    if delete:
+        click.echo(f"✅ Deleted {report['deleted_objects']} objects: {summary}")
+    else:
+        click.echo(f"Dry run (thêm --delete để xóa): {summary}")
+
+
+def register_commands(app):
+    """Đăng ký CLI commands cho app"""
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(import_books_command)
+    app.cli.add_command(export_books_command)
+    app.cli.add_command(gc_images_command)
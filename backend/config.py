@@ -3,6 +3,7 @@ Cấu hình cho ứng dụng Flask
 """
 import os
 from dotenv import load_dotenv
+from utils.db_pool import build_engine_options
 
 load_dotenv()
 
@@ -15,9 +16,62 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool mỗi worker process: DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    # DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, DB_PGBOUNCER (xem utils/db_pool.py).
+    # gunicorn.conf.py đặt pool mặc định lớn hơn cho gevent/gthread
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # Read replica (tùy chọn): các GET chỉ đọc (@use_replica) đọc từ đây. Client vừa ghi
+    # trong REPLICA_LAG_GUARD_SECONDS giây tiếp tục đọc từ primary
+    SQLALCHEMY_BINDS = {'replica': os.getenv('REPLICA_DATABASE_URL')} if os.getenv('REPLICA_DATABASE_URL') else {}
+    REPLICA_LAG_GUARD_SECONDS = float(os.getenv('REPLICA_LAG_GUARD_SECONDS', '5'))
+    
     # Secret key cho session
     SECRET_KEY = os.getenv('SECRET_KEY', 'bookstore-secret-key-change-in-production')
     
+    # Giữ hàng khi thêm vào giỏ (tùy chọn): tồn kho khả dụng = stock - các hold còn hạn
+    STOCK_HOLDS_ENABLED = os.getenv('STOCK_HOLDS_ENABLED', 'false').lower() == 'true'
+    STOCK_HOLD_TTL_SECONDS = int(os.getenv('STOCK_HOLD_TTL_SECONDS', '900'))
+    STOCK_HOLD_SWEEP_INTERVAL = int(os.getenv('STOCK_HOLD_SWEEP_INTERVAL', '60'))
+    AVAILABLE_STOCK_CACHE_TTL = float(os.getenv('AVAILABLE_STOCK_CACHE_TTL', '2'))
+    
+    # Cache cho catalog (sách, banners): memory (mỗi worker) | redis (dùng chung) | none
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', '60'))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '2048'))
+    # Version của collection (ETag) được cache ngắn hơn để các worker sớm thấy thay đổi
+    CACHE_VERSION_TTL = float(os.getenv('CACHE_VERSION_TTL', '5'))
+    
+    # HTTP caching (ETag/Last-Modified): max-age của Cache-Control cho các endpoint đọc public
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '0'))
+    
+    # Phân quyền: role/is_active của user được cache trong process (giây)
+    AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', '30'))
+    
+    # Hash password (bcrypt): cost factor và pool chạy ngoài request thread
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    PASSWORD_HASH_EXECUTOR = os.getenv('PASSWORD_HASH_EXECUTOR', 'process')  # process | thread | inline
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    # Số thao tác tối đa đang chờ/chạy mỗi worker, vượt quá -> 503
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '8'))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+    
+    # Giới hạn body của mọi request (Werkzeug trả 413 trước khi đọc body), gồm cả import sách
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', str(100 * 1024 * 1024)))
+    # Kích thước ảnh upload tối đa (/api/admin/upload kiểm tra Content-Length trước khi đọc body).
+    # MINIO_PART_SIZE, UPLOAD_MAX_CONCURRENT: xem utils/storage.py
+    UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+    
+    # Xử lý ảnh upload: các chiều rộng variant WebP (srcset), thumbnail và pool xử lý
+    IMAGE_VARIANT_WIDTHS = [int(width) for width in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1024').split(',')]
+    IMAGE_THUMBNAIL_WIDTH = int(os.getenv('IMAGE_THUMBNAIL_WIDTH', '160'))
+    IMAGE_WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', '80'))
+    IMAGE_PROCESS_EXECUTOR = os.getenv('IMAGE_PROCESS_EXECUTOR', 'process')  # process | thread | inline
+    IMAGE_PROCESS_WORKERS = int(os.getenv('IMAGE_PROCESS_WORKERS', '2'))
+    IMAGE_PROCESS_MAX_PENDING = int(os.getenv('IMAGE_PROCESS_MAX_PENDING', '4'))
+    IMAGE_PROCESS_TIMEOUT = float(os.getenv('IMAGE_PROCESS_TIMEOUT', '30'))
+    
     # Session config
     SESSION_COOKIE_SECURE = False  # Set True trong production với HTTPS
     SESSION_COOKIE_HTTPONLY = True
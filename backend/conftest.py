@@ -0,0 +1,2 @@
+# test_backend.py là script in danh sách user để kiểm tra thủ công, không phải test
+collect_ignore = ['test_backend.py']
@@ -5,6 +5,8 @@ from .user_dao import UserDAO
 from .book_dao import BookDAO
 from .cart_dao import CartDAO
 from .order_dao import OrderDAO
+from .stock_hold_dao import StockHoldDAO
+from .sales_stats_dao import SalesStatsDAO
 
-__all__ = ['UserDAO', 'BookDAO', 'CartDAO', 'OrderDAO']
+__all__ = ['UserDAO', 'BookDAO', 'CartDAO', 'OrderDAO', 'StockHoldDAO', 'SalesStatsDAO']
 
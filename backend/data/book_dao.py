@@ -3,8 +3,13 @@ Book Data Access Object
 """
 from models import db, Book
 from business.dto.book_dto import BookDTO
-from typing import Optional, List, Tuple
-from sqlalchemy import or_
+from typing import Optional, List, Tuple, Dict, Iterator
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import or_, func, case, update, null
+from sqlalchemy.orm.attributes import set_committed_value
+from utils.helpers import normalize_search_text
+from data.pagination import keyset_paginate, count_rows
 
 
 class BookDAO:
@@ -15,23 +20,40 @@ class BookDAO:
         """Get book by ID"""
         return Book.query.get(book_id)
     
+    @staticmethod
+    def get_by_id_for_update(book_id: int) -> Optional[Book]:
+        """Get book by ID và khóa dòng (SELECT ... FOR UPDATE) tới hết transaction"""
+        return Book.query.filter_by(id=book_id).with_for_update().populate_existing().first()
+    
+    @staticmethod
+    def get_by_ids_for_update(book_ids: List[int]) -> Dict[int, Book]:
+        """
+        Get books by IDs trong một query và khóa các dòng (SELECT ... FOR UPDATE).
+        Khóa theo thứ tự id tăng dần để các checkout đồng thời không deadlock.
+        Returns: {book_id: Book}
+        """
+        books = (Book.query.filter(Book.id.in_(book_ids)).order_by(Book.id)
+                 .with_for_update().populate_existing().all())
+        return {book.id: book for book in books}
+    
     @staticmethod
     def get_all() -> List[Book]:
         """Get all books"""
         return Book.query.all()
     
     @staticmethod
-    def search(page: int = 1, per_page: int = 12, search: str = '',
-               category: str = '', author: str = '') -> Tuple[List[Book], int, int]:
-        """
-        Search books with pagination
-        Returns: (books, total, pages)
-        """
+    def _filtered_query(search: str = '', category: str = '', author: str = ''):
+        """Build query với các filter search/category/author"""
         query = Book.query
         
-        # Search by title
+        # Full-text search trên search_text (title, author, description, publisher),
+        # không phân biệt dấu. Mỗi từ khóa phải khớp đầu một từ; LIKE dùng GIN trigram index
         if search:
-            query = query.filter(Book.title.ilike(f'%{search}%'))
+            for word in normalize_search_text(search).split():
+                query = query.filter(or_(
+                    Book.search_text.startswith(word, autoescape=True),
+                    Book.search_text.contains(f' {word}', autoescape=True)
+                ))
         
         # Filter by category
         if category:
@@ -41,15 +63,50 @@ class BookDAO:
         if author:
             query = query.filter(Book.author.ilike(f'%{author}%'))
         
+        return query
+    
+    @staticmethod
+    def search(page: int = 1, per_page: int = 12, search: str = '',
+               category: str = '', author: str = '') -> Tuple[List[Book], int, int]:
+        """
+        Search books with pagination
+        Returns: (books, total, pages)
+        """
+        query = BookDAO._filtered_query(search, category, author)
+        
+        # Xếp hạng theo độ khớp (pg_trgm), sách khớp nhất lên đầu
+        keywords = normalize_search_text(search) if search else ''
+        if keywords and db.engine.dialect.name == 'postgresql':
+            query = query.order_by(
+                func.word_similarity(keywords, Book.search_text).desc(),
+                Book.id
+            )
+        
         # Pagination
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return pagination.items, pagination.total, pagination.pages
     
+    @staticmethod
+    def search_by_cursor(cursor: Optional[str] = None, per_page: int = 12, search: str = '',
+                         category: str = '', author: str = '',
+                         total_mode: str = 'none') -> Tuple[List[Book], Optional[str], Optional[int], bool]:
+        """
+        Search books theo keyset (created_at, id) giảm dần - sách mới nhất trước
+        Returns: (books, next_cursor, total, total_is_estimate)
+        Raises: ValueError nếu cursor không hợp lệ
+        """
+        query = BookDAO._filtered_query(search, category, author)
+        books, next_cursor = keyset_paginate(
+            query, [Book.created_at, Book.id], cursor, per_page, descending=True
+        )
+        total, is_estimate = count_rows(query, total_mode)
+        return books, next_cursor, total, is_estimate
+    
     @staticmethod
     def create(title: str, author: str, category: str, price: float, stock: int,
                description: Optional[str] = None, image_url: Optional[str] = None,
-               publisher: Optional[str] = None, publish_date: Optional[str] = None,
+               image_variants: Optional[dict] = None, publisher: Optional[str] = None, publish_date: Optional[str] = None,
                distributor: Optional[str] = None, dimensions: Optional[str] = None,
                pages: Optional[int] = None, weight: Optional[int] = None) -> Book:
         """Create a new book"""
@@ -61,6 +118,7 @@ class BookDAO:
             price=float(price),
             stock=int(stock),
             image_url=image_url.strip() if image_url else None,
+            image_variants=image_variants,
             publisher=publisher.strip() if publisher else None,
             publish_date=publish_date.strip() if publish_date else None,
             distributor=distributor.strip() if distributor else None,
@@ -78,7 +136,11 @@ class BookDAO:
         book = Book.query.get(book_id)
         if not book:
             return None
-        
+        return BookDAO.update_fields(book, **kwargs)
+    
+    @staticmethod
+    def update_fields(book: Book, **kwargs) -> Book:
+        """Update fields của book đã load và commit"""
         # Update fields
         if 'title' in kwargs:
             book.title = kwargs['title'].strip()
@@ -93,7 +155,13 @@ class BookDAO:
         if 'stock' in kwargs:
             book.stock = int(kwargs['stock'])
         if 'image_url' in kwargs:
-            book.image_url = kwargs['image_url'].strip() if kwargs['image_url'] else None
+            image_url = kwargs['image_url'].strip() if kwargs['image_url'] else None
+            # Đổi ảnh mà không gửi variant set mới: bỏ variant set của ảnh cũ (srcset được ưu tiên)
+            if image_url != book.image_url and 'image_variants' not in kwargs:
+                book.image_variants = None
+            book.image_url = image_url
+        if 'image_variants' in kwargs:
+            book.image_variants = kwargs['image_variants']
         if 'publisher' in kwargs:
             book.publisher = kwargs['publisher'].strip() if kwargs['publisher'] else None
         if 'publish_date' in kwargs:
@@ -122,12 +190,190 @@ class BookDAO:
     
     @staticmethod
     def update_stock(book_id: int, quantity: int) -> Optional[Book]:
-        """Update book stock (add or subtract)"""
-        book = Book.query.get(book_id)
-        if book:
-            book.stock += quantity
+        """
+        Update book stock (add or subtract) atomically and commit.
+        Returns: Book sau khi cập nhật, None nếu sách không tồn tại hoặc không đủ tồn kho
+        """
+        new_stocks, failed = BookDAO.adjust_stock({book_id: quantity})
+        if failed:
+            db.session.rollback()
+            return None
+        db.session.commit()
+        # UPDATE ... RETURNING chạy với synchronize_session=False: đọc lại dòng từ database,
+        # không dùng bản Book có sẵn trong identity map
+        return db.session.get(Book, book_id, populate_existing=True)
+    
+    @staticmethod
+    def adjust_stock(deltas: Dict[int, int]) -> Tuple[Dict[int, int], List[int]]:
+        """
+        Cộng/trừ tồn kho nhiều sách bằng một câu UPDATE có điều kiện:
+            UPDATE books SET stock = stock + delta
+            WHERE id IN (...) AND stock + delta >= 0 RETURNING id, stock
+        Atomic trong database nên các worker đồng thời không ghi đè nhau và stock
+        không bao giờ âm. Không commit (thuộc transaction của caller).
+        Book đã load trong session được gán stock mới từ RETURNING (không bị ghi là thay đổi).
+        Returns: ({book_id: new_stock} cho các dòng thành công, [book_id thất bại])
+        """
+        if not deltas:
+            return {}, []
+        
+        delta = case(deltas, value=Book.id)
+        rows = db.session.execute(
+            update(Book)
+            .where(Book.id.in_(list(deltas)), Book.stock + delta >= 0)
+            .values(stock=Book.stock + delta, updated_at=datetime.utcnow())
+            .returning(Book.id, Book.stock)
+            .execution_options(synchronize_session=False)
+        ).all()
+        
+        new_stocks = {book_id: stock for book_id, stock in rows}
+        failed = [book_id for book_id in deltas if book_id not in new_stocks]
+        for book_id, stock in new_stocks.items():
+            loaded = db.session.identity_map.get(db.session.identity_key(Book, book_id))
+            if loaded is not None:
+                set_committed_value(loaded, 'stock', stock)
+        return new_stocks, failed
+    
+    @staticmethod
+    def get_existing_ids(book_ids: List[int]) -> List[int]:
+        """Các id trong book_ids có tồn tại"""
+        if not book_ids:
+            return []
+        return [book_id for (book_id,) in db.session.query(Book.id).filter(Book.id.in_(book_ids)).all()]
+    
+    @staticmethod
+    def set_price_and_stock(prices: Dict[int, Decimal], stocks: Dict[int, int]) -> None:
+        """
+        Đặt giá/tồn kho (giá trị tuyệt đối) cho nhiều sách bằng một câu UPDATE:
+            UPDATE books SET price = CASE id WHEN ... ELSE price END,
+                             stock = CASE id WHEN ... ELSE stock END
+            WHERE id IN (...)
+        Không commit (thuộc transaction của caller).
+        """
+        book_ids = set(prices) | set(stocks)
+        if not book_ids:
+            return
+        
+        values = {'updated_at': datetime.utcnow()}
+        if prices:
+            values['price'] = case(prices, value=Book.id, else_=Book.price)
+        if stocks:
+            values['stock'] = case(stocks, value=Book.id, else_=Book.stock)
+        db.session.execute(
+            update(Book)
+            .where(Book.id.in_(list(book_ids)))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def get_price_and_stock(book_ids: List[int]) -> Dict[int, Tuple[Decimal, int]]:
+        """{book_id: (price, stock)} đọc trong một query"""
+        if not book_ids:
+            return {}
+        rows = db.session.query(Book.id, Book.price, Book.stock).filter(Book.id.in_(book_ids)).all()
+        return {book_id: (price, stock) for book_id, price, stock in rows}
+    
+    @staticmethod
+    def reserve_stock(quantities: Dict[int, int]) -> Tuple[Dict[int, int], List[int]]:
+        """
+        Giữ (trừ) tồn kho cho nhiều sách, chỉ trừ những dòng còn đủ hàng.
+        Returns: ({book_id: new_stock}, [book_id không đủ hàng hoặc không tồn tại])
+        """
+        return BookDAO.adjust_stock({book_id: -quantity for book_id, quantity in quantities.items()})
+    
+    @staticmethod
+    def upsert_by_external_id(rows: List[Dict]) -> Tuple[int, int]:
+        """
+        Insert hoặc cập nhật nhiều sách theo external_id bằng một câu
+        INSERT ... ON CONFLICT (external_id) DO UPDATE (Postgres/SQLite).
+        rows: dict đã chuẩn hóa theo cột của books (gồm external_id, search_text),
+        external_id không trùng nhau, cùng tập key. Không commit (thuộc transaction của caller).
+        Returns: (số sách thêm mới, số sách cập nhật)
+        """
+        if not rows:
+            return 0, 0
+        
+        external_ids = [row['external_id'] for row in rows]
+        existing = {
+            external_id for (external_id,) in
+            db.session.query(Book.external_id).filter(Book.external_id.in_(external_ids)).all()
+        }
+        
+        now = datetime.utcnow()
+        values = [dict(row, created_at=now, updated_at=now) for row in rows]
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            # Database khác: cập nhật từng dòng qua ORM
+            books = {book.external_id: book for book in Book.query.filter(Book.external_id.in_(external_ids))}
+            for row in values:
+                book = books.get(row['external_id'])
+                if book is None:
+                    db.session.add(Book(**row))
+                else:
+                    if 'image_url' in row and 'image_variants' not in row and row['image_url'] != book.image_url:
+                        book.image_variants = None
+                    for column, value in row.items():
+                        if column != 'created_at':
+                            setattr(book, column, value)
+            db.session.flush()
+            return len(rows) - len(existing), len(existing)
+        
+        # executemany trên Core table: câu lệnh được compile một lần, driver gộp thành
+        # multi-row VALUES (insertmanyvalues); bỏ qua ORM bulk/events nên search_text có sẵn trong rows
+        table = Book.__table__
+        stmt = dialect_insert(table)
+        set_ = {column: stmt.excluded[column] for column in values[0] if column not in ('external_id', 'created_at')}
+        if 'image_url' in set_ and 'image_variants' not in set_:
+            # File import không có variant set: ảnh đổi thì bỏ variant set của ảnh cũ
+            set_['image_variants'] = case(
+                (table.c.image_url.is_distinct_from(stmt.excluded.image_url), null()),
+                else_=table.c.image_variants
+            )
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.external_id], set_=set_)
+        db.session.execute(stmt, values)
+        return len(rows) - len(existing), len(existing)
+    
+    @staticmethod
+    def iter_all(batch_size: int = 1000) -> Iterator[Book]:
+        """
+        Duyệt toàn bộ sách theo id bằng server-side cursor (yield_per),
+        bộ nhớ không phụ thuộc tổng số sách
+        """
+        for book in Book.query.order_by(Book.id).yield_per(batch_size):
+            yield book
+    
+    @staticmethod
+    def rebuild_search_text(batch_size: int = 1000) -> int:
+        """
+        Tính lại search_text cho các sách chưa có (dùng khi nâng cấp database cũ)
+        Returns: số sách đã cập nhật
+        """
+        updated = 0
+        while True:
+            books = Book.query.filter(Book.search_text.is_(None)).limit(batch_size).all()
+            if not books:
+                break
+            for book in books:
+                book.search_text = book.build_search_text()
             db.session.commit()
-        return book
+            updated += len(books)
+        return updated
+    
+    @staticmethod
+    def get_updated_at(book_id: int) -> Optional[datetime]:
+        """updated_at của một sách (None nếu không tồn tại) - version của trang chi tiết"""
+        return db.session.query(Book.updated_at).filter(Book.id == book_id).scalar()
+    
+    @staticmethod
+    def get_collection_version() -> Tuple[Optional[datetime], int]:
+        """(max(updated_at), số sách) - thay đổi mỗi khi có sách được thêm/sửa/xóa"""
+        max_updated_at, count = db.session.query(func.max(Book.updated_at), func.count(Book.id)).one()
+        return max_updated_at, count
     
     @staticmethod
     def get_categories() -> List[str]:
@@ -3,6 +3,7 @@ Cart Data Access Object
 """
 from models import db, Cart, Book
 from business.dto.cart_dto import CartDTO
+from sqlalchemy.orm import joinedload
 from typing import Optional, List
 
 
@@ -11,8 +12,8 @@ class CartDAO:
     
     @staticmethod
     def get_by_user_id(user_id: int) -> List[Cart]:
-        """Get all cart items for a user"""
-        return Cart.query.filter_by(user_id=user_id).all()
+        """Get all cart items for a user (kèm book, một query)"""
+        return Cart.query.filter_by(user_id=user_id).options(joinedload(Cart.book)).all()
     
     @staticmethod
     def get_by_id(cart_id: int) -> Optional[Cart]:
@@ -25,7 +26,7 @@ class CartDAO:
         return Cart.query.filter_by(user_id=user_id, book_id=book_id).first()
     
     @staticmethod
-    def create(user_id: int, book_id: int, quantity: int = 1) -> Cart:
+    def create(user_id: int, book_id: int, quantity: int = 1, commit: bool = True) -> Cart:
         """Create a new cart item"""
         new_cart = Cart(
             user_id=user_id,
@@ -33,33 +34,39 @@ class CartDAO:
             quantity=quantity
         )
         db.session.add(new_cart)
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         return new_cart
     
     @staticmethod
-    def update_quantity(cart_id: int, quantity: int) -> Optional[Cart]:
+    def update_quantity(cart_id: int, quantity: int, commit: bool = True) -> Optional[Cart]:
         """Update cart item quantity"""
         cart_item = Cart.query.get(cart_id)
         if cart_item:
             cart_item.quantity = quantity
-            db.session.commit()
+            if commit:
+                db.session.commit()
         return cart_item
     
     @staticmethod
-    def delete(cart_id: int) -> bool:
+    def delete(cart_id: int, commit: bool = True) -> bool:
         """Delete a cart item"""
         cart_item = Cart.query.get(cart_id)
         if cart_item:
             db.session.delete(cart_item)
-            db.session.commit()
+            if commit:
+                db.session.commit()
             return True
         return False
     
     @staticmethod
-    def delete_by_user_id(user_id: int) -> int:
+    def delete_by_user_id(user_id: int, commit: bool = True) -> int:
         """Delete all cart items for a user (returns count deleted)"""
         count = Cart.query.filter_by(user_id=user_id).delete()
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return count
     
     @staticmethod
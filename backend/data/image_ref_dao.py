@@ -0,0 +1,25 @@
+"""
+Image Reference Data Access Object (ảnh được books/banners tham chiếu)
+"""
+from typing import Iterator
+from models import db, Book, Banner
+
+
+class ImageRefDAO:
+    """Đọc các URL ảnh đang được dùng (image_url và URL trong image_variants)"""
+
+    @staticmethod
+    def iter_image_urls(batch_size: int = 1000) -> Iterator[str]:
+        """Stream mọi URL ảnh của books và banners (yield_per, không nạp cả bảng vào bộ nhớ)"""
+        for model in (Book, Banner):
+            rows = db.session.query(model.image_url, model.image_variants).execution_options(
+                yield_per=batch_size
+            )
+            for image_url, image_variants in rows:
+                if image_url:
+                    yield image_url
+                if image_variants:
+                    for size in image_variants.get('sizes') or []:
+                        yield size.get('url')
+                    if image_variants.get('thumbnail'):
+                        yield image_variants['thumbnail'].get('url')
@@ -2,14 +2,23 @@
 Order Data Access Object
 """
 from models import db, Order, OrderItem
+from sqlalchemy.orm import selectinload
 from business.dto.order_dto import OrderDTO, OrderItemDTO
-from typing import Optional, List
+from data.pagination import keyset_paginate, count_rows
+from sqlalchemy import insert
+from typing import Optional, List, Tuple, Iterator, Dict
+from datetime import datetime
 from decimal import Decimal
 
 
 class OrderDAO:
     """Data Access Object for Order operations"""
     
+    @staticmethod
+    def _with_items(query):
+        """Eager load order_items và book của từng item (tránh N+1 khi build OrderDTO)"""
+        return query.options(selectinload(Order.order_items).joinedload(OrderItem.book))
+    
     @staticmethod
     def get_by_id(order_id: int) -> Optional[Order]:
         """Get order by ID"""
@@ -18,17 +27,76 @@ class OrderDAO:
     @staticmethod
     def get_by_user_id(user_id: int) -> List[Order]:
         """Get all orders for a user"""
-        return Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
+        query = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc())
+        return OrderDAO._with_items(query).all()
     
     @staticmethod
     def get_by_user_and_id(user_id: int, order_id: int) -> Optional[Order]:
         """Get order by user ID and order ID"""
-        return Order.query.filter_by(id=order_id, user_id=user_id).first()
+        return OrderDAO._with_items(Order.query.filter_by(id=order_id, user_id=user_id)).first()
     
     @staticmethod
     def get_all() -> List[Order]:
         """Get all orders"""
-        return Order.query.order_by(Order.created_at.desc()).all()
+        return OrderDAO._with_items(Order.query.order_by(Order.created_at.desc())).all()
+    
+    @staticmethod
+    def _filtered_query(status: Optional[str] = None, user_id: Optional[int] = None,
+                        date_from: Optional[datetime] = None, date_to: Optional[datetime] = None):
+        """Build query với filter status, user và khoảng thời gian [date_from, date_to)"""
+        query = Order.query
+        if status:
+            query = query.filter(Order.status == status)
+        if user_id:
+            query = query.filter(Order.user_id == user_id)
+        if date_from:
+            query = query.filter(Order.created_at >= date_from)
+        if date_to:
+            query = query.filter(Order.created_at < date_to)
+        return query
+    
+    @staticmethod
+    def search(page: int = 1, per_page: int = 20, **filters) -> Tuple[List[Order], int, int]:
+        """
+        Get orders with pagination and filters (status, user_id, date_from, date_to)
+        Returns: (orders, total, pages)
+        """
+        query = OrderDAO._with_items(OrderDAO._filtered_query(**filters)).order_by(
+            Order.created_at.desc(), Order.id.desc()
+        )
+        
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        
+        return pagination.items, pagination.total, pagination.pages
+    
+    @staticmethod
+    def get_page_by_cursor(cursor: Optional[str] = None, per_page: int = 20,
+                           total_mode: str = 'none', **filters) -> Tuple[List[Order], Optional[str], Optional[int], bool]:
+        """
+        Get orders theo keyset (created_at, id) giảm dần
+        Returns: (orders, next_cursor, total, total_is_estimate)
+        Raises: ValueError nếu cursor không hợp lệ
+        """
+        query = OrderDAO._filtered_query(**filters)
+        orders, next_cursor = keyset_paginate(
+            OrderDAO._with_items(query),
+            [Order.created_at, Order.id], cursor, per_page, descending=True
+        )
+        total, is_estimate = count_rows(query, total_mode)
+        return orders, next_cursor, total, is_estimate
+    
+    @staticmethod
+    def iter_filtered(batch_size: int = 500, **filters) -> Iterator[Order]:
+        """
+        Duyệt tất cả orders khớp filter bằng server-side cursor (yield_per),
+        bộ nhớ không phụ thuộc tổng số orders
+        """
+        query = OrderDAO._with_items(OrderDAO._filtered_query(**filters)).order_by(
+            Order.created_at.desc(), Order.id.desc()
+        )
+        
+        for order in query.yield_per(batch_size):
+            yield order
     
     @staticmethod
     def create(user_id: int, total_amount: Decimal, shipping_address: str,
@@ -45,9 +113,14 @@ class OrderDAO:
         db.session.flush()  # To get order.id
         return new_order
     
+    @staticmethod
+    def get_by_id_for_update(order_id: int) -> Optional[Order]:
+        """Get order by ID và khóa dòng (SELECT ... FOR UPDATE) đến hết transaction"""
+        return Order.query.filter_by(id=order_id).with_for_update().first()
+    
     @staticmethod
     def update_status(order_id: int, status: Optional[str] = None,
-                     payment_status: Optional[str] = None) -> Optional[Order]:
+                     payment_status: Optional[str] = None, commit: bool = True) -> Optional[Order]:
         """Update order status and/or payment_status"""
         order = Order.query.get(order_id)
         if order:
@@ -55,7 +128,8 @@ class OrderDAO:
                 order.status = status
             if payment_status:
                 order.payment_status = payment_status
-            db.session.commit()
+            if commit:
+                db.session.commit()
         return order
     
     @staticmethod
@@ -79,6 +153,16 @@ class OrderItemDAO:
         db.session.add(new_order_item)
         return new_order_item
     
+    @staticmethod
+    def bulk_create(order_id: int, items: List[Dict]) -> None:
+        """Insert tất cả items của một order bằng một câu INSERT nhiều dòng (không commit)"""
+        if items:
+            db.session.execute(insert(OrderItem), [
+                {'order_id': order_id, 'book_id': item['book_id'],
+                 'quantity': item['quantity'], 'price': item['price']}
+                for item in items
+            ])
+    
     @staticmethod
     def get_by_order_id(order_id: int) -> List[OrderItem]:
         """Get all order items for an order"""
@@ -0,0 +1,86 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import tuple_
+from models import db
+
+TOTAL_MODES = ('none', 'exact', 'estimate')
+
+
+def encode_cursor(values: List) -> str:
+    """Encode giá trị sort key của dòng cuối trang thành cursor (base64 JSON)"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, columns: List) -> List:
+    """
+    Decode cursor thành list giá trị tương ứng với columns
+    Raises: ValueError nếu cursor không hợp lệ
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError(cursor)
+        values = []
+        for value, column in zip(payload, columns):
+            if value is not None and isinstance(column.type, db.DateTime):
+                value = datetime.fromisoformat(value)
+            values.append(value)
+        return values
+    except (ValueError, TypeError):
+        raise ValueError('Cursor không hợp lệ')
+
+
+def keyset_paginate(query, columns: List, cursor: Optional[str] = None, per_page: int = 20,
+                    descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    Lấy một trang theo keyset: WHERE (sort_key, id) > cursor ORDER BY sort_key, id LIMIT n.
+    Cột cuối trong columns phải là khóa duy nhất (thường là id).
+    Returns: (items, next_cursor) - next_cursor là None khi hết dữ liệu
+    """
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < values if descending else key > values)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    items = query.order_by(*order).limit(per_page + 1).all()
+
+    if len(items) <= per_page:
+        return items, None
+
+    items = items[:per_page]
+    next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return items, next_cursor
+
+
+def count_rows(query, mode: str = 'none') -> Tuple[Optional[int], bool]:
+    """
+    Đếm số dòng của query theo mode:
+    - none: không đếm
+    - exact: COUNT(*)
+    - estimate: số dòng ước lượng từ planner (Postgres), các DB khác đếm chính xác
+    Returns: (total, is_estimate)
+    """
+    if mode == 'exact':
+        return query.order_by(None).count(), False
+    if mode == 'estimate':
+        if db.engine.dialect.name != 'postgresql':
+            return query.order_by(None).count(), False
+        return estimate_rows(query), True
+    return None, False
+
+
+def estimate_rows(query) -> int:
+    """Số dòng ước lượng của query theo EXPLAIN (không chạy query)"""
+    compiled = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+    plan = db.session.connection().exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    ).scalar()
+    return int(plan[0]['Plan']['Plan Rows'])
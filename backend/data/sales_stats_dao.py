@@ -0,0 +1,198 @@
+"""
+Sales Statistics Data Access Object (rollup order_daily_stats, book_daily_sales)
+"""
+from models import db, Book, Order, OrderItem, OrderDailyStat, BookDailySale
+from typing import Optional, List, Tuple, Dict
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import func, desc, select, delete, insert, null
+
+
+class SalesStatsDAO:
+    """Data Access Object cho các bảng thống kê bán hàng (cộng dồn, không commit)"""
+
+    @staticmethod
+    def _upsert_add(model, key_columns: List[str], rows: List[Dict]) -> None:
+        """
+        INSERT ... ON CONFLICT (key) DO UPDATE SET value = value + excluded.value
+        Các dòng được gộp theo key và sắp xếp để các transaction đồng thời khóa theo cùng thứ tự
+        """
+        merged = {}
+        for row in rows:
+            key = tuple(row[column] for column in key_columns)
+            if key in merged:
+                for column, value in row.items():
+                    if column not in key_columns:
+                        merged[key][column] += value
+            else:
+                merged[key] = dict(row)
+        if not merged:
+            return
+        values = [merged[key] for key in sorted(merged)]
+        value_columns = [column for column in values[0] if column not in key_columns]
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            # Database khác: đọc-rồi-ghi qua ORM
+            for row in values:
+                record = db.session.get(model, tuple(row[column] for column in key_columns))
+                if record is None:
+                    db.session.add(model(**row))
+                else:
+                    for column in value_columns:
+                        setattr(record, column, getattr(record, column) + row[column])
+            return
+
+        stmt = dialect_insert(model).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={column: getattr(model, column) + stmt.excluded[column] for column in value_columns}
+        )
+        db.session.execute(stmt)
+
+    @staticmethod
+    def record_order(day: date, status: str, payment_status: str, total_amount: Decimal,
+                     items: List[Dict], sign: int = 1) -> None:
+        """
+        Cộng (sign=1) hoặc trừ (sign=-1) một đơn hàng vào rollup.
+        items: [{'book_id', 'quantity', 'price'}]
+        """
+        SalesStatsDAO._upsert_add(OrderDailyStat, ['day', 'status', 'payment_status'], [{
+            'day': day, 'status': status, 'payment_status': payment_status,
+            'order_count': sign, 'revenue': sign * Decimal(str(total_amount))
+        }])
+        SalesStatsDAO._upsert_add(BookDailySale, ['day', 'status', 'book_id'], [{
+            'day': day, 'status': status, 'book_id': item['book_id'],
+            'units': sign * item['quantity'],
+            'revenue': sign * Decimal(str(item['price'])) * item['quantity']
+        } for item in items])
+
+    @staticmethod
+    def move_order(order: Order, previous_status: str, previous_payment_status: str) -> None:
+        """Chuyển một đơn từ (status, payment_status) cũ sang giá trị hiện tại của order"""
+        if (order.status, order.payment_status) == (previous_status, previous_payment_status):
+            return
+
+        day = order.created_at.date()
+        if order.status == previous_status:
+            # Chỉ đổi payment_status: book_daily_sales không phụ thuộc payment_status
+            SalesStatsDAO._upsert_add(OrderDailyStat, ['day', 'status', 'payment_status'], [
+                {'day': day, 'status': previous_status, 'payment_status': previous_payment_status,
+                 'order_count': -1, 'revenue': -order.total_amount},
+                {'day': day, 'status': order.status, 'payment_status': order.payment_status,
+                 'order_count': 1, 'revenue': order.total_amount},
+            ])
+            return
+
+        items = [{'book_id': item.book_id, 'quantity': item.quantity, 'price': item.price}
+                 for item in order.order_items]
+        SalesStatsDAO.record_order(day, previous_status, previous_payment_status,
+                                   order.total_amount, items, sign=-1)
+        SalesStatsDAO.record_order(day, order.status, order.payment_status,
+                                   order.total_amount, items)
+
+    @staticmethod
+    def _date_filter(query, column, date_from: Optional[date], date_to: Optional[date]):
+        """Lọc [date_from, date_to] (tính cả hai đầu)"""
+        if date_from:
+            query = query.filter(column >= date_from)
+        if date_to:
+            query = query.filter(column <= date_to)
+        return query
+
+    @staticmethod
+    def get_status_totals(date_from: Optional[date] = None,
+                          date_to: Optional[date] = None) -> List[Tuple[str, str, int, Decimal]]:
+        """[(status, payment_status, order_count, revenue)] trong khoảng ngày"""
+        query = db.session.query(
+            OrderDailyStat.status, OrderDailyStat.payment_status,
+            func.sum(OrderDailyStat.order_count), func.sum(OrderDailyStat.revenue)
+        )
+        query = SalesStatsDAO._date_filter(query, OrderDailyStat.day, date_from, date_to)
+        return query.group_by(OrderDailyStat.status, OrderDailyStat.payment_status).all()
+
+    @staticmethod
+    def get_daily_totals(date_from: Optional[date] = None,
+                         date_to: Optional[date] = None) -> List[Tuple[date, str, str, int, Decimal]]:
+        """[(day, status, payment_status, order_count, revenue)] theo ngày, dùng cho drill-down"""
+        query = db.session.query(
+            OrderDailyStat.day, OrderDailyStat.status, OrderDailyStat.payment_status,
+            OrderDailyStat.order_count, OrderDailyStat.revenue
+        )
+        query = SalesStatsDAO._date_filter(query, OrderDailyStat.day, date_from, date_to)
+        return query.order_by(OrderDailyStat.day).all()
+
+    @staticmethod
+    def get_top_books(status: str = 'completed', limit: int = 10, date_from: Optional[date] = None,
+                      date_to: Optional[date] = None) -> List[Tuple[int, str, str, int]]:
+        """[(book_id, title, author, units)] bán chạy nhất"""
+        units = func.sum(BookDailySale.units).label('units')
+        query = db.session.query(Book.id, Book.title, Book.author, units).join(
+            Book, Book.id == BookDailySale.book_id
+        ).filter(BookDailySale.status == status)
+        query = SalesStatsDAO._date_filter(query, BookDailySale.day, date_from, date_to)
+        return query.group_by(Book.id, Book.title, Book.author).having(units > 0).order_by(
+            desc('units'), Book.id
+        ).limit(limit).all()
+
+    @staticmethod
+    def get_book_sales_by_day(status: str, group_by: Optional[str] = None, date_from: Optional[date] = None,
+                              date_to: Optional[date] = None) -> List[Tuple[date, Optional[str], int, Decimal]]:
+        """
+        [(day, group, units, revenue)] của các đơn có status, group theo ngày và
+        (nếu có) Book.category / Book.author. Số dòng <= số ngày x số nhóm.
+        """
+        if group_by:
+            group = {'category': Book.category, 'author': Book.author}[group_by]
+            query = db.session.query(
+                BookDailySale.day, group, func.sum(BookDailySale.units), func.sum(BookDailySale.revenue)
+            ).join(Book, Book.id == BookDailySale.book_id)
+            grouping = [BookDailySale.day, group]
+        else:
+            query = db.session.query(
+                BookDailySale.day, null(), func.sum(BookDailySale.units), func.sum(BookDailySale.revenue)
+            )
+            grouping = [BookDailySale.day]
+
+        query = query.filter(BookDailySale.status == status)
+        query = SalesStatsDAO._date_filter(query, BookDailySale.day, date_from, date_to)
+        return query.group_by(*grouping).order_by(*grouping).all()
+
+    @staticmethod
+    def get_order_counts_by_day(status: str, date_from: Optional[date] = None,
+                                date_to: Optional[date] = None) -> List[Tuple[date, int]]:
+        """[(day, order_count)] của các đơn có status"""
+        query = db.session.query(OrderDailyStat.day, func.sum(OrderDailyStat.order_count)).filter(
+            OrderDailyStat.status == status
+        )
+        query = SalesStatsDAO._date_filter(query, OrderDailyStat.day, date_from, date_to)
+        return query.group_by(OrderDailyStat.day).order_by(OrderDailyStat.day).all()
+
+    @staticmethod
+    def rebuild() -> Tuple[int, int]:
+        """
+        Tính lại toàn bộ rollup từ orders/order_items (dùng khi backfill hoặc nghi ngờ lệch)
+        Không commit. Returns: (số dòng order_daily_stats, số dòng book_daily_sales)
+        """
+        db.session.execute(delete(OrderDailyStat))
+        db.session.execute(delete(BookDailySale))
+
+        day = func.date(Order.created_at)
+        db.session.execute(insert(OrderDailyStat).from_select(
+            ['day', 'status', 'payment_status', 'order_count', 'revenue'],
+            select(day, Order.status, Order.payment_status, func.count(Order.id), func.sum(Order.total_amount))
+            .group_by(day, Order.status, Order.payment_status)
+        ))
+        db.session.execute(insert(BookDailySale).from_select(
+            ['day', 'status', 'book_id', 'units', 'revenue'],
+            select(day, Order.status, OrderItem.book_id, func.sum(OrderItem.quantity),
+                   func.sum(OrderItem.price * OrderItem.quantity))
+            .join(Order, OrderItem.order_id == Order.id)
+            .group_by(day, Order.status, OrderItem.book_id)
+        ))
+
+        return OrderDailyStat.query.count(), BookDailySale.query.count()
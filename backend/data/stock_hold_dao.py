@@ -0,0 +1,78 @@
+"""
+Stock Hold Data Access Object
+"""
+from models import db, StockHold
+from typing import Optional, List, Dict
+from datetime import datetime
+from sqlalchemy import func
+
+
+class StockHoldDAO:
+    """Data Access Object for StockHold operations"""
+    
+    @staticmethod
+    def get_held_quantities(book_ids: List[int], exclude_user_id: Optional[int] = None,
+                            now: Optional[datetime] = None) -> Dict[int, int]:
+        """Tổng số lượng đang được giữ (còn hạn) theo book_id, có thể bỏ qua hold của một user"""
+        if not book_ids:
+            return {}
+        query = db.session.query(StockHold.book_id, func.sum(StockHold.quantity)).filter(
+            StockHold.book_id.in_(book_ids),
+            StockHold.expires_at > (now or datetime.utcnow())
+        )
+        if exclude_user_id is not None:
+            query = query.filter(StockHold.user_id != exclude_user_id)
+        return {book_id: int(total) for book_id, total in query.group_by(StockHold.book_id).all()}
+    
+    @staticmethod
+    def get_user_quantities(user_id: int, book_ids: List[int], now: Optional[datetime] = None) -> Dict[int, int]:
+        """Số lượng user đang giữ (còn hạn) theo book_id"""
+        if not book_ids:
+            return {}
+        holds = db.session.query(StockHold.book_id, StockHold.quantity).filter(
+            StockHold.user_id == user_id,
+            StockHold.book_id.in_(book_ids),
+            StockHold.expires_at > (now or datetime.utcnow())
+        ).all()
+        return {book_id: quantity for book_id, quantity in holds}
+    
+    @staticmethod
+    def upsert(user_id: int, book_id: int, quantity: int, expires_at: datetime,
+               commit: bool = True) -> StockHold:
+        """Tạo hoặc gia hạn hold của user cho một sách"""
+        hold = StockHold.query.filter_by(user_id=user_id, book_id=book_id).first()
+        if hold:
+            hold.quantity = quantity
+            hold.expires_at = expires_at
+        else:
+            hold = StockHold(user_id=user_id, book_id=book_id, quantity=quantity, expires_at=expires_at)
+            db.session.add(hold)
+        if commit:
+            db.session.commit()
+        return hold
+    
+    @staticmethod
+    def delete_by_user(user_id: int, book_id: Optional[int] = None, commit: bool = True) -> int:
+        """Xóa hold của user (một sách hoặc tất cả)"""
+        query = StockHold.query.filter_by(user_id=user_id)
+        if book_id is not None:
+            query = query.filter_by(book_id=book_id)
+        count = query.delete(synchronize_session=False)
+        if commit:
+            db.session.commit()
+        return count
+    
+    @staticmethod
+    def delete_expired(now: Optional[datetime] = None, batch_size: int = 1000) -> int:
+        """Xóa các hold đã hết hạn theo từng batch (returns count deleted)"""
+        now = now or datetime.utcnow()
+        deleted = 0
+        while True:
+            ids = [hold_id for (hold_id,) in db.session.query(StockHold.id).filter(
+                StockHold.expires_at <= now
+            ).limit(batch_size).all()]
+            if not ids:
+                break
+            deleted += StockHold.query.filter(StockHold.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+        return deleted
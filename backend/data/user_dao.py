@@ -53,6 +53,15 @@ class UserDAO:
             db.session.commit()
         return user
     
+    @staticmethod
+    def update_password_hash(user_id: int, password_hash: str) -> Optional[User]:
+        """Update password hash (vd. hash lại khi đổi BCRYPT_ROUNDS)"""
+        user = User.query.get(user_id)
+        if user:
+            user.password_hash = password_hash
+            db.session.commit()
+        return user
+    
     @staticmethod
     def update_profile(user_id: int, full_name: str, email: str) -> Optional[User]:
         """Update user profile (full_name and email)"""
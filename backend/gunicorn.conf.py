@@ -1,18 +1,48 @@
 """
 Gunicorn configuration file for production deployment
+
+Worker class chọn bằng GUNICORN_WORKER_CLASS:
+- sync (mặc định): mỗi worker xử lý 1 request tại một thời điểm
+- gthread: mỗi worker GUNICORN_THREADS thread
+- gevent: mỗi worker tối đa GUNICORN_WORKER_CONNECTIONS request đồng thời
+  (greenlet), I/O tới Postgres/MinIO không chặn cả process
 """
 import multiprocessing
 import os
 
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+
+if worker_class == "gevent":
+    # Patch trước khi preload app để socket/threading (MinIO, cache locks) và
+    # psycopg2 (qua psycogreen) đều nhường nhau thay vì chặn cả worker
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+    # Mỗi worker có nhiều request đồng thời -> cần pool DB lớn hơn mặc định
+    os.environ.setdefault("DB_POOL_SIZE", "20")
+    os.environ.setdefault("DB_MAX_OVERFLOW", "10")
+    # bcrypt/xử lý ảnh chạy trên threadpool thật của gevent (fork process pool từ worker gevent không an toàn)
+    os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "thread")
+    os.environ.setdefault("IMAGE_PROCESS_EXECUTOR", "thread")
+elif worker_class == "gthread":
+    os.environ.setdefault("DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "4"))
+
 # Server socket
 bind = "0.0.0.0:5000"
 backlog = 2048
 
-# Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
-timeout = 120
+# Worker processes (worker bất đồng bộ/thread không cần nhiều process như sync)
+if worker_class == "sync":
+    default_workers = multiprocessing.cpu_count() * 2 + 1
+else:
+    default_workers = multiprocessing.cpu_count() + 1
+workers = int(os.getenv("GUNICORN_WORKERS", default_workers))
+threads = int(os.getenv("GUNICORN_THREADS", "4")) if worker_class == "gthread" else 1
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+# Giây tối đa cho một request (sync worker bị restart nếu vượt quá), vd. import sách lớn
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
 keepalive = 5
 
 # Logging
@@ -0,0 +1,148 @@
+import logging
+import os
+from logging.config import fileConfig
+
+from flask import current_app
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from alembic import context
+from utils.db_pool import pgbouncer_enabled
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging.
+# This line sets up loggers basically.
+fileConfig(config.config_file_name)
+logger = logging.getLogger('alembic.env')
+
+
+def get_engine():
+    try:
+        # this works with Flask-SQLAlchemy<3 and Alchemical
+        return current_app.extensions['migrate'].db.get_engine()
+    except (TypeError, AttributeError):
+        # this works with Flask-SQLAlchemy>=3
+        return current_app.extensions['migrate'].db.engine
+
+
+def get_migration_engine():
+    # DB_MIGRATION_URL: kết nối thẳng tới Postgres (không qua PgBouncer) cho migration,
+    # để SET statement_timeout/CREATE INDEX CONCURRENTLY chạy trên một session ổn định
+    migration_url = os.getenv('DB_MIGRATION_URL')
+    if migration_url:
+        return create_engine(migration_url, poolclass=NullPool)
+    return get_engine()
+
+
+def get_engine_url():
+    engine = get_migration_engine()
+    try:
+        return engine.url.render_as_string(hide_password=False).replace(
+            '%', '%%')
+    except AttributeError:
+        return str(engine.url).replace('%', '%%')
+
+
+# add your model's MetaData object here
+# for 'autogenerate' support
+# from myapp import mymodel
+# target_metadata = mymodel.Base.metadata
+config.set_main_option('sqlalchemy.url', get_engine_url())
+target_db = current_app.extensions['migrate'].db
+
+# other values from the config, defined by the needs of env.py,
+# can be acquired:
+# my_important_option = config.get_main_option("my_important_option")
+# ... etc.
+
+
+def get_metadata():
+    if hasattr(target_db, 'metadatas'):
+        return target_db.metadatas[None]
+    return target_db.metadata
+
+
+def run_migrations_offline():
+    """Run migrations in 'offline' mode.
+
+    This configures the context with just a URL
+    and not an Engine, though an Engine is acceptable
+    here as well.  By skipping the Engine creation
+    we don't even need a DBAPI to be available.
+
+    Calls to context.execute() here emit the given string to the
+    script output.
+
+    """
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url, target_metadata=get_metadata(), literal_binds=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations in 'online' mode.
+
+    In this scenario we need to create an Engine
+    and associate a connection with the context.
+
+    """
+
+    # this callback is used to prevent an auto-migration from being generated
+    # when there are no changes to the schema
+    # reference: http://alembic.zzzcomputing.com/en/latest/cookbook.html
+    def process_revision_directives(context, revision, directives):
+        if getattr(config.cmd_opts, 'autogenerate', False):
+            script = directives[0]
+            if script.upgrade_ops.is_empty():
+                directives[:] = []
+                logger.info('No changes in schema detected.')
+
+    conf_args = current_app.extensions['migrate'].configure_args
+    if conf_args.get("process_revision_directives") is None:
+        conf_args["process_revision_directives"] = process_revision_directives
+
+    connectable = get_migration_engine()
+    postgresql = connectable.dialect.name == 'postgresql'
+    # Qua PgBouncer (transaction pooling) SET mức session rơi vào server connection bất kỳ
+    # và ở lại trên đó cho client khác -> chỉ dùng SET LOCAL trong transaction migration
+    session_settings = postgresql and (
+        bool(os.getenv('DB_MIGRATION_URL')) or not pgbouncer_enabled())
+    if postgresql and not session_settings:
+        logger.warning('DB_PGBOUNCER=true và không có DB_MIGRATION_URL: bước chạy ngoài '
+                       'transaction (CREATE INDEX CONCURRENTLY) dùng statement_timeout của role')
+
+    with connectable.connect() as connection:
+        # Migration (vd. CREATE INDEX CONCURRENTLY) không bị DB_STATEMENT_TIMEOUT_MS giới hạn
+        if session_settings:
+            connection.exec_driver_sql('SET statement_timeout = 0')
+            connection.commit()
+
+        context.configure(
+            connection=connection,
+            target_metadata=get_metadata(),
+            **conf_args
+        )
+
+        try:
+            with context.begin_transaction():
+                if postgresql and not session_settings:
+                    context.execute('SET LOCAL statement_timeout = 0')
+                context.run_migrations()
+        finally:
+            # Connection từ pool của app: trả về với statement_timeout ban đầu
+            if session_settings:
+                connection.exec_driver_sql('RESET statement_timeout')
+                connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
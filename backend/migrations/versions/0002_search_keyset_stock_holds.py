@@ -0,0 +1,106 @@
+"""Book search_text, keyset pagination indexes, stock_holds
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:01
+
+Bỏ qua cột/index/bảng đã có (database đã chạy SQL thủ công trong docs/03
+hoặc đã được db.create_all() tạo).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def _has_column(table, column):
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def _has_index(table, index):
+    return index in {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _backfill_search_text():
+    """Tính search_text cho các sách hiện có"""
+    from utils.helpers import normalize_search_text
+
+    bind = op.get_bind()
+    books = sa.table(
+        'books',
+        sa.column('id', sa.Integer), sa.column('title', sa.String), sa.column('author', sa.String),
+        sa.column('description', sa.Text), sa.column('publisher', sa.String), sa.column('search_text', sa.Text)
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(books.c.id, books.c.title, books.c.author, books.c.description, books.c.publisher)
+            .where(books.c.id > last_id, books.c.search_text.is_(None))
+            .order_by(books.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            books.update().where(books.c.id == sa.bindparam('book_id')),
+            [{'book_id': row.id, 'search_text': normalize_search_text(*row[1:])} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    if not _has_column('books', 'search_text'):
+        op.add_column('books', sa.Column('search_text', sa.Text(), nullable=True))
+    _backfill_search_text()
+
+    if not _has_index('books', 'ix_books_search_text_trgm'):
+        op.create_index('ix_books_search_text_trgm', 'books', ['search_text'],
+                        postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+    if not _has_index('books', 'ix_books_created_at_id'):
+        op.create_index('ix_books_created_at_id', 'books', ['created_at', 'id'])
+    if not _has_index('orders', 'ix_orders_created_at_id'):
+        op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'])
+    if not _has_index('banners', 'ix_banners_display_order_id'):
+        op.create_index('ix_banners_display_order_id', 'banners', ['display_order', 'id'])
+
+    if not _has_table('stock_holds'):
+        op.create_table(
+            'stock_holds',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('book_id', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['book_id'], ['books.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'book_id', name='uq_stock_holds_user_book')
+        )
+        op.create_index('ix_stock_holds_expires_at', 'stock_holds', ['expires_at'])
+        op.create_index('ix_stock_holds_book_expires', 'stock_holds', ['book_id', 'expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_stock_holds_book_expires', table_name='stock_holds')
+    op.drop_index('ix_stock_holds_expires_at', table_name='stock_holds')
+    op.drop_table('stock_holds')
+    op.drop_index('ix_banners_display_order_id', table_name='banners')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.drop_index('ix_books_created_at_id', table_name='books')
+    op.drop_index('ix_books_search_text_trgm', table_name='books')
+    op.drop_column('books', 'search_text')
@@ -0,0 +1,42 @@
+"""Secondary indexes cho cart, orders, order_items, books.category, banners
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:02
+
+Trên Postgres index được tạo CONCURRENTLY (không khóa ghi bảng), nên chạy
+ngoài transaction của migration.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_cart_user_id_book_id', 'cart', ['user_id', 'book_id']),
+    ('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at']),
+    ('ix_orders_status', 'orders', ['status']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_order_items_book_id', 'order_items', ['book_id']),
+    ('ix_books_category', 'books', ['category']),
+    ('ix_banners_active_position_order', 'banners', ['is_active', 'position', 'display_order']),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
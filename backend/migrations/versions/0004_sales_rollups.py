@@ -0,0 +1,83 @@
+"""Bảng rollup thống kê bán hàng: order_daily_stats, book_daily_sales
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:03
+
+Backfill từ orders/order_items hiện có (một INSERT ... SELECT mỗi bảng).
+Sau đó OrderWorkflow/OrderService cập nhật rollup trong cùng transaction với đơn hàng.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def _backfill():
+    orders = sa.table(
+        'orders',
+        sa.column('id', sa.Integer), sa.column('status', sa.String), sa.column('payment_status', sa.String),
+        sa.column('total_amount', sa.Numeric), sa.column('created_at', sa.DateTime)
+    )
+    order_items = sa.table(
+        'order_items',
+        sa.column('order_id', sa.Integer), sa.column('book_id', sa.Integer),
+        sa.column('quantity', sa.Integer), sa.column('price', sa.Numeric)
+    )
+    order_daily_stats = sa.table(
+        'order_daily_stats',
+        sa.column('day', sa.Date), sa.column('status', sa.String), sa.column('payment_status', sa.String),
+        sa.column('order_count', sa.Integer), sa.column('revenue', sa.Numeric)
+    )
+    book_daily_sales = sa.table(
+        'book_daily_sales',
+        sa.column('day', sa.Date), sa.column('status', sa.String), sa.column('book_id', sa.Integer),
+        sa.column('units', sa.Integer), sa.column('revenue', sa.Numeric)
+    )
+
+    day = sa.func.date(orders.c.created_at)
+    op.execute(order_daily_stats.insert().from_select(
+        ['day', 'status', 'payment_status', 'order_count', 'revenue'],
+        sa.select(day, orders.c.status, orders.c.payment_status,
+                  sa.func.count(orders.c.id), sa.func.sum(orders.c.total_amount))
+        .group_by(day, orders.c.status, orders.c.payment_status)
+    ))
+    op.execute(book_daily_sales.insert().from_select(
+        ['day', 'status', 'book_id', 'units', 'revenue'],
+        sa.select(day, orders.c.status, order_items.c.book_id, sa.func.sum(order_items.c.quantity),
+                  sa.func.sum(order_items.c.price * order_items.c.quantity))
+        .select_from(order_items.join(orders, order_items.c.order_id == orders.c.id))
+        .group_by(day, orders.c.status, order_items.c.book_id)
+    ))
+
+
+def upgrade():
+    op.create_table(
+        'order_daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('payment_status', sa.String(length=20), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'status', 'payment_status')
+    )
+    op.create_table(
+        'book_daily_sales',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'status', 'book_id')
+    )
+    _backfill()
+
+
+def downgrade():
+    op.drop_table('book_daily_sales')
+    op.drop_table('order_daily_stats')
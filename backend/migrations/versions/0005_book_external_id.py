@@ -0,0 +1,25 @@
+"""books.external_id (khóa upsert cho import hàng loạt)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('books', sa.Column('external_id', sa.String(length=100), nullable=True))
+    op.create_index('ix_books_external_id', 'books', ['external_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_books_external_id', table_name='books')
+    op.drop_column('books', 'external_id')
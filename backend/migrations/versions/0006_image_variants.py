@@ -0,0 +1,25 @@
+"""books.image_variants, banners.image_variants (variant set WebP cho srcset)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('books', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('banners', sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('banners', 'image_variants')
+    op.drop_column('books', 'image_variants')
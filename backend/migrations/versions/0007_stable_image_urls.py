@@ -0,0 +1,82 @@
+"""Đổi presigned URL đã lưu (books/banners) sang URL ổn định /img/<key>
+
+Chỉ đổi dữ liệu: image_url và các url trong image_variants có dạng
+http://<endpoint>/<MINIO_BUCKET>/<key>?X-Amz-... -> <IMAGE_BASE_URL>/img/<key>.
+URL khác (ảnh ngoài, đã là /img/) giữ nguyên. Dòng được đổi có updated_at mới nên version
+catalog/banners (max(updated_at), số dòng) đổi theo: cache dùng chung (Redis) và ETag của client
+không tiếp tục trả về presigned URL cũ. Downgrade không khôi phục presigned URL
+(chữ ký cũ đã/sẽ hết hạn); storage vẫn đọc được cả hai dạng URL.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+"""
+import os
+from datetime import datetime
+from urllib.parse import urlsplit, unquote, quote
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def _stable_url(url):
+    """URL mới cho presigned URL của bucket ảnh, None nếu không cần đổi"""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    if 'X-Amz-Signature=' not in parts.query:
+        return None
+    path = unquote(parts.path)
+    bucket_prefix = f"/{os.getenv('MINIO_BUCKET', 'bookstore-images')}/"
+    if not path.startswith(bucket_prefix) or path == bucket_prefix:
+        return None
+    base_url = os.getenv('IMAGE_BASE_URL', '').rstrip('/')
+    return f'{base_url}/img/{quote(path[len(bucket_prefix):])}'
+
+
+def _rewrite_variants(variants):
+    """Variant set với url đã đổi, None nếu không có gì thay đổi"""
+    if not isinstance(variants, dict):
+        return None
+    changed = False
+    entries = list(variants.get('sizes') or [])
+    if variants.get('thumbnail'):
+        entries.append(variants['thumbnail'])
+    for entry in entries:
+        new_url = _stable_url(entry.get('url')) if isinstance(entry, dict) else None
+        if new_url:
+            entry['url'] = new_url
+            changed = True
+    return variants if changed else None
+
+
+def upgrade():
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    for table_name in ('books', 'banners'):
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('image_url', sa.String),
+                         sa.column('image_variants', sa.JSON), sa.column('updated_at', sa.DateTime))
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.image_url, table.c.image_variants)
+            .where(sa.or_(table.c.image_url.like('%X-Amz-%'), table.c.image_variants.isnot(None)))
+        ).fetchall()
+        for row in rows:
+            values = {}
+            new_url = _stable_url(row.image_url)
+            if new_url:
+                values['image_url'] = new_url
+            new_variants = _rewrite_variants(row.image_variants)
+            if new_variants:
+                values['image_variants'] = new_variants
+            if values:
+                bind.execute(table.update().where(table.c.id == row.id).values(updated_at=now, **values))
+
+
+def downgrade():
+    pass
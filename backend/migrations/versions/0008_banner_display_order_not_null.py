@@ -0,0 +1,32 @@
+"""banners.display_order NOT NULL (mặc định 0)
+
+Keyset pagination admin seek theo (display_order, id); NULL làm so sánh tuple trả về
+NULL nên banner có display_order NULL bị bỏ qua khi phân trang. Backfill NULL -> 0 rồi
+đặt NOT NULL + server default để index (display_order, id) vẫn dùng được cho seek.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('UPDATE banners SET display_order = 0 WHERE display_order IS NULL')
+    with op.batch_alter_table('banners') as batch_op:
+        batch_op.alter_column('display_order', existing_type=sa.Integer(), nullable=False,
+                              server_default='0')
+
+
+def downgrade():
+    with op.batch_alter_table('banners') as batch_op:
+        batch_op.alter_column('display_order', existing_type=sa.Integer(), nullable=True,
+                              server_default=None)
@@ -2,9 +2,20 @@
 SQLAlchemy Models cho database
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, DDL
 from datetime import datetime
+from utils.helpers import normalize_search_text
+from utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession: SELECT trong handler chỉ đọc có thể đi tới read replica (utils/db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# pg_trgm cần có trước khi tạo GIN index cho books.search_text
+event.listen(
+    db.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
 
 class User(db.Model):
     """Model cho bảng Users"""
@@ -74,13 +85,17 @@ class Book(db.Model):
     __tablename__ = 'books'
     
     id = db.Column(db.Integer, primary_key=True)
+    # Mã sách của nhà cung cấp (ISBN/SKU), khóa upsert khi import hàng loạt
+    external_id = db.Column(db.String(100), unique=True, index=True, nullable=True)
     title = db.Column(db.String(200), nullable=False)
     author = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
+    category = db.Column(db.String(50), nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
     price = db.Column(db.Numeric(10, 2), nullable=False)
     stock = db.Column(db.Integer, default=0, nullable=False)
     image_url = db.Column(db.String(500), nullable=True)
+    # Variant set WebP (srcset + thumbnail) khi ảnh được upload qua /api/admin/upload
+    image_variants = db.Column(db.JSON, nullable=True)
     
     # Thông tin chi tiết
     publisher = db.Column(db.String(200), nullable=True)  # Nhà xuất bản
@@ -90,6 +105,9 @@ class Book(db.Model):
     pages = db.Column(db.Integer, nullable=True)  # Số trang
     weight = db.Column(db.Integer, nullable=True)  # Trọng lượng (gram)
     
+    # Text đã bỏ dấu của title/author/description/publisher (dùng cho tìm kiếm)
+    search_text = db.Column(db.Text, nullable=True)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -97,10 +115,22 @@ class Book(db.Model):
     cart_items = db.relationship('Cart', backref='book', lazy=True, cascade='all, delete-orphan')
     order_items = db.relationship('OrderItem', backref='book', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_books_created_at_id', 'created_at', 'id'),
+        db.Index('ix_books_search_text_trgm', 'search_text',
+                 postgresql_using='gin',
+                 postgresql_ops={'search_text': 'gin_trgm_ops'}),
+    )
+    
+    def build_search_text(self):
+        """Tạo search_text từ các trường được tìm kiếm"""
+        return normalize_search_text(self.title, self.author, self.description, self.publisher)
+    
     def to_dict(self):
         """Chuyển đổi model thành dictionary"""
         return {
             'id': self.id,
+            'external_id': self.external_id,
             'title': self.title,
             'author': self.author,
             'category': self.category,
@@ -108,6 +138,7 @@ class Book(db.Model):
             'price': float(self.price),
             'stock': self.stock,
             'image_url': self.image_url,
+            'image_variants': self.image_variants,
             'publisher': self.publisher,
             'publish_date': self.publish_date,
             'distributor': self.distributor,
@@ -118,6 +149,12 @@ class Book(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+@event.listens_for(Book, 'before_insert')
+@event.listens_for(Book, 'before_update')
+def _refresh_book_search_text(mapper, connection, target):
+    """Giữ search_text đồng bộ mỗi khi book được lưu"""
+    target.search_text = target.build_search_text()
+
 class Cart(db.Model):
     """Model cho bảng Cart"""
     __tablename__ = 'cart'
@@ -128,6 +165,11 @@ class Cart(db.Model):
     quantity = db.Column(db.Integer, default=1, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # (user_id, book_id) cũng phục vụ các query chỉ lọc theo user_id
+    __table_args__ = (
+        db.Index('ix_cart_user_id_book_id', 'user_id', 'book_id'),
+    )
+    
     def to_dict(self):
         """Chuyển đổi model thành dictionary"""
         return {
@@ -139,6 +181,22 @@ class Cart(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class StockHold(db.Model):
+    """Model cho bảng StockHolds - giữ hàng tạm thời cho sách trong giỏ (có hạn)"""
+    __tablename__ = 'stock_holds'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'book_id', name='uq_stock_holds_user_book'),
+        db.Index('ix_stock_holds_book_expires', 'book_id', 'expires_at'),
+    )
+
 class Order(db.Model):
     """Model cho bảng Orders"""
     __tablename__ = 'orders'
@@ -146,7 +204,7 @@ class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
-    status = db.Column(db.String(20), default='pending', nullable=False)  # pending/confirmed/cancelled/completed
+    status = db.Column(db.String(20), default='pending', nullable=False, index=True)  # pending/confirmed/cancelled/completed
     payment_status = db.Column(db.String(20), default='pending', nullable=False)  # pending/paid
     shipping_address = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -155,6 +213,11 @@ class Order(db.Model):
     # Relationships
     order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_orders_created_at_id', 'created_at', 'id'),
+        db.Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+    )
+    
     def to_dict(self):
         """Chuyển đổi model thành dictionary"""
         return {
@@ -174,8 +237,8 @@ class OrderItem(db.Model):
     __tablename__ = 'order_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)  # Giá tại thời điểm mua
     
@@ -190,6 +253,29 @@ class OrderItem(db.Model):
             'book': self.book.to_dict() if self.book else None
         }
 
+class OrderDailyStat(db.Model):
+    """
+    Rollup đơn hàng theo ngày tạo (UTC), status, payment_status.
+    Cập nhật cộng dồn trong cùng transaction khi tạo đơn / đổi trạng thái (SalesStatsDAO)
+    """
+    __tablename__ = 'order_daily_stats'
+    
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    payment_status = db.Column(db.String(20), primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+
+class BookDailySale(db.Model):
+    """Rollup số lượng/doanh thu từng sách theo ngày tạo đơn (UTC) và status của đơn"""
+    __tablename__ = 'book_daily_sales'
+    
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    book_id = db.Column(db.Integer, primary_key=True)
+    units = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+
 class Banner(db.Model):
     """Model cho bảng Banners"""
     __tablename__ = 'banners'
@@ -198,15 +284,21 @@ class Banner(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     image_url = db.Column(db.String(500), nullable=False)
+    image_variants = db.Column(db.JSON, nullable=True)  # Variant set WebP (srcset)
     link = db.Column(db.String(500))  # Optional link when clicking banner
     bg_color = db.Column(db.String(50), default='#6366f1')  # Background color
     text_color = db.Column(db.String(50), default='#ffffff')  # Text color
     position = db.Column(db.String(20), default='main')  # main, side_top, side_bottom
-    display_order = db.Column(db.Integer, default=0)  # Order of display
+    display_order = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Order of display (keyset key)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_banners_display_order_id', 'display_order', 'id'),
+        db.Index('ix_banners_active_position_order', 'is_active', 'position', 'display_order'),
+    )
+    
     def to_dict(self):
         """Chuyển đổi model thành dictionary"""
         return {
@@ -214,6 +306,7 @@ class Banner(db.Model):
             'title': self.title,
             'description': self.description,
             'image_url': self.image_url,
+            'image_variants': self.image_variants,
             'link': self.link,
             'bg_color': self.bg_color,
             'text_color': self.text_color,
@@ -1,10 +1,17 @@
 """
 Routes cho quản lý admin
 """
-from flask import Blueprint, request, jsonify
+import io
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from business.services.admin_service import AdminService
 from business.services.order_service import OrderService
-from utils.helpers import admin_required
+from business.services.book_import_service import BookImportService
+from utils.authorization import admin_required
+from data.pagination import TOTAL_MODES
+from utils.cache import cache
+from utils.db_pool import pool_status
+from models import db
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -56,26 +63,152 @@ def update_user_status(user_id):
     except Exception as e:
         return jsonify({'error': f'Lỗi cập nhật trạng thái user: {str(e)}'}), 500
 
+def _order_filter_args():
+    """Đọc filter đơn hàng từ query string"""
+    return {
+        'status': request.args.get('status', '').strip(),
+        'user_id': request.args.get('user_id', type=int),
+        'date_from': request.args.get('date_from', '').strip(),
+        'date_to': request.args.get('date_to', '').strip()
+    }
+
 @admin_bp.route('/admin/orders', methods=['GET'])
 @admin_required
 def get_all_orders():
     """
-    Lấy tất cả đơn hàng
+    Lấy danh sách đơn hàng (có pagination, filter status/user_id/date_from/date_to)
+    Có tham số cursor -> phân trang keyset, total chỉ tính khi truyền total=exact|estimate
     """
     try:
+        page = request.args.get('page', 1, type=int)
+        per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+        filters = _order_filter_args()
+        
+        if 'cursor' in request.args:
+            total_mode = request.args.get('total', 'none')
+            if total_mode not in TOTAL_MODES:
+                return jsonify({'error': f'total phải là một trong: {", ".join(TOTAL_MODES)}'}), 400
+            
+            # Call business service
+            orders, next_cursor, total, is_estimate, error = AdminService.get_orders_by_cursor(
+                request.args.get('cursor'), per_page, total_mode, **filters
+            )
+            
+            if error:
+                status_code = 400 if 'không hợp lệ' in error else 500
+                return jsonify({'error': error}), status_code
+            
+            return jsonify({
+                'orders': [order.to_dict() for order in orders],
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'total': total,
+                'total_is_estimate': is_estimate
+            }), 200
+        
         # Call business service
-        orders, error = AdminService.get_all_orders()
+        orders, total, pages, error = AdminService.get_orders(page, per_page, **filters)
         
         if error:
-            return jsonify({'error': error}), 500
+            status_code = 400 if 'không hợp lệ' in error else 500
+            return jsonify({'error': error}), status_code
         
         return jsonify({
-            'orders': [order.to_dict() for order in orders]
+            'orders': [order.to_dict() for order in orders],
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': pages
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'Lỗi lấy danh sách đơn hàng: {str(e)}'}), 500
 
+@admin_bp.route('/admin/orders/export', methods=['GET'])
+@admin_required
+def export_orders():
+    """
+    Export đơn hàng (format=ndjson|csv), stream từng dòng, nhận cùng filter với danh sách
+    """
+    export_format = request.args.get('format', 'ndjson').strip().lower()
+    
+    # Call business service
+    lines, error = AdminService.export_orders(export_format, **_order_filter_args())
+    
+    if error:
+        return jsonify({'error': error}), 400
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f'orders.{export_format}'
+    return Response(
+        stream_with_context(lines),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@admin_bp.route('/admin/books/import', methods=['POST'])
+@admin_required
+def import_books():
+    """
+    Import sách hàng loạt từ CSV/JSONL, upsert theo external_id
+    Query params: format (csv|jsonl, mặc định theo tên file hoặc csv), batch_size
+    Body: file upload (field 'file') hoặc nội dung file gửi trực tiếp
+    """
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            raw_stream = upload.stream
+            default_format = 'jsonl' if (upload.filename or '').lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+        else:
+            raw_stream = request.stream
+            default_format = 'jsonl' if 'json' in (request.mimetype or '') else 'csv'
+        
+        import_format = request.args.get('format', default_format).strip()
+        batch_size = max(1, min(request.args.get('batch_size', BookImportService.DEFAULT_BATCH_SIZE, type=int), 5000))
+        
+        # Đọc dạng stream, không nạp cả file vào bộ nhớ
+        stream = io.TextIOWrapper(raw_stream, encoding='utf-8-sig', newline='')
+        
+        # Call business service
+        summary, error = BookImportService.import_books(stream, import_format, batch_size)
+        
+        if error:
+            return jsonify({'error': error}), 400
+        
+        return jsonify({
+            'message': 'Import sách hoàn tất',
+            **summary
+        }), 200
+        
+    except RequestEntityTooLarge:
+        # Body vượt MAX_CONTENT_LENGTH -> 413 (errorhandler trong app.py)
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Lỗi import sách: {str(e)}'}), 500
+
+@admin_bp.route('/admin/books/export', methods=['GET'])
+@admin_required
+def export_books():
+    """
+    Export toàn bộ catalog (stream) dạng CSV hoặc JSONL, cùng cột với import
+    Query params: format (csv|jsonl)
+    """
+    export_format = request.args.get('format', 'csv').strip()
+    
+    # Call business service
+    lines, error = BookImportService.export_books(export_format)
+    
+    if error:
+        return jsonify({'error': error}), 400
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f'books.{export_format}'
+    return Response(
+        stream_with_context(lines),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @admin_bp.route('/admin/orders/<int:order_id>/status', methods=['PUT'])
 @admin_required
 def update_order_status(order_id):
@@ -102,18 +235,66 @@ def update_order_status(order_id):
     except Exception as e:
         return jsonify({'error': f'Lỗi cập nhật trạng thái đơn hàng: {str(e)}'}), 500
 
+@admin_bp.route('/admin/cache/stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """
+    Thống kê hit/miss của cache catalog (theo worker đang xử lý request)
+    """
+    return jsonify(cache.stats()), 200
+
+@admin_bp.route('/admin/db/pool', methods=['GET'])
+@admin_required
+def get_db_pool_stats():
+    """
+    Trạng thái connection pool và thời gian chờ checkout (theo worker đang xử lý request)
+    """
+    return jsonify(pool_status(db)), 200
+
+@admin_bp.route('/admin/analytics/sales', methods=['GET'])
+@admin_required
+def get_sales_analytics():
+    """
+    Doanh thu / số lượng bán theo thời gian
+    Query params: granularity (day|week|month), group_by (category|author), status (mặc định completed),
+    date_from, date_to (YYYY-MM-DD)
+    """
+    try:
+        # Call business service
+        analytics, error = AdminService.get_sales_analytics(
+            granularity=request.args.get('granularity', 'day').strip(),
+            group_by=request.args.get('group_by', '').strip(),
+            status=request.args.get('status', 'completed').strip(),
+            date_from=request.args.get('date_from', '').strip(),
+            date_to=request.args.get('date_to', '').strip()
+        )
+        
+        if error:
+            status_code = 400 if 'không hợp lệ' in error else 500
+            return jsonify({'error': error}), status_code
+        
+        return jsonify(analytics), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Lỗi lấy thống kê bán hàng: {str(e)}'}), 500
+
 @admin_bp.route('/admin/statistics', methods=['GET'])
 @admin_required
 def get_statistics():
     """
-    Lấy thống kê (doanh thu, số đơn hàng, sách bán chạy)
+    Lấy thống kê (doanh thu, số đơn hàng, sách bán chạy, theo ngày)
+    Query params: date_from, date_to (YYYY-MM-DD)
     """
     try:
+        date_from = request.args.get('date_from', '').strip()
+        date_to = request.args.get('date_to', '').strip()
+        
         # Call business service
-        statistics, error = AdminService.get_statistics()
+        statistics, error = AdminService.get_statistics(date_from, date_to)
         
         if error:
-            return jsonify({'error': error}), 500
+            status_code = 400 if 'không hợp lệ' in error else 500
+            return jsonify({'error': error}), status_code
         
         return jsonify(statistics), 200
         
@@ -3,7 +3,7 @@ Routes cho authentication (đăng ký, đăng nhập, đăng xuất)
 """
 from flask import Blueprint, request, jsonify, session
 from business.services.auth_service import AuthService
-from utils.helpers import login_required
+from utils.authorization import login_required
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -22,6 +22,8 @@ def register():
         # Call business service
         user_dto, error = AuthService.register(username, email, password, full_name)
         
+        if error == AuthService.BUSY_ERROR:
+            return jsonify({'error': error}), 503, {'Retry-After': '1'}
         if error:
             return jsonify({'error': error}), 400
         
@@ -46,6 +48,8 @@ def login():
         # Call business service
         user_dto, error = AuthService.login(username, password)
         
+        if error == AuthService.BUSY_ERROR:
+            return jsonify({'error': error}), 503, {'Retry-After': '1'}
         if error:
             status_code = 401 if 'không đúng' in error or 'khóa' in error else 400
             return jsonify({'error': error}), status_code
@@ -1,51 +1,99 @@
-from flask import Blueprint, request, jsonify, session
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import func
 from models import Banner, db
-from functools import wraps
+from data.pagination import keyset_paginate, count_rows, TOTAL_MODES
+from utils.cache import cache
+from utils.http_cache import conditional_get, collection_version
+from utils.db_routing import use_replica
+from utils.authorization import admin_required
+from utils.image_processing import validate_variant_set
+
+# Namespace cache cho danh sách banner public
+BANNER_CACHE = 'banners'
 
 banners_bp = Blueprint('banners', __name__)
 
-def admin_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return jsonify({'error': 'Yêu cầu đăng nhập'}), 401
-        
-        from models import User
-        user = User.query.get(session['user_id'])
-        if not user or user.role != 'admin':
-            return jsonify({'error': 'Không có quyền truy cập'}), 403
-        
-        return f(*args, **kwargs)
-    return decorated_function
+def _banners_version():
+    """(version, last_modified) của bảng banners, cache CACHE_VERSION_TTL giây"""
+    def load_version():
+        max_updated_at, count = db.session.query(func.max(Banner.updated_at), func.count(Banner.id)).one()
+        return {
+            'version': collection_version(max_updated_at, count),
+            'last_modified': max_updated_at.isoformat() if max_updated_at else None
+        }
+    
+    cached = cache.get_or_set(BANNER_CACHE, 'version', load_version,
+                              ttl=current_app.config['CACHE_VERSION_TTL'])
+    last_modified = datetime.fromisoformat(cached['last_modified']) if cached['last_modified'] else None
+    return cached['version'], last_modified
+
+def _banners_etag():
+    """(etag, last_modified) cho conditional GET của /banners"""
+    try:
+        version, last_modified = _banners_version()
+    except Exception:
+        return None
+    return f'banners-{version}', last_modified
 
 # Public: Get active banners
 @banners_bp.route('/banners', methods=['GET'])
+@use_replica
+@conditional_get(_banners_etag)
 def get_banners():
     """Get all active banners for public display"""
     position = request.args.get('position', 'all')
+    version, _ = _banners_version()
     
-    query = Banner.query.filter_by(is_active=True)
-    
-    if position != 'all':
-        query = query.filter_by(position=position)
-    
-    banners = query.order_by(Banner.display_order.asc()).all()
+    def load_banners():
+        query = Banner.query.filter_by(is_active=True)
+        
+        if position != 'all':
+            query = query.filter_by(position=position)
+        
+        return [banner.to_dict() for banner in query.order_by(Banner.display_order.asc()).all()]
     
     return jsonify({
-        'banners': [banner.to_dict() for banner in banners]
+        'banners': cache.get_or_set(BANNER_CACHE, cache.make_key(version=version, position=position), load_banners)
     })
 
 # Admin: Get all banners (including inactive)
 @banners_bp.route('/admin/banners', methods=['GET'])
 @admin_required
+@use_replica
 def get_all_banners():
     """Get all banners for admin management"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
+    # Keyset mode: seek theo (display_order, id), total chỉ tính khi được yêu cầu
+    if 'cursor' in request.args:
+        per_page = max(1, min(per_page, 100))
+        total_mode = request.args.get('total', 'none')
+        if total_mode not in TOTAL_MODES:
+            return jsonify({'error': f'total phải là một trong: {", ".join(TOTAL_MODES)}'}), 400
+        
+        try:
+            banners, next_cursor = keyset_paginate(
+                Banner.query, [Banner.display_order, Banner.id],
+                request.args.get('cursor'), per_page
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        total, is_estimate = count_rows(Banner.query, total_mode)
+        
+        return jsonify({
+            'banners': [banner.to_dict() for banner in banners],
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'total': total,
+            'total_is_estimate': is_estimate
+        })
+    
+    # Cùng thứ tự với keyset mode: (display_order, id)
     pagination = Banner.query.order_by(
         Banner.display_order.asc(),
-        Banner.created_at.desc()
+        Banner.id.asc()
     ).paginate(page=page, per_page=per_page, error_out=False)
     
     return jsonify({
@@ -59,6 +107,7 @@ def get_all_banners():
 # Admin: Get single banner
 @banners_bp.route('/admin/banners/<int:banner_id>', methods=['GET'])
 @admin_required
+@use_replica
 def get_banner(banner_id):
     """Get a specific banner"""
     banner = Banner.query.get_or_404(banner_id)
@@ -76,22 +125,27 @@ def create_banner():
     for field in required_fields:
         if field not in data:
             return jsonify({'error': f'Thiếu trường {field}'}), 400
+    error = validate_variant_set(data.get('image_variants'))
+    if error:
+        return jsonify({'error': error}), 400
     
     try:
         banner = Banner(
             title=data['title'],
             description=data.get('description'),
             image_url=data['image_url'],
+            image_variants=data.get('image_variants'),
             link=data.get('link'),
             bg_color=data.get('bg_color', '#6366f1'),
             text_color=data.get('text_color', '#ffffff'),
             position=data.get('position', 'main'),
-            display_order=data.get('display_order', 0),
+            display_order=data.get('display_order') or 0,
             is_active=data.get('is_active', True)
         )
         
         db.session.add(banner)
         db.session.commit()
+        cache.invalidate(BANNER_CACHE)
         
         return jsonify({
             'message': 'Tạo banner thành công',
@@ -108,6 +162,9 @@ def update_banner(banner_id):
     """Update an existing banner"""
     banner = Banner.query.get_or_404(banner_id)
     data = request.get_json()
+    error = validate_variant_set(data.get('image_variants'))
+    if error:
+        return jsonify({'error': error}), 400
     
     try:
         # Update fields
@@ -116,7 +173,12 @@ def update_banner(banner_id):
         if 'description' in data:
             banner.description = data['description']
         if 'image_url' in data:
+            # Đổi ảnh mà không gửi variant set mới: bỏ variant set của ảnh cũ (srcset được ưu tiên)
+            if data['image_url'] != banner.image_url and 'image_variants' not in data:
+                banner.image_variants = None
             banner.image_url = data['image_url']
+        if 'image_variants' in data:
+            banner.image_variants = data['image_variants']
         if 'link' in data:
             banner.link = data['link']
         if 'bg_color' in data:
@@ -126,11 +188,13 @@ def update_banner(banner_id):
         if 'position' in data:
             banner.position = data['position']
         if 'display_order' in data:
-            banner.display_order = data['display_order']
+            # Cột NOT NULL (khóa keyset): null -> 0
+            banner.display_order = data['display_order'] or 0
         if 'is_active' in data:
             banner.is_active = data['is_active']
         
         db.session.commit()
+        cache.invalidate(BANNER_CACHE)
         
         return jsonify({
             'message': 'Cập nhật banner thành công',
@@ -150,6 +214,7 @@ def delete_banner(banner_id):
     try:
         db.session.delete(banner)
         db.session.commit()
+        cache.invalidate(BANNER_CACHE)
         
         return jsonify({'message': 'Xóa banner thành công'})
     except Exception as e:
@@ -166,6 +231,7 @@ def toggle_banner_status(banner_id):
     try:
         banner.is_active = not banner.is_active
         db.session.commit()
+        cache.invalidate(BANNER_CACHE)
         
         return jsonify({
             'message': f'Banner đã {"kích hoạt" if banner.is_active else "vô hiệu hóa"}',
@@ -3,14 +3,35 @@ Routes cho quản lý sách (CRUD, tìm kiếm)
 """
 from flask import Blueprint, request, jsonify
 from business.services.book_service import BookService
-from utils.helpers import admin_required
+from utils.authorization import admin_required
+from data.pagination import TOTAL_MODES
+from utils.http_cache import conditional_get
+from utils.db_routing import use_replica
 
 books_bp = Blueprint('books', __name__)
 
+def _catalog_version(*args, **kwargs):
+    """(etag, last_modified) của catalog cho conditional GET"""
+    version, last_modified, error = BookService.get_catalog_version()
+    if error:
+        return None
+    return f'books-{version}', last_modified
+
+def _book_version(book_id):
+    """(etag, last_modified) của một sách (theo updated_at của chính sách đó)"""
+    version, last_modified, error = BookService.get_book_version(book_id)
+    if error or version is None:
+        return None
+    return f'book-{book_id}-{version}', last_modified
+
 @books_bp.route('/books', methods=['GET'])
+@use_replica
+@conditional_get(_catalog_version)
 def get_books():
     """
     Lấy danh sách sách (có pagination, filter, search)
+    Có tham số cursor -> phân trang keyset (infinite scroll), total chỉ tính khi
+    truyền total=exact|estimate
     """
     try:
         page = request.args.get('page', 1, type=int)
@@ -19,6 +40,29 @@ def get_books():
         category = request.args.get('category', '').strip()
         author = request.args.get('author', '').strip()
         
+        if 'cursor' in request.args:
+            per_page = max(1, min(per_page, 100))
+            total_mode = request.args.get('total', 'none')
+            if total_mode not in TOTAL_MODES:
+                return jsonify({'error': f'total phải là một trong: {", ".join(TOTAL_MODES)}'}), 400
+            
+            # Call business service
+            books, next_cursor, total, is_estimate, error = BookService.get_books_by_cursor(
+                request.args.get('cursor'), per_page, search, category, author, total_mode
+            )
+            
+            if error:
+                status_code = 400 if 'không hợp lệ' in error else 500
+                return jsonify({'error': error}), status_code
+            
+            return jsonify({
+                'books': [book.to_dict() for book in books],
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'total': total,
+                'total_is_estimate': is_estimate
+            }), 200
+        
         # Call business service
         books, total, pages = BookService.get_books(page, per_page, search, category, author)
         
@@ -33,7 +77,33 @@ def get_books():
     except Exception as e:
         return jsonify({'error': f'Lỗi lấy danh sách sách: {str(e)}'}), 500
 
+@books_bp.route('/books/categories', methods=['GET'])
+@use_replica
+@conditional_get(_catalog_version)
+def get_categories():
+    """
+    Lấy danh sách thể loại
+    """
+    categories, error = BookService.get_categories()
+    if error:
+        return jsonify({'error': error}), 500
+    return jsonify({'categories': categories}), 200
+
+@books_bp.route('/books/authors', methods=['GET'])
+@use_replica
+@conditional_get(_catalog_version)
+def get_authors():
+    """
+    Lấy danh sách tác giả
+    """
+    authors, error = BookService.get_authors()
+    if error:
+        return jsonify({'error': error}), 500
+    return jsonify({'authors': authors}), 200
+
 @books_bp.route('/books/<int:book_id>', methods=['GET'])
+@use_replica
+@conditional_get(_book_version)
 def get_book(book_id):
     """
     Lấy chi tiết sách
@@ -98,6 +168,34 @@ def update_book(book_id):
     except Exception as e:
         return jsonify({'error': f'Lỗi cập nhật sách: {str(e)}'}), 500
 
+@books_bp.route('/books/batch', methods=['PUT'])
+@admin_required
+def batch_update_books():
+    """
+    Cập nhật giá/tồn kho nhiều sách trong một transaction (admin only)
+    Body: {"items": [{"id": 1, "price": 99000}, {"id": 2, "stock_delta": -3}, ...]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        # Call business service
+        results, error = BookService.batch_update_books(data.get('items'))
+        
+        if error:
+            status_code = 500 if error.startswith('Lỗi') else 400
+            return jsonify({'error': error}), status_code
+        
+        updated = sum(1 for result in results if result['success'])
+        return jsonify({
+            'message': f'Đã cập nhật {updated}/{len(results)} sách',
+            'updated': updated,
+            'failed': len(results) - updated,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Lỗi cập nhật sách: {str(e)}'}), 500
+
 @books_bp.route('/books/<int:book_id>', methods=['DELETE'])
 @admin_required
 def delete_book(book_id):
@@ -3,7 +3,7 @@ Routes cho quản lý giỏ hàng
 """
 from flask import Blueprint, request, jsonify, session
 from business.services.cart_service import CartService
-from utils.helpers import login_required
+from utils.authorization import login_required
 
 cart_bp = Blueprint('cart', __name__)
 
@@ -0,0 +1,73 @@
+"""
+Routes phục vụ ảnh đã upload qua URL ổn định /img/<key> (đọc từ storage backend)
+
+Key chứa SHA-256 của nội dung (utils/storage.py) nên nội dung của một URL không bao giờ
+đổi -> Cache-Control immutable, browser/CDN/nginx cache dùng chung giữa các lần deploy.
+Hỗ trợ conditional GET (ETag) và Range (một khoảng byte) để resume/tải từng phần.
+"""
+from flask import Blueprint, Response, request, jsonify
+from utils.storage import storage_service
+from utils.storage_backends import StorageUnavailable
+
+images_bp = Blueprint('images', __name__)
+
+IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _single_range(size, etag):
+    """
+    (start, stop) của header Range, None nếu không có/không áp dụng
+    (nhiều khoảng hoặc If-Range không khớp -> trả cả file), 'invalid' nếu không thỏa mãn được
+    """
+    byte_range = request.range
+    if byte_range is None or byte_range.units != 'bytes' or len(byte_range.ranges) != 1:
+        return None
+    if 'If-Range' in request.headers and (request.if_range.date or not request.if_range.etag
+                             or request.if_range.etag != etag):
+        return None
+    return byte_range.range_for_length(size) or 'invalid'
+
+
+@images_bp.route('/img/<path:key>', methods=['GET', 'HEAD'])
+def get_image(key):
+    """
+    Ảnh theo key (books/..., banners/...)
+    Header: If-None-Match -> 304; Range: bytes=start-end -> 206 (416 nếu ngoài kích thước)
+    """
+    if not storage_service.is_public_key(key):
+        return jsonify({'error': 'Không tìm thấy ảnh'}), 404
+
+    try:
+        info = storage_service.stat(key)
+    except StorageUnavailable:
+        return jsonify({'error': 'Kho ảnh tạm thời không khả dụng'}), 503, {'Retry-After': '5'}
+    if info is None:
+        return jsonify({'error': 'Không tìm thấy ảnh'}), 404
+
+    size = info['size']
+    response = Response(status=200, mimetype=info['content_type'] or 'application/octet-stream')
+    response.headers['Cache-Control'] = IMAGE_CACHE_CONTROL
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.set_etag(info['etag'])
+    response.last_modified = info['last_modified']
+
+    if request.if_none_match.contains(info['etag']):
+        response.status_code = 304
+        return response
+
+    byte_range = _single_range(size, info['etag'])
+    if byte_range == 'invalid':
+        response.status_code = 416
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, stop = byte_range or (0, size)
+    if byte_range:
+        response.status_code = 206
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+
+    if request.method == 'GET' and stop > start:
+        response.response = storage_service.iter_object(key, start, stop - start)
+        response.direct_passthrough = True
+    response.content_length = stop - start
+    return response
@@ -3,7 +3,7 @@ Routes cho quản lý đơn hàng (COD)
 """
 from flask import Blueprint, request, jsonify, session
 from business.services.order_service import OrderService
-from utils.helpers import login_required
+from utils.authorization import login_required
 
 orders_bp = Blueprint('orders', __name__)
 
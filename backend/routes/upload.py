@@ -1,47 +1,107 @@
 """
 Routes cho upload ảnh lên MinIO
 """
-from flask import Blueprint, request, jsonify
-from utils.helpers import admin_required
+from flask import Blueprint, request, jsonify, current_app
+from utils.authorization import admin_required
 from utils.storage import storage_service
+from utils.storage_backends import StorageUnavailable
+from utils.image_processing import ImageProcessorBusy
 
 upload_bp = Blueprint('upload', __name__)
 
+# Phần dư cho boundary/header của multipart khi so Content-Length với UPLOAD_MAX_BYTES
+MULTIPART_OVERHEAD = 64 * 1024
+
+def _format_size(size):
+    return f'{size / (1024 * 1024):g}MB'
+
 @upload_bp.route('/admin/upload', methods=['POST'])
 @admin_required
 def upload_image():
     """
     Upload ảnh lên MinIO (admin only)
+    Body: multipart (field 'file') hoặc nội dung ảnh gửi trực tiếp với Content-Type image/*
+    (?filename=cover.jpg, mặc định theo Content-Type) - body được stream thẳng lên MinIO
+    Mặc định ảnh được xử lý thành các variant WebP (srcset + thumbnail);
+    ?variants=false để lưu nguyên file gốc (ví dụ GIF động)
     """
+    max_size = current_app.config['UPLOAD_MAX_BYTES']
+    
+    # Từ chối sớm theo Content-Length, trước khi đọc byte nào của body
+    content_length = request.content_length
+    if not content_length:
+        return jsonify({'error': 'Thiếu Content-Length'}), 411
+    is_raw = request.mimetype.startswith('image/')
+    if content_length > max_size + (0 if is_raw else MULTIPART_OVERHEAD):
+        return jsonify({'error': f'File quá lớn. Kích thước tối đa: {_format_size(max_size)}'}), 413
+    
+    folder = request.args.get('folder', 'books')
+    if folder not in ('books', 'banners'):
+        return jsonify({'error': 'folder không hợp lệ'}), 400
+    keep_original = request.args.get('variants', 'true').lower() == 'false'
+    
+    # Giới hạn số upload đồng thời mỗi worker (bộ nhớ mỗi upload <= UPLOAD_MAX_BYTES / MINIO_PART_SIZE)
+    if not storage_service.upload_slots.acquire(blocking=False):
+        return jsonify({'error': 'Hệ thống đang bận, vui lòng thử lại sau'}), 503, {'Retry-After': '2'}
+    
     try:
-        # Kiểm tra có file không
-        if 'file' not in request.files:
-            return jsonify({'error': 'Không có file được upload'}), 400
-        
-        file = request.files['file']
-        
-        if file.filename == '':
-            return jsonify({'error': 'Không có file được chọn'}), 400
-        
-        # Validate file size (max 5MB)
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset
-        
-        max_size = 5 * 1024 * 1024  # 5MB
-        if file_size > max_size:
-            return jsonify({'error': 'File quá lớn. Kích thước tối đa: 5MB'}), 400
-        
-        # Upload lên MinIO
-        url = storage_service.upload_file(file)
+        if is_raw:
+            filename = request.args.get('filename') or f'upload.{request.mimetype.split("/", 1)[1]}'
+            
+            # Upload file gốc: stream body lên MinIO với độ dài đã biết
+            if keep_original:
+                url = storage_service.upload_stream(request.stream, content_length, filename, folder)
+                return jsonify({
+                    'message': 'Upload thành công',
+                    'url': url
+                }), 200
+            
+            data = request.stream.read(content_length)
+            if len(data) != content_length:
+                return jsonify({'error': 'Dữ liệu upload không đầy đủ'}), 400
+            result = storage_service.upload_image_data(data, filename, folder)
+        else:
+            # Kiểm tra có file không
+            if 'file' not in request.files:
+                return jsonify({'error': 'Không có file được upload'}), 400
+            
+            file = request.files['file']
+            
+            if file.filename == '':
+                return jsonify({'error': 'Không có file được chọn'}), 400
+            
+            # Validate file size
+            file.seek(0, 2)  # Seek to end
+            file_size = file.tell()
+            file.seek(0)  # Reset
+            
+            if file_size > max_size:
+                return jsonify({'error': f'File quá lớn. Kích thước tối đa: {_format_size(max_size)}'}), 413
+            
+            # Upload file gốc lên MinIO
+            if keep_original:
+                url = storage_service.upload_file(file, folder)
+                return jsonify({
+                    'message': 'Upload thành công',
+                    'url': url
+                }), 200
+            
+            # Xử lý ảnh trên pool rồi upload các variant
+            result = storage_service.upload_image(file, folder)
         
         return jsonify({
             'message': 'Upload thành công',
-            'url': url
+            'url': result['url'],
+            'variants': result['variants']
         }), 200
         
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
+    except ImageProcessorBusy:
+        return jsonify({'error': 'Hệ thống đang bận, vui lòng thử lại sau'}), 503, {'Retry-After': '2'}
+    except StorageUnavailable:
+        return jsonify({'error': 'Kho ảnh tạm thời không khả dụng, vui lòng thử lại sau'}), 503, {'Retry-After': '5'}
     except Exception as e:
         return jsonify({'error': f'Lỗi khi upload: {str(e)}'}), 500
-
+    finally:
+        storage_service.upload_slots.release()
@@ -0,0 +1,64 @@
+"""
+Fixtures chung cho test backend
+
+App chạy trên SQLite tạm (hoặc TEST_DATABASE_URL, vd. Postgres cho test EXPLAIN),
+storage trong bộ nhớ, không cache catalog, bcrypt/xử lý ảnh chạy inline.
+Mỗi test có schema mới (drop_all/create_all).
+"""
+import os
+import sys
+import tempfile
+
+_test_dir = tempfile.mkdtemp(prefix='bookstore-test-')
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL', f"sqlite:///{os.path.join(_test_dir, 'test.db')}")
+os.environ['STORAGE_BACKEND'] = 'memory'
+os.environ['CACHE_BACKEND'] = 'none'
+os.environ['PASSWORD_HASH_EXECUTOR'] = 'inline'
+os.environ['IMAGE_PROCESS_EXECUTOR'] = 'inline'
+os.environ['BCRYPT_ROUNDS'] = '4'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from app import app as flask_app
+from models import db as _db, User
+from utils.authorization import access_cache
+from utils.helpers import hash_password
+
+PASSWORD = 'pass123'
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        _db.drop_all()
+        _db.create_all()
+        access_cache.clear()
+        yield flask_app
+        _db.session.remove()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+def create_user(username: str, role: str = 'user') -> User:
+    """Tạo user với mật khẩu PASSWORD"""
+    user = User(username=username, email=f'{username}@example.com', full_name=username,
+                password_hash=hash_password(PASSWORD, rounds=4), role=role)
+    _db.session.add(user)
+    _db.session.commit()
+    return user
+
+
+def login(client, username: str) -> None:
+    response = client.post('/api/login', json={'username': username, 'password': PASSWORD})
+    assert response.status_code == 200, response.get_json()
+
+
+@pytest.fixture
+def admin_client(app):
+    create_user('admin', role='admin')
+    client = app.test_client()
+    login(client, 'admin')
+    return client
@@ -0,0 +1,28 @@
+"""
+Danh sách banner admin: page mode và cursor mode cùng thứ tự
+"""
+from datetime import datetime, timedelta
+from models import Banner
+
+
+def test_page_and_cursor_modes_return_the_same_order(db, admin_client):
+    now = datetime.utcnow()
+    # display_order trùng nhau, banner tạo sau có id lớn hơn
+    for i, display_order in enumerate([2, 1, 1, 0, 1]):
+        db.session.add(Banner(title=f'Banner {i}', image_url='/img/banners/x.jpg', display_order=display_order,
+                              created_at=now + timedelta(minutes=i)))
+    db.session.commit()
+
+    paged = []
+    for page in (1, 2, 3):
+        response = admin_client.get('/api/admin/banners', query_string={'page': page, 'per_page': 2})
+        paged += [banner['id'] for banner in response.get_json()['banners']]
+
+    keyset, cursor = [], ''
+    while cursor is not None:
+        data = admin_client.get('/api/admin/banners', query_string={'cursor': cursor, 'per_page': 2}).get_json()
+        keyset += [banner['id'] for banner in data['banners']]
+        cursor = data['next_cursor']
+
+    assert paged == keyset
+    assert len(keyset) == 5
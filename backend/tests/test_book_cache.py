@@ -0,0 +1,53 @@
+"""
+Cache và ETag của chi tiết sách theo version của từng sách
+"""
+import pytest
+from models import Book
+from utils.cache import cache
+from utils.db_routing import read_cache_scope, READ_CACHE_SCOPES
+
+
+@pytest.fixture
+def memory_cache(app):
+    app.config['CACHE_BACKEND'] = 'memory'
+    cache.init_app(app, key_scope=read_cache_scope, key_scopes=READ_CACHE_SCOPES)
+    yield cache
+    app.config['CACHE_BACKEND'] = 'none'
+    cache.init_app(app, key_scope=read_cache_scope, key_scopes=READ_CACHE_SCOPES)
+
+
+def _books(db, count):
+    books = [Book(title=f'Sách {i}', author='Tác giả', category='Văn học', price=10, stock=5) for i in range(count)]
+    db.session.add_all(books)
+    db.session.commit()
+    return [book.id for book in books]
+
+
+def _detail_misses(memory_cache):
+    return memory_cache.stats()['namespaces'].get('book', {}).get('misses', 0)
+
+
+def test_detail_cache_survives_writes_to_other_books(db, app, admin_client, memory_cache):
+    first, second = _books(db, 2)
+    client = app.test_client()
+    etag = client.get(f'/api/books/{first}').headers['ETag']
+
+    assert admin_client.put(f'/api/books/{second}', json={'price': 20}).status_code == 200
+
+    assert client.get(f'/api/books/{first}', headers={'If-None-Match': etag}).status_code == 304
+    misses = _detail_misses(memory_cache)
+    assert client.get(f'/api/books/{first}').status_code == 200
+    # version và nội dung chi tiết vẫn nằm trong cache
+    assert _detail_misses(memory_cache) == misses
+
+
+def test_detail_cache_follows_writes_to_the_book(db, app, admin_client, memory_cache):
+    book_id, = _books(db, 1)
+    client = app.test_client()
+    etag = client.get(f'/api/books/{book_id}').headers['ETag']
+
+    assert admin_client.put(f'/api/books/{book_id}', json={'price': 20}).status_code == 200
+
+    response = client.get(f'/api/books/{book_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['book']['price'] == 20
@@ -0,0 +1,39 @@
+"""
+Checkout: lỗi thiếu hàng dưới lock trả về tên sách mà không query lại sau rollback
+"""
+from sqlalchemy import event
+from models import Book, Cart, Order
+from data.book_dao import BookDAO
+from tests.conftest import create_user, login
+
+
+def test_reserve_stock_failure_message_is_built_before_rollback(db, app, monkeypatch):
+    user = create_user('buyer')
+    book = Book(title='Dế Mèn phiêu lưu ký', author='Tô Hoài', category='Thiếu nhi', price=10, stock=5)
+    db.session.add(book)
+    db.session.flush()
+    db.session.add(Cart(user_id=user.id, book_id=book.id, quantity=1))
+    db.session.commit()
+    client = app.test_client()
+    login(client, 'buyer')
+
+    # Một đơn khác vừa trừ hết kho giữa lúc validate và UPDATE có điều kiện
+    monkeypatch.setattr(BookDAO, 'reserve_stock', staticmethod(lambda quantities: ({}, list(quantities))))
+    events = []
+    listeners = {
+        'before_cursor_execute': lambda conn, cursor, statement, *args: events.append(statement),
+        'rollback': lambda conn: events.append('ROLLBACK'),
+    }
+    for name, listener in listeners.items():
+        event.listen(db.engine, name, listener)
+    try:
+        response = client.post('/api/orders', json={'shipping_address': '12 Đường Lê Lợi, Quận 1'})
+    finally:
+        for name, listener in listeners.items():
+            event.remove(db.engine, name, listener)
+
+    assert response.status_code == 400
+    assert 'Dế Mèn phiêu lưu ký' in response.get_json()['error']
+    assert 'ROLLBACK' in events
+    assert events[events.index('ROLLBACK') + 1:] == []
+    assert Order.query.count() == 0
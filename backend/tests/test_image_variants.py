@@ -0,0 +1,66 @@
+"""
+Variant set ảnh (srcset) của books/banners khi đổi image_url
+"""
+import io
+from models import Book, Banner
+from business.services.book_import_service import BookImportService
+
+OLD_VARIANTS = {
+    'sizes': [{'width': 320, 'url': '/img/books/old/w320.webp'}],
+    'thumbnail': {'width': 160, 'url': '/img/books/old/thumb.webp'}
+}
+
+
+def _book(db, **kwargs):
+    book = Book(title='Sách', author='Tác giả', category='Văn học', price=10, stock=5,
+                image_url='/img/books/old.jpg', image_variants=OLD_VARIANTS, **kwargs)
+    db.session.add(book)
+    db.session.commit()
+    return book.id
+
+
+def test_book_url_only_put_drops_old_variants(db, admin_client):
+    book_id = _book(db)
+
+    response = admin_client.put(f'/api/books/{book_id}', json={'image_url': 'https://example.com/new.jpg'})
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['book']['image_variants'] is None
+    assert db.session.get(Book, book_id).image_variants is None
+
+
+def test_book_put_with_same_url_keeps_variants(db, admin_client):
+    book_id = _book(db)
+
+    response = admin_client.put(f'/api/books/{book_id}', json={'image_url': '/img/books/old.jpg', 'price': 12})
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['book']['image_variants'] == OLD_VARIANTS
+
+
+def test_banner_url_only_put_drops_old_variants(db, admin_client):
+    banner = Banner(title='Banner', image_url='/img/banners/old.jpg', image_variants=OLD_VARIANTS)
+    db.session.add(banner)
+    db.session.commit()
+
+    response = admin_client.put(f'/api/admin/banners/{banner.id}', json={'image_url': 'https://example.com/b.jpg'})
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['banner']['image_variants'] is None
+
+
+def test_import_drops_variants_only_when_url_changes(db, app):
+    changed_id = _book(db, external_id='changed')
+    same_id = _book(db, external_id='same')
+    lines = [
+        'external_id,title,author,category,price,stock,image_url',
+        'changed,Sách,Tác giả,Văn học,10,5,https://example.com/new.jpg',
+        'same,Sách,Tác giả,Văn học,10,5,/img/books/old.jpg',
+    ]
+
+    summary, error = BookImportService.import_books(io.StringIO('\n'.join(lines) + '\n'), 'csv')
+
+    assert error is None and summary['updated'] == 2, summary
+    db.session.expire_all()
+    assert db.session.get(Book, changed_id).image_variants is None
+    assert db.session.get(Book, same_id).image_variants == OLD_VARIANTS
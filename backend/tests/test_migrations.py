@@ -0,0 +1,35 @@
+"""
+Migration dữ liệu 0007 (presigned URL -> /img/<key>)
+"""
+from datetime import datetime
+import sqlalchemy as sa
+from flask_migrate import upgrade
+
+PRESIGNED = 'http://minio:9000/bookstore-images/books/abc.jpg?X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Signature=ff'
+OLD = datetime(2020, 1, 1)
+
+
+def test_0007_rewrites_urls_and_bumps_updated_at(db, app):
+    db.drop_all()
+    db.session.execute(sa.text('DROP TABLE IF EXISTS alembic_version'))
+    db.session.commit()
+    upgrade(revision='0006')
+    for url in (PRESIGNED, 'https://example.com/cover.jpg'):
+        db.session.execute(sa.text(
+            "INSERT INTO books (title, author, category, price, stock, image_url, updated_at) "
+            "VALUES ('Sách', 'Tác giả', 'Văn học', 10, 1, :url, :updated_at)"), {'url': url, 'updated_at': OLD})
+    db.session.execute(sa.text(
+        "INSERT INTO banners (title, image_url, display_order, updated_at) VALUES ('Banner', :url, 0, :updated_at)"),
+        {'url': PRESIGNED, 'updated_at': OLD})
+    db.session.commit()
+
+    upgrade(revision='0007')
+
+    books = db.session.execute(sa.text('SELECT image_url, updated_at FROM books ORDER BY id')).all()
+    assert books[0].image_url == '/img/books/abc.jpg'
+    assert str(books[0].updated_at) > str(OLD)
+    assert books[1].image_url == 'https://example.com/cover.jpg'
+    assert str(books[1].updated_at) == str(OLD)
+    banner = db.session.execute(sa.text('SELECT image_url, updated_at FROM banners')).one()
+    assert banner.image_url == '/img/books/abc.jpg'
+    assert str(banner.updated_at) > str(OLD)
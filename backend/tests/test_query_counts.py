@@ -0,0 +1,67 @@
+"""
+Số query của các endpoint dựng DTO lồng nhau (order -> items -> book, cart -> book)
+không tăng theo lượng dữ liệu
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+import pytest
+from sqlalchemy import event
+from models import Book, Cart, Order, OrderItem
+from utils.authorization import access_cache
+from tests.conftest import create_user, login
+
+
+@contextmanager
+def count_queries(db):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _add_data(db, user_id, count):
+    """count sách, count đơn hàng (2 dòng mỗi đơn) và count dòng giỏ hàng cho user"""
+    books = [Book(title=f'Sách {i}', author='Tác giả', category='Văn học', price=10, stock=100)
+             for i in range(count)]
+    db.session.add_all(books)
+    db.session.flush()
+    for i, book in enumerate(books):
+        other = books[(i + 1) % count]
+        order = Order(user_id=user_id, total_amount=Decimal('20'), shipping_address='1 Đường A')
+        order.order_items = [OrderItem(book_id=book.id, quantity=1, price=Decimal('10')),
+                             OrderItem(book_id=other.id, quantity=1, price=Decimal('10'))]
+        db.session.add(order)
+        db.session.add(Cart(user_id=user_id, book_id=book.id, quantity=1))
+    db.session.commit()
+
+
+def _query_count(db, client, url):
+    access_cache.clear()
+    with count_queries(db) as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+@pytest.mark.parametrize('url, role', [
+    ('/api/orders', 'user'),
+    ('/api/cart', 'user'),
+    ('/api/admin/orders', 'admin'),
+])
+def test_query_count_does_not_grow_with_data(db, app, url, role):
+    user = create_user('buyer', role=role)
+    client = app.test_client()
+    login(client, 'buyer')
+
+    _add_data(db, user.id, 2)
+    small = _query_count(db, client, url)
+    _add_data(db, user.id, 10)
+    large = _query_count(db, client, url)
+
+    assert large == small
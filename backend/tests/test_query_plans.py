@@ -0,0 +1,109 @@
+"""
+Query plan của các query DAO nóng: không được quét toàn bảng (full scan) trên các bảng lớn
+
+SQLite: EXPLAIN QUERY PLAN, mọi dòng 'SCAN <bảng>' (kể cả USING INDEX: duyệt hết index) là full scan.
+Postgres (TEST_DATABASE_URL): EXPLAIN (FORMAT JSON) với enable_seqscan = off - bảng test
+nhỏ nên planner chỉ chọn Seq Scan khi không có index dùng được.
+"""
+import re
+from contextlib import contextmanager
+from decimal import Decimal
+import pytest
+from sqlalchemy import event
+from models import Banner, Book, Cart, Order, OrderItem
+from data.book_dao import BookDAO
+from data.cart_dao import CartDAO
+from data.order_dao import OrderDAO, OrderItemDAO
+from tests.conftest import create_user
+
+LARGE_TABLES = {'books', 'cart', 'orders', 'order_items', 'banners'}
+
+
+@contextmanager
+def capture_selects(db):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _sqlite_full_scans(connection, statement, parameters):
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    scans = []
+    for row in rows:
+        match = re.match(r'SCAN (\w+)', row[-1])
+        if match:
+            scans.append(re.sub(r'_\d+$', '', match.group(1)))
+    return scans
+
+
+def _postgres_full_scans(connection, statement, parameters):
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+    scans = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node['Node Type'] == 'Seq Scan':
+            scans.append(node['Relation Name'])
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+
+def _full_scans(db, statement, parameters):
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        return _postgres_full_scans(connection, statement, parameters)
+    return _sqlite_full_scans(connection, statement, parameters)
+
+
+@pytest.fixture
+def catalog(db):
+    """Vài dòng cho mỗi bảng, trả về id dùng trong các query"""
+    user = create_user('buyer')
+    books = [Book(title=f'Sách {i}', author='Tác giả', category=f'Thể loại {i % 3}', price=10, stock=100)
+             for i in range(6)]
+    db.session.add_all(books)
+    db.session.flush()
+    for i, book in enumerate(books):
+        order = Order(user_id=user.id, total_amount=Decimal('10'), shipping_address='1 Đường A',
+                      status='pending' if i % 2 else 'completed')
+        order.order_items = [OrderItem(book_id=book.id, quantity=1, price=Decimal('10'))]
+        db.session.add(order)
+        db.session.add(Cart(user_id=user.id, book_id=book.id, quantity=1))
+        db.session.add(Banner(title=f'Banner {i}', image_url='/img/banners/x.jpg',
+                              position='main' if i % 2 else 'side_top', display_order=i))
+    db.session.commit()
+    return {'user_id': user.id, 'book_id': books[0].id, 'order_id': order.id}
+
+
+HOT_QUERIES = {
+    'cart by user': lambda ids: CartDAO.get_by_user_id(ids['user_id']),
+    'cart by user and book': lambda ids: CartDAO.get_by_user_and_book(ids['user_id'], ids['book_id']),
+    'cart total items': lambda ids: CartDAO.get_total_items(ids['user_id']),
+    'orders by user (with items and books)': lambda ids: OrderDAO.get_by_user_id(ids['user_id']),
+    'order by user and id': lambda ids: OrderDAO.get_by_user_and_id(ids['user_id'], ids['order_id']),
+    'orders by status': lambda ids: OrderDAO.search(status='pending'),
+    'order items by order': lambda ids: OrderItemDAO.get_by_order_id(ids['order_id']),
+    'books by category': lambda ids: BookDAO.search(category='Thể loại 1'),
+    'active banners by position': lambda ids: Banner.query.filter_by(is_active=True, position='main')
+                                                .order_by(Banner.display_order.asc()).all(),
+}
+
+
+@pytest.mark.parametrize('name', list(HOT_QUERIES))
+def test_hot_query_uses_indexes(db, catalog, name):
+    with capture_selects(db) as statements:
+        HOT_QUERIES[name](catalog)
+    assert statements
+
+    for statement, parameters in statements:
+        scans = [table for table in _full_scans(db, statement, parameters) if table in LARGE_TABLES]
+        assert not scans, f'{name}: full scan trên {scans}\n{statement}'
@@ -0,0 +1,96 @@
+"""
+Phân quyền dùng chung cho mọi route: login_required, admin_required
+
+Role và trạng thái active của user được đọc từ database (không tin user_role trong
+cookie session) rồi cache trong process AUTH_CACHE_TTL giây, nên phần lớn request
+không tốn query nào. Khóa tài khoản/đổi role gọi access_cache.invalidate(user_id):
+worker xử lý request đó áp dụng ngay, các worker khác chậm nhất sau AUTH_CACHE_TTL giây.
+"""
+import threading
+import time
+from functools import wraps
+from typing import Dict, Optional
+from flask import current_app, jsonify, session
+
+
+class AccessCache:
+    """Cache TTL trong process: user_id -> {'role', 'is_active'} (None nếu user không tồn tại)"""
+
+    def __init__(self):
+        self._entries: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Role/active của user, đọc database khi chưa có trong cache hoặc đã hết hạn"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        from data.user_dao import UserDAO
+        user = UserDAO.get_by_id(user_id)
+        access = {'role': user.role, 'is_active': user.is_active} if user else None
+
+        ttl = current_app.config.get('AUTH_CACHE_TTL', 30)
+        with self._lock:
+            self._entries[user_id] = (now + ttl, access)
+            if len(self._entries) > current_app.config.get('AUTH_CACHE_MAX_ENTRIES', 10000):
+                self._entries = {key: value for key, value in self._entries.items() if value[0] > now}
+        return access
+
+    def invalidate(self, user_id: int) -> None:
+        """Bỏ cache của một user (gọi sau khi đổi trạng thái/role)"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Instance dùng chung trong process
+access_cache = AccessCache()
+
+
+def _check_access(require_admin: bool):
+    """Trả về response lỗi (401/403) hoặc None nếu được phép"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Yêu cầu đăng nhập'}), 401
+
+    access = access_cache.get(session['user_id'])
+    if access is None:
+        session.clear()
+        return jsonify({'error': 'Yêu cầu đăng nhập'}), 401
+    if not access['is_active']:
+        session.clear()
+        return jsonify({'error': 'Tài khoản đã bị khóa'}), 403
+    if require_admin and access['role'] != 'admin':
+        return jsonify({'error': 'Yêu cầu quyền admin'}), 403
+    return None
+
+
+def login_required(f):
+    """
+    Decorator để yêu cầu đăng nhập (tài khoản còn active)
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        error = _check_access(require_admin=False)
+        if error:
+            return error
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def admin_required(f):
+    """
+    Decorator để yêu cầu quyền admin
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        error = _check_access(require_admin=True)
+        if error:
+            return error
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,233 @@
+"""
+Cache layer cho dữ liệu đọc nhiều, ít thay đổi (catalog sách, banners)
+
+Backend (CACHE_BACKEND):
+- memory: LRU + TTL trong process (mỗi gunicorn worker một bản)
+- redis: dùng chung giữa các worker/replica (cần package redis, CACHE_REDIS_URL)
+- none: tắt cache
+
+Key được gom theo namespace. invalidate(namespace) tăng "generation" của
+namespace nên mọi key cũ hết hiệu lực ngay mà không cần quét/xóa từng key.
+
+key_scope (init_app): thêm nguồn dữ liệu vào key (vd. primary/replica, utils/db_routing.py);
+trả về None -> request hiện tại bỏ qua cache (không đọc, không ghi).
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ('memory', 'redis', 'none')
+
+
+class MemoryBackend:
+    """LRU + TTL trong process"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """Redis dùng chung giữa các worker (giá trị lưu dạng JSON)"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis cần cài package redis (pip install redis)')
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._client.set(key, json.dumps(value), px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def get_counter(self, key: str) -> int:
+        raw = self._client.get(key)
+        return int(raw) if raw is not None else 0
+
+    def incr(self, key: str) -> int:
+        return self._client.incr(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class Cache:
+    """
+    Read-through cache theo namespace, có thống kê hit/miss.
+    Lỗi backend (vd. Redis không kết nối được) được coi như miss, không làm hỏng request.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.backend_name = 'none'
+        self.default_ttl = 60
+        self.key_prefix = 'bookstore:'
+        self.key_scope: Optional[Callable[[], Optional[str]]] = None
+        self.key_scopes: Tuple[str, ...] = ('',)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app, key_scope: Optional[Callable[[], Optional[str]]] = None,
+                 key_scopes: Tuple[str, ...] = ('',)) -> None:
+        """
+        Chọn backend theo config; key_scope() (nếu có) được gọi mỗi lần đọc/ghi cache,
+        key_scopes là mọi giá trị nó có thể trả về (delete xóa key ở tất cả)
+        """
+        backend_name = app.config.get('CACHE_BACKEND', 'memory')
+        if backend_name not in CACHE_BACKENDS:
+            raise ValueError(f'CACHE_BACKEND phải là một trong: {", ".join(CACHE_BACKENDS)}')
+
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+        self.key_prefix = app.config.get('CACHE_KEY_PREFIX', 'bookstore:')
+        self.backend_name = backend_name
+        self.key_scope = key_scope
+        self.key_scopes = tuple(key_scopes) if key_scope else ('',)
+        if backend_name == 'memory':
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 2048))
+        elif backend_name == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        else:
+            self.backend = None
+
+    @staticmethod
+    def make_key(*parts, **params) -> str:
+        """Key chuẩn hóa: các phần theo thứ tự + params sắp xếp theo tên (bỏ giá trị rỗng)"""
+        items = [str(part) for part in parts]
+        items += [f'{name}={params[name]}' for name in sorted(params) if params[name] not in (None, '')]
+        return '|'.join(items)
+
+    def _record(self, namespace: str, outcome: str) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'errors': 0})
+            stats[outcome] += 1
+
+    def _scope(self) -> Optional[str]:
+        """Phần key theo nguồn dữ liệu ('' nếu không dùng key_scope), None = bỏ qua cache"""
+        if self.backend is None:
+            return None
+        return self.key_scope() if self.key_scope else ''
+
+    def _full_key(self, namespace: str, key: str, scope: str) -> str:
+        generation = self.backend.get_counter(f'{self.key_prefix}gen:{namespace}')
+        return f'{self.key_prefix}{namespace}:{generation}:{scope}:{key}'
+
+    def get(self, namespace: str, key: str) -> Any:
+        """Lấy giá trị (None nếu miss, cache tắt hoặc request bỏ qua cache)"""
+        scope = self._scope()
+        if scope is None:
+            return None
+        try:
+            value = self.backend.get(self._full_key(namespace, key, scope))
+        except Exception as e:
+            logger.warning(f'Cache get lỗi ({namespace}): {e}')
+            self._record(namespace, 'errors')
+            return None
+        self._record(namespace, 'misses' if value is None else 'hits')
+        return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Lưu giá trị (phải serialize được thành JSON)"""
+        scope = self._scope()
+        if scope is None or value is None:
+            return
+        try:
+            self.backend.set(self._full_key(namespace, key, scope), value, ttl or self.default_ttl)
+        except Exception as e:
+            logger.warning(f'Cache set lỗi ({namespace}): {e}')
+            self._record(namespace, 'errors')
+
+    def get_or_set(self, namespace: str, key: str, loader: Callable[[], Any],
+                   ttl: Optional[float] = None) -> Any:
+        """Read-through: trả về giá trị trong cache, nếu miss thì gọi loader() và lưu lại"""
+        value = self.get(namespace, key)
+        if value is None:
+            value = loader()
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Xóa một key ở mọi nguồn dữ liệu (kể cả khi request hiện tại bỏ qua cache, vd. vừa ghi)"""
+        if self.backend is None:
+            return
+        try:
+            for scope in self.key_scopes:
+                self.backend.delete(self._full_key(namespace, key, scope))
+        except Exception as e:
+            logger.warning(f'Cache delete lỗi ({namespace}): {e}')
+            self._record(namespace, 'errors')
+
+    def invalidate(self, namespace: str) -> None:
+        """Làm mất hiệu lực toàn bộ key của namespace"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.incr(f'{self.key_prefix}gen:{namespace}')
+        except Exception as e:
+            logger.warning(f'Cache invalidate lỗi ({namespace}): {e}')
+            self._record(namespace, 'errors')
+
+    def stats(self) -> Dict:
+        """Thống kê hit/miss theo namespace (của process hiện tại)"""
+        with self._stats_lock:
+            namespaces = {}
+            for namespace, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                namespaces[namespace] = dict(stats, hit_rate=round(stats['hits'] / lookups, 4) if lookups else None)
+        return {
+            'backend': self.backend_name,
+            'entries': self.backend.size() if self.backend is not None else 0,
+            'namespaces': namespaces
+        }
+
+
+# Instance dùng chung (khởi tạo trong create_app bằng cache.init_app(app))
+cache = Cache()
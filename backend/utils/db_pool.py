@@ -0,0 +1,132 @@
+"""
+Connection pool cho SQLAlchemy: engine options từ biến môi trường, đo thời gian
+chờ lấy connection, reset pool sau khi gunicorn fork worker
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, 'true' if default else 'false').lower() == 'true'
+
+
+def pgbouncer_enabled() -> bool:
+    """DB_PGBOUNCER=true: connection đi qua PgBouncer (transaction pooling), không giữ được state session"""
+    return _env_bool('DB_PGBOUNCER', False)
+
+
+class PoolMetrics:
+    """Thống kê checkout connection của process hiện tại"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'wait_total_ms': round(self.wait_total * 1000, 3)
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool ghi lại thời gian chờ mỗi lần lấy connection (kể cả khi timeout)"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def build_engine_options(database_uri: str) -> Dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS từ biến môi trường:
+    - DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (giây), DB_POOL_RECYCLE (giây), DB_POOL_PRE_PING
+    - DB_STATEMENT_TIMEOUT_MS: statement_timeout của Postgres (0 = không giới hạn)
+    - DB_PGBOUNCER=true: chạy sau PgBouncer (transaction pooling) -> không giữ pool
+      phía app (NullPool) và không gửi startup options (PgBouncer không hỗ trợ);
+      statement_timeout khi đó đặt ở role/database: ALTER ROLE ... SET statement_timeout
+    """
+    options = {'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True)}
+
+    if pgbouncer_enabled():
+        options['poolclass'] = NullPool
+        if int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0')):
+            logger.warning('DB_PGBOUNCER=true: bỏ qua DB_STATEMENT_TIMEOUT_MS (PgBouncer không nhận startup options), '
+                           'đặt statement_timeout bằng ALTER ROLE ... SET statement_timeout')
+        return options
+
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=int(os.getenv('DB_POOL_SIZE', '5')),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    )
+
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+    if statement_timeout and database_uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+
+    return options
+
+
+def init_app(app, db) -> None:
+    """
+    Sau khi fork (gunicorn preload_app), worker con bỏ các connection kế thừa từ master
+    (không đóng socket của master) và mở pool mới của riêng mình
+    """
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def _reset_pools_after_fork():
+        for engine in engines:
+            engine.dispose(close=False)
+        pool_metrics.reset()
+
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def pool_status(db) -> Dict:
+    """Trạng thái pool + thống kê thời gian chờ (theo worker hiện tại)"""
+    return {
+        'pool': db.engine.pool.status(),
+        'pool_class': type(db.engine.pool).__name__,
+        'metrics': pool_metrics.to_dict()
+    }
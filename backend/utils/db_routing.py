@@ -0,0 +1,118 @@
+"""
+Định tuyến đọc/ghi: SELECT trong các handler chỉ đọc đi tới read replica (bind 'replica'),
+mọi thứ khác (ghi, SELECT ... FOR UPDATE, raw SQL) đi tới primary
+
+- Bật bằng REPLICA_DATABASE_URL (không cấu hình -> mọi query đi tới primary)
+- @use_replica cho route handler, replica_reads() cho một khối code
+- Read-your-own-writes: client vừa ghi (commit có thay đổi) trong REPLICA_LAG_GUARD_SECONDS
+  giây gần nhất tiếp tục đọc từ primary (thời điểm ghi lưu trong Flask session)
+- Cache (utils/cache.py) tách key theo nguồn đọc (read_cache_scope): dữ liệu đọc từ replica
+  không được trả cho request đọc primary, client trong lag guard bỏ qua cache
+"""
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional
+from flask import current_app, has_app_context, has_request_context, session as http_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+USE_REPLICA = 'use_replica'
+HAS_WRITES = 'has_writes'
+LAST_WRITE_SESSION_KEY = '_db_last_write_at'
+# Các giá trị read_cache_scope() trả về (ngoài None)
+READ_CACHE_SCOPES = ('primary', 'replica')
+
+
+class RoutingSession(Session):
+    """Session chọn engine replica cho SELECT khi đang ở chế độ đọc replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and self.info.get(USE_REPLICA)
+            and not self._flushing
+            and clause is not None
+            and getattr(clause, 'is_select', False)
+            and getattr(clause, '_for_update_arg', None) is None
+        ):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush_writes(session, flush_context):
+    session.info[HAS_WRITES] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_statement_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[HAS_WRITES] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_last_write(session):
+    """Ghi nhận thời điểm client vừa ghi để các request đọc tiếp theo dùng primary"""
+    if session.info.pop(HAS_WRITES, False) and has_request_context():
+        http_session[LAST_WRITE_SESSION_KEY] = time.time()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_writes(session):
+    session.info.pop(HAS_WRITES, None)
+
+
+def _replica_configured() -> bool:
+    return REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})
+
+
+def _recent_write() -> bool:
+    """Client của request hiện tại vừa ghi trong khoảng lag guard"""
+    if not has_request_context():
+        return False
+    last_write = http_session.get(LAST_WRITE_SESSION_KEY)
+    return bool(last_write) and time.time() - last_write < current_app.config['REPLICA_LAG_GUARD_SECONDS']
+
+
+def _replica_allowed() -> bool:
+    """Có replica và client không vừa ghi trong khoảng lag guard"""
+    return _replica_configured() and not _recent_write()
+
+
+def read_cache_scope() -> Optional[str]:
+    """
+    Phần cache key theo nguồn đọc của request hiện tại:
+    'replica' khi SELECT đi tới replica (dữ liệu có thể trễ, cache riêng), 'primary' khi đọc primary,
+    None khi có replica nhưng client vừa ghi (lag guard) -> bỏ qua cache, đọc thẳng primary
+    """
+    if not has_app_context() or not _replica_configured():
+        return 'primary'
+    if _recent_write():
+        return None
+    session = current_app.extensions['sqlalchemy'].session()
+    return 'replica' if session.info.get(USE_REPLICA) else 'primary'
+
+
+@contextmanager
+def replica_reads():
+    """Các SELECT trong khối này đọc từ replica (nếu được phép)"""
+    session = current_app.extensions['sqlalchemy'].session()
+    previous = session.info.get(USE_REPLICA, False)
+    session.info[USE_REPLICA] = _replica_allowed()
+    try:
+        yield
+    finally:
+        session.info[USE_REPLICA] = previous
+
+
+def use_replica(f):
+    """Decorator cho route handler chỉ đọc"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with replica_reads():
+            return f(*args, **kwargs)
+    return decorated_function
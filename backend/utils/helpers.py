@@ -3,14 +3,13 @@ Các hàm tiện ích cho ứng dụng
 """
 import bcrypt
 import re
-from functools import wraps
-from flask import session, jsonify
+import unicodedata
 
-def hash_password(password):
+def hash_password(password, rounds=12):
     """
-    Hash password bằng bcrypt
+    Hash password bằng bcrypt (rounds: cost factor)
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
 
 def check_password(password, password_hash):
     """
@@ -31,27 +30,15 @@ def validate_password(password):
     """
     return len(password) >= 6
 
-def login_required(f):
+def normalize_search_text(*parts):
     """
-    Decorator để yêu cầu đăng nhập
+    Chuẩn hóa text để tìm kiếm: bỏ dấu tiếng Việt, bỏ dấu câu, chữ thường,
+    gộp khoảng trắng ("Rồng Đen!" -> "rong den")
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return jsonify({'error': 'Yêu cầu đăng nhập'}), 401
-        return f(*args, **kwargs)
-    return decorated_function
-
-def admin_required(f):
-    """
-    Decorator để yêu cầu quyền admin
-    """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return jsonify({'error': 'Yêu cầu đăng nhập'}), 401
-        if session.get('user_role') != 'admin':
-            return jsonify({'error': 'Yêu cầu quyền admin'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
+    text = ' '.join(part for part in parts if part)
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.lower().split())
 
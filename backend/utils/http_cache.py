@@ -0,0 +1,58 @@
+"""
+HTTP conditional GET (ETag / Last-Modified / 304) cho các endpoint đọc public
+"""
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple
+from flask import current_app, make_response, request
+
+
+def collection_version(max_updated_at: Optional[datetime], count: int) -> str:
+    """Version rẻ của một bảng: max(updated_at) + số dòng (đổi khi thêm/sửa/xóa)"""
+    stamp = int(max_updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000000) if max_updated_at else 0
+    return f'{stamp:x}-{count:x}'
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    """Client đã có bản mới nhất chưa (If-None-Match được ưu tiên hơn If-Modified-Since)"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _set_cache_headers(response, etag: str, last_modified: Optional[datetime]) -> None:
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, must-revalidate'
+
+
+def conditional_get(get_version: Callable[..., Optional[Tuple[str, Optional[datetime]]]]):
+    """
+    Decorator: get_version(*args, **kwargs) trả về (etag, last_modified) của resource.
+    Nếu client gửi If-None-Match/If-Modified-Since khớp -> 304 mà không gọi view;
+    ngược lại gọi view và gắn ETag, Last-Modified, Cache-Control vào response 200.
+    get_version trả về None (vd. lỗi database) -> bỏ qua conditional.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = get_version(*args, **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+
+            etag, last_modified = version
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            _set_cache_headers(response, etag, last_modified)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,137 @@
+"""
+Xử lý ảnh upload (Pillow): decode một lần, tạo các bản resize theo chiều rộng + thumbnail
+dạng WebP, bỏ metadata (EXIF/GPS...)
+
+- IMAGE_VARIANT_WIDTHS: các chiều rộng cho srcset (không phóng to ảnh nhỏ hơn)
+- IMAGE_THUMBNAIL_WIDTH, IMAGE_WEBP_QUALITY
+- Chạy trên pool giới hạn IMAGE_PROCESS_* (utils/worker_pool.py), quá tải -> ImageProcessorBusy
+
+Variant set (lưu trong books.image_variants / banners.image_variants):
+    {"format": "webp",
+     "sizes": [{"width": 320, "height": 427, "url": "..."}, ...],   # tăng dần theo width
+     "thumbnail": {"width": 160, "height": 213, "url": "..."}}
+"""
+import io
+from typing import Dict, List, Optional, Tuple
+from utils.worker_pool import WorkerPool, WorkerPoolBusy
+
+ImageProcessorBusy = WorkerPoolBusy
+
+VARIANT_FORMAT = 'webp'
+VARIANT_CONTENT_TYPE = 'image/webp'
+# Giới hạn số pixel khi decode (chống decompression bomb)
+MAX_IMAGE_PIXELS = 40_000_000
+
+
+def _encode(image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    # Không truyền exif/icc_profile -> metadata bị bỏ
+    image.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def build_variants(data: bytes, widths: Tuple[int, ...], thumbnail_width: int,
+                   quality: int) -> List[Tuple[str, int, int, bytes]]:
+    """
+    Decode ảnh một lần và tạo các variant (chạy trong process/thread của pool)
+    Returns: [(name, width, height, webp_bytes)], name = 'w<width>' hoặc 'thumb'
+    Raises: ValueError nếu không đọc được ảnh
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEG: decode thẳng ở kích thước gần với variant lớn nhất (nhanh hơn, ít RAM hơn);
+        # cạnh ngắn vẫn >= max(widths) nên xoay theo EXIF sau đó không làm thiếu pixel
+        image.draft('RGB', (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise ValueError('File ảnh không hợp lệ')
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    # Không phóng to: ảnh nhỏ hơn mọi width -> một variant ở kích thước gốc
+    targets = sorted({min(width, image.width) for width in widths}, reverse=True)
+
+    variants = []
+    current = image
+    for width in targets:
+        if width < current.width:
+            height = max(1, round(current.height * width / current.width))
+            # Resize nối tiếp từ variant lớn hơn liền trước
+            current = current.resize((width, height), Image.LANCZOS)
+        variants.append((f'w{current.width}', current.width, current.height, _encode(current, quality)))
+
+    thumbnail = current.copy()
+    thumbnail.thumbnail((thumbnail_width, thumbnail_width * 4), Image.LANCZOS)
+    variants.append(('thumb', thumbnail.width, thumbnail.height, _encode(thumbnail, quality)))
+
+    variants.reverse()  # thumb trước, rồi width tăng dần
+    return variants
+
+
+def validate_variant_set(value) -> Optional[str]:
+    """Kiểm tra image_variants gửi lên từ client (None = không có). Returns: error_message"""
+    if value is None:
+        return None
+    if not isinstance(value, dict) or not isinstance(value.get('sizes'), list) or not value['sizes']:
+        return 'image_variants không hợp lệ'
+    for size in value['sizes'] + ([value['thumbnail']] if value.get('thumbnail') else []):
+        if (not isinstance(size, dict) or not isinstance(size.get('url'), str)
+                or not isinstance(size.get('width'), int)):
+            return 'image_variants không hợp lệ'
+    return None
+
+
+class ImageProcessor:
+    """Tạo variant set cho ảnh upload trên pool giới hạn"""
+
+    def __init__(self):
+        self.widths: Tuple[int, ...] = (320, 640, 1024)
+        self.thumbnail_width = 160
+        self.quality = 80
+        self.pool = WorkerPool('image')
+
+    def init_app(self, app) -> None:
+        """Đọc cấu hình; pool được tạo lazy trong từng worker (sau khi gunicorn fork)"""
+        self.widths = tuple(app.config.get('IMAGE_VARIANT_WIDTHS', self.widths))
+        self.thumbnail_width = app.config.get('IMAGE_THUMBNAIL_WIDTH', 160)
+        self.quality = app.config.get('IMAGE_WEBP_QUALITY', 80)
+        workers = app.config.get('IMAGE_PROCESS_WORKERS', 2)
+        self.pool.configure(
+            app.config.get('IMAGE_PROCESS_EXECUTOR', 'process'),
+            workers,
+            app.config.get('IMAGE_PROCESS_MAX_PENDING', max(workers, 1) * 2),
+            app.config.get('IMAGE_PROCESS_TIMEOUT', 30.0)
+        )
+
+    def process(self, data: bytes) -> List[Tuple[str, int, int, bytes]]:
+        """Tạo các variant WebP (xem build_variants)"""
+        return self.pool.run(build_variants, data, self.widths, self.thumbnail_width, self.quality)
+
+    def profile(self) -> Dict:
+        """Cấu hình tạo variant; ảnh đã xử lý với profile khác được tạo lại khi upload lại"""
+        return {'format': VARIANT_FORMAT, 'widths': list(self.widths),
+                'thumbnail_width': self.thumbnail_width, 'quality': self.quality}
+
+    @staticmethod
+    def variant_set(entries: List[Tuple[str, int, int, str]]) -> Dict:
+        """[(name, width, height, url)] -> variant set lưu trong database"""
+        variant_set = {'format': VARIANT_FORMAT, 'sizes': [], 'thumbnail': None}
+        for name, width, height, url in entries:
+            entry = {'width': width, 'height': height, 'url': url}
+            if name == 'thumb':
+                variant_set['thumbnail'] = entry
+            else:
+                variant_set['sizes'].append(entry)
+        return variant_set
+
+    def shutdown(self) -> None:
+        self.pool.shutdown()
+
+
+# Instance dùng chung (khởi tạo trong create_app bằng image_processor.init_app(app))
+image_processor = ImageProcessor()
@@ -0,0 +1,57 @@
+"""
+Hash/kiểm tra password (bcrypt) ngoài request thread, có giới hạn tải
+
+- PASSWORD_HASH_EXECUTOR: process (mặc định) | thread | inline
+  bcrypt chạy trong pool PASSWORD_HASH_WORKERS process/thread của mỗi gunicorn worker
+- Admission control: tối đa PASSWORD_HASH_MAX_PENDING thao tác đang chờ/chạy mỗi worker;
+  vượt quá -> PasswordHasherBusy ngay (route trả về 503) thay vì xếp hàng làm nghẽn
+  các request khác (catalog) trong lúc có "login storm"
+- BCRYPT_ROUNDS: cost factor khi tạo hash mới; hash cũ có cost khác được hash lại
+  khi user đăng nhập thành công (needs_rehash)
+"""
+from utils.helpers import hash_password, check_password
+from utils.worker_pool import WorkerPool, WorkerPoolBusy
+
+PasswordHasherBusy = WorkerPoolBusy
+
+
+class PasswordHasher:
+    """Chạy bcrypt trên pool giới hạn (utils/worker_pool.py), từ chối sớm khi quá tải"""
+
+    def __init__(self):
+        self.rounds = 12
+        self.pool = WorkerPool('bcrypt')
+
+    def init_app(self, app) -> None:
+        """Đọc cấu hình; pool được tạo lazy trong từng worker (sau khi gunicorn fork)"""
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.rounds = app.config.get('BCRYPT_ROUNDS', 12)
+        self.pool.configure(
+            app.config.get('PASSWORD_HASH_EXECUTOR', 'process'),
+            workers,
+            app.config.get('PASSWORD_HASH_MAX_PENDING', max(workers, 1) * 4),
+            app.config.get('PASSWORD_HASH_TIMEOUT', 10.0)
+        )
+
+    def hash(self, password: str) -> str:
+        """Hash password với cost BCRYPT_ROUNDS"""
+        return self.pool.run(hash_password, password, self.rounds)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """Kiểm tra password với hash đã lưu"""
+        return self.pool.run(check_password, password, password_hash)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Hash có cost khác BCRYPT_ROUNDS (dạng $2b$12$...)"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self) -> None:
+        """Dừng pool của process hiện tại (nếu có)"""
+        self.pool.shutdown()
+
+
+# Instance dùng chung (khởi tạo trong create_app bằng password_hasher.init_app(app))
+password_hasher = PasswordHasher()
@@ -1,46 +1,86 @@
 """
-Storage utility để upload ảnh lên MinIO
+Storage utility để upload ảnh lên object store
+
+Backend theo STORAGE_BACKEND: minio (mặc định) | local | memory (utils/storage_backends.py).
+Backend được tạo lazy ở lần dùng đầu tiên: import module/create_app không gọi mạng, app vẫn
+khởi động được khi MinIO chậm hoặc chưa sẵn sàng (chỉ thao tác ảnh báo lỗi).
+
+Key theo nội dung (sha256): upload lại cùng một ảnh không tạo bản sao mới
+- File gốc: <folder>/<sha256>.<ext>
+- Variant set: <folder>/<sha256>/w<width>.webp, thumb.webp, variants.json (manifest)
+Object không còn được books/banners tham chiếu được dọn bằng `flask gc-images`
+(business/services/image_gc_service.py), không xóa ngay khi đổi ảnh.
+
+URL lưu trong database là URL ổn định <IMAGE_BASE_URL>/img/<key> (routes/images.py phục vụ
+với Cache-Control immutable), không phải presigned URL có chữ ký/thời hạn.
 """
 import os
-from minio import Minio
-from minio.error import S3Error
 from werkzeug.utils import secure_filename
+from urllib.parse import urlsplit, unquote, quote
+import hashlib
+import io
+import json
+import threading
 import uuid
-from datetime import timedelta
+from utils.image_processing import image_processor, VARIANT_FORMAT, VARIANT_CONTENT_TYPE
+from utils.storage_backends import STORAGE_BACKENDS, StorageBackend, StorageError, create_backend
+
+class _HashingReader:
+    """Bọc stream, tính sha256 của các byte đã đọc"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+    
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.sha256.update(data)
+        return data
+
 
 class StorageService:
-    """Service để quản lý upload ảnh lên MinIO"""
+    """Service để quản lý upload ảnh lên object store (MinIO, thư mục local hoặc bộ nhớ)"""
+    
+    ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+    MANIFEST_NAME = 'variants.json'
+    # Đường dẫn public của ảnh (routes/images.py)
+    URL_PATH = '/img/'
+    PUBLIC_FOLDERS = ('books/', 'banners/')
     
     def __init__(self):
-        """Khởi tạo MinIO client"""
-        self.endpoint = os.getenv('MINIO_ENDPOINT', 'minio:9000')
-        self.access_key = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
-        self.secret_key = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
+        """Đọc cấu hình; không kết nối object store (backend tạo lazy, xem backend)"""
+        self.backend_name = os.getenv('STORAGE_BACKEND', 'minio')
+        if self.backend_name not in STORAGE_BACKENDS:
+            raise ValueError(f'STORAGE_BACKEND phải là một trong: {", ".join(STORAGE_BACKENDS)}')
+        # Endpoint/bucket của presigned URL cũ (object_key_from_url)
+        self.minio_endpoint = os.getenv('MINIO_ENDPOINT', 'minio:9000')
         self.bucket_name = os.getenv('MINIO_BUCKET', 'bookstore-images')
+        # Origin/CDN đặt trước /img/<key> (rỗng -> URL tương đối, cùng origin với frontend)
+        self.public_base_url = os.getenv('IMAGE_BASE_URL', '').rstrip('/')
         
-        # Tạo MinIO client
-        self.client = Minio(
-            self.endpoint,
-            access_key=self.access_key,
-            secret_key=self.secret_key,
-            secure=False  # HTTP cho local, HTTPS cho production
-        )
+        # Số upload đồng thời mỗi worker (giới hạn RSS khi nhiều admin upload cùng lúc)
+        self.upload_slots = threading.BoundedSemaphore(int(os.getenv('UPLOAD_MAX_CONCURRENT', '4')))
         
-        # Tạo bucket nếu chưa có
-        self._ensure_bucket_exists()
+        self._backend = None
+        self._lock = threading.Lock()
     
-    def _ensure_bucket_exists(self):
-        """Đảm bảo bucket tồn tại"""
-        try:
-            if not self.client.bucket_exists(self.bucket_name):
-                self.client.make_bucket(self.bucket_name)
-                print(f'✅ Đã tạo bucket: {self.bucket_name}')
-        except S3Error as e:
-            print(f'❌ Lỗi khi tạo bucket: {e}')
+    @property
+    def backend(self) -> StorageBackend:
+        """Backend theo STORAGE_BACKEND, tạo ở lần dùng đầu tiên"""
+        with self._lock:
+            if self._backend is None:
+                self._backend = create_backend(self.backend_name)
+            return self._backend
+    
+    def use_backend(self, backend: StorageBackend) -> None:
+        """Thay backend (test, CLI), ví dụ storage_service.use_backend(MemoryBackend())"""
+        with self._lock:
+            self._backend = backend
+            self.backend_name = backend.name
     
     def upload_file(self, file, folder='books'):
         """
-        Upload file lên MinIO
+        Upload file lên object store
         
         Args:
             file: File object từ request
@@ -49,64 +89,202 @@ class StorageService:
         Returns:
             str: Public URL của file
         """
+        # Validate file
+        if not file or not file.filename:
+            raise ValueError('Không có file được upload')
+        
+        # Kích thước đã biết (werkzeug đã nhận xong file): seek tới cuối rồi quay lại
+        file.seek(0, 2)
+        length = file.tell()
+        file.seek(0)
+        return self.upload_stream(file.stream, length, file.filename, folder)
+    
+    def upload_stream(self, stream, length, filename, folder='books'):
+        """
+        Upload nguyên nội dung stream (ví dụ request.stream) với độ dài đã biết; backend minio
+        đọc từng part MINIO_PART_SIZE (không đọc cả file vào bộ nhớ, không upload part song song)
+        
+        Args:
+            stream: Object có read()
+            length: Số byte sẽ đọc từ stream
+            filename: Tên file gốc (lấy extension)
+            folder: Thư mục trong bucket (default: 'books')
+        
+        Returns:
+            str: Public URL của file
+        """
+        # jpg/jpeg: cùng một key và content type hợp lệ (image/jpeg)
+        ext = self._get_extension(filename).replace('jpeg', 'jpg')
+        content_type = 'image/jpeg' if ext == 'jpg' else f'image/{ext}'
+        
+        # sha256 chỉ biết sau khi đọc hết stream: upload vào key tạm rồi copy phía server
+        # sang key theo nội dung (copy đè cùng nội dung -> làm mới last_modified cho gc-images)
+        temp_name = self._key(folder, f".upload-{uuid.uuid4().hex}.{ext}")
+        reader = _HashingReader(stream)
+        backend = self.backend
+        backend.put(temp_name, reader, length, content_type)
         try:
-            # Validate file
-            if not file or not file.filename:
-                raise ValueError('Không có file được upload')
-            
-            # Lấy extension
-            filename = secure_filename(file.filename)
-            ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-            
-            # Validate extension
-            allowed_extensions = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
-            if ext not in allowed_extensions:
-                raise ValueError(f'Định dạng file không được hỗ trợ. Chỉ chấp nhận: {", ".join(allowed_extensions)}')
-            
-            # Tạo tên file unique
-            unique_filename = f"{uuid.uuid4()}.{ext}"
-            object_name = f"{folder}/{unique_filename}" if folder else unique_filename
-            
-            # Upload file
-            file.seek(0)  # Reset file pointer
-            self.client.put_object(
-                self.bucket_name,
-                object_name,
-                file,
-                length=-1,  # Auto-detect length
-                content_type=f'image/{ext}'
-            )
-            
-            # Tạo public URL (presigned URL hoặc public URL)
-            # Với MinIO, cần set bucket policy để public hoặc dùng presigned URL
-            # Ở đây dùng presigned URL với thời hạn dài (1 năm)
-            url = self.client.presigned_get_object(
-                self.bucket_name,
-                object_name,
-                expires=timedelta(days=365)
-            )
-            
-            # Hoặc nếu bucket public, có thể dùng URL trực tiếp:
-            # url = f"http://{self.endpoint}/{self.bucket_name}/{object_name}"
-            
-            return url
-            
-        except S3Error as e:
-            raise Exception(f'Lỗi khi upload lên MinIO: {str(e)}')
-        except Exception as e:
-            raise Exception(f'Lỗi khi upload file: {str(e)}')
+            object_name = self._key(folder, f"{reader.sha256.hexdigest()}.{ext}")
+            backend.copy(temp_name, object_name)
+        finally:
+            backend.delete(temp_name)
+        
+        return self._get_url(object_name)
+    
+    def upload_image(self, file, folder='books'):
+        """
+        Xử lý ảnh (decode một lần, resize theo IMAGE_VARIANT_WIDTHS + thumbnail, WebP,
+        bỏ metadata) trên pool của image_processor rồi upload các variant.
+        Key: <folder>/<sha256>/w<width>.webp và <folder>/<sha256>/thumb.webp; ảnh đã có
+        (manifest cùng profile) được dùng lại, không xử lý/upload lại
+        
+        Args:
+            file: File object từ request
+            folder: Thư mục trong bucket (default: 'books')
+        
+        Returns:
+            dict: {'url': URL của variant lớn nhất, 'variants': variant set}
+        
+        Raises:
+            ValueError: file không hợp lệ
+            ImageProcessorBusy: pool xử lý ảnh đang quá tải
+            StorageError: lỗi object store (StorageUnavailable: không kết nối được)
+        """
+        if not file or not file.filename:
+            raise ValueError('Không có file được upload')
+        file.seek(0)
+        return self.upload_image_data(file.read(), file.filename, folder)
+    
+    def upload_image_data(self, data, filename, folder='books'):
+        """upload_image cho nội dung ảnh đã đọc sẵn (bytes), ví dụ từ request body"""
+        self._get_extension(filename)
+        prefix = self._key(folder, hashlib.sha256(data).hexdigest())
+        profile = image_processor.profile()
+        
+        # Dedupe: manifest cùng profile -> các variant đã có trong storage
+        manifest = self._get_manifest(prefix)
+        if manifest is not None and manifest.get('profile') == profile:
+            sizes = manifest['variants']
+        else:
+            sizes = []
+            for name, width, height, variant in image_processor.process(data):
+                self._put_bytes(f"{prefix}/{name}.{VARIANT_FORMAT}", variant, VARIANT_CONTENT_TYPE)
+                sizes.append((name, width, height))
+            manifest = {'profile': profile, 'variants': sizes}
+        
+        # Manifest ghi sau cùng (chỉ có khi đủ variant); ghi lại cả khi dedupe để làm mới
+        # last_modified, gc-images không xóa nhóm vừa được dùng lại
+        self._put_bytes(f"{prefix}/{self.MANIFEST_NAME}", json.dumps(manifest).encode('utf-8'),
+                        'application/json')
+        
+        entries = [(name, width, height, self._get_url(f"{prefix}/{name}.{VARIANT_FORMAT}"))
+                   for name, width, height in sizes]
+        variant_set = image_processor.variant_set(entries)
+        return {'url': variant_set['sizes'][-1]['url'], 'variants': variant_set}
+    
+    def _get_manifest(self, prefix):
+        """Manifest của variant set đã upload (None nếu chưa có)"""
+        data = self.backend.get(f"{prefix}/{self.MANIFEST_NAME}")
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+    
+    def _put_bytes(self, object_name, data, content_type):
+        self.backend.put(object_name, io.BytesIO(data), len(data), content_type)
+    
+    @staticmethod
+    def _key(folder, name):
+        return f"{folder}/{name}" if folder else name
+    
+    def _get_extension(self, filename):
+        """Extension (chữ thường) của tên file, ValueError nếu không được hỗ trợ"""
+        filename = secure_filename(filename or '')
+        ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        if ext not in self.ALLOWED_EXTENSIONS:
+            raise ValueError(f'Định dạng file không được hỗ trợ. Chỉ chấp nhận: {", ".join(sorted(self.ALLOWED_EXTENSIONS))}')
+        return ext
+    
+    def _get_url(self, object_name):
+        """
+        Public URL ổn định của object: <IMAGE_BASE_URL>/img/<key>
+        (không chữ ký, không hết hạn -> browser/CDN cache dùng chung được; bucket không cần public)
+        """
+        return f"{self.public_base_url}{self.URL_PATH}{quote(object_name)}"
+    
+    def is_public_key(self, object_name):
+        """Key được phép phục vụ qua /img/ (ảnh sách/banner, không gồm object tạm khi upload)"""
+        return (object_name.startswith(self.PUBLIC_FOLDERS) and '/.upload-' not in object_name
+                and '..' not in object_name.split('/'))
+    
+    def stat(self, object_name):
+        """
+        Thông tin object (None nếu không tồn tại)
+        
+        Returns:
+            dict: {'size', 'etag', 'content_type', 'last_modified'}
+        """
+        return self.backend.stat(object_name)
+    
+    def iter_object(self, object_name, offset=0, length=0, chunk_size=64 * 1024):
+        """Stream nội dung object (length=0: tới hết object) theo từng chunk"""
+        return self.backend.iter_range(object_name, offset, length, chunk_size)
     
     def delete_file(self, object_name):
         """
-        Xóa file khỏi MinIO
+        Xóa file khỏi storage
         
         Args:
-            object_name: Tên object trong bucket (ví dụ: 'books/filename.jpg')
+            object_name: Tên object (ví dụ: 'books/filename.jpg')
         """
         try:
-            self.client.remove_object(self.bucket_name, object_name)
-        except S3Error as e:
+            self.backend.delete(object_name)
+        except StorageError as e:
             raise Exception(f'Lỗi khi xóa file: {str(e)}')
+    
+    def delete_files(self, object_names):
+        """
+        Xóa nhiều object (minio: một request S3 DeleteObjects, tối đa 1000 key)
+        
+        Returns:
+            list: [(object_name, error_message)] các object xóa lỗi
+        """
+        return self.backend.delete_many(list(object_names))
+    
+    def iter_objects(self, prefix):
+        """Liệt kê object dưới prefix: (object_name, size, last_modified)"""
+        return self.backend.list(prefix)
+    
+    def object_key_from_url(self, url):
+        """
+        Key của object trong bucket từ URL đã lưu: [<IMAGE_BASE_URL>]/img/<key> (IMAGE_BASE_URL
+        có thể có path, vd. https://cdn.example.com/assets) hoặc presigned URL cũ
+        http://<endpoint>/<bucket>/<key>?X-Amz-... (None nếu URL không trỏ tới bucket này)
+        """
+        if not url:
+            return None
+        path = unquote(urlsplit(url).path)
+        prefixes = [self.URL_PATH, f'/{self.bucket_name}/']
+        base_path = unquote(urlsplit(self.public_base_url).path).rstrip('/')
+        if base_path:
+            prefixes.insert(0, f'{base_path}{self.URL_PATH}')
+        for prefix in prefixes:
+            if path.startswith(prefix):
+                return path[len(prefix):] or None
+        return None
+    
+    def is_own_url(self, url):
+        """
+        URL trỏ tới ảnh do storage này quản lý: URL tương đối, cùng host với IMAGE_BASE_URL/MinIO
+        hoặc có đoạn /img/ (URL ảnh ngoài như CDN của nhà cung cấp -> False)
+        """
+        if not url:
+            return False
+        parts = urlsplit(url)
+        own_hosts = {urlsplit(self.public_base_url).netloc, self.minio_endpoint} - {''}
+        return not parts.netloc or parts.netloc in own_hosts or self.URL_PATH in parts.path
 
 # Singleton instance
 storage_service = StorageService()
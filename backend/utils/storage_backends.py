@@ -0,0 +1,443 @@
+"""
+Backend lưu object cho StorageService (utils/storage.py)
+
+- minio: MinIO/S3; client tạo lazy ở lần dùng đầu tiên trong từng process (sau khi gunicorn
+  fork), connection pool urllib3 giới hạn MINIO_POOL_MAXSIZE, timeout connect/read cho mọi
+  request và retry có backoff (lỗi kết nối, 500/502/503/504)
+- local: thư mục trên disk (STORAGE_LOCAL_ROOT), cho dev/triển khai một máy
+- memory: dict trong process, cho test và chạy app không cần object store
+
+Mọi backend cùng interface StorageBackend; lỗi được báo bằng StorageError
+(StorageUnavailable khi không kết nối được sau khi đã retry -> route trả về 503).
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import urllib3
+from minio import Minio
+from minio.commonconfig import CopySource
+from minio.deleteobjects import DeleteObject
+from minio.error import MinioException, S3Error
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKENDS = ('minio', 'local', 'memory')
+
+mimetypes.add_type('image/webp', '.webp')
+
+
+class StorageError(Exception):
+    """Lỗi khi đọc/ghi object"""
+
+
+class StorageUnavailable(StorageError):
+    """Không kết nối được tới object store (timeout/lỗi mạng sau khi đã retry)"""
+
+
+class StorageBackend:
+    """Interface chung; key dạng 'books/<sha256>.jpg'"""
+
+    name = ''
+
+    def put(self, key: str, stream, length: int, content_type: str) -> None:
+        """Ghi length byte đọc từ stream (object có read(size))"""
+        raise NotImplementedError
+
+    def copy(self, source_key: str, key: str) -> None:
+        """Copy object (ghi đè key nếu đã có, làm mới last_modified)"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Toàn bộ nội dung object (None nếu không tồn tại), cho object nhỏ như manifest"""
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[Dict]:
+        """{'size', 'etag', 'content_type', 'last_modified'} (None nếu không tồn tại)"""
+        raise NotImplementedError
+
+    def iter_range(self, key: str, offset: int, length: int, chunk_size: int) -> Iterator[bytes]:
+        """Stream length byte từ offset (length=0: tới hết object)"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete_many(self, keys: List[str]) -> List[Tuple[str, str]]:
+        """Xóa nhiều object. Returns: [(key, error_message)] các object xóa lỗi"""
+        errors = []
+        for key in keys:
+            try:
+                self.delete(key)
+            except StorageError as e:
+                errors.append((key, str(e)))
+        return errors
+
+    def list(self, prefix: str) -> Iterator[Tuple[str, int, datetime]]:
+        """Object dưới prefix (đệ quy): (key, size, last_modified)"""
+        raise NotImplementedError
+
+
+class MinioBackend(StorageBackend):
+    """MinIO/S3, client và bucket được khởi tạo lazy (không gọi mạng khi import/create_app)"""
+
+    name = 'minio'
+    # S3/MinIO không cho part nhỏ hơn 5 MiB (trừ part cuối)
+    MIN_PART_SIZE = 5 * 1024 * 1024
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, endpoint: str, access_key: str, secret_key: str, bucket_name: str,
+                 secure: bool = False, part_size: int = MIN_PART_SIZE, connect_timeout: float = 3.0,
+                 read_timeout: float = 30.0, max_retries: int = 3, retry_backoff: float = 0.2,
+                 pool_maxsize: int = 10):
+        self.endpoint = endpoint
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.bucket_name = bucket_name
+        self.secure = secure
+        # Multipart part size: mỗi upload giữ tối đa một part trong bộ nhớ
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.pool_maxsize = pool_maxsize
+        self._client = None
+        self._client_pid: Optional[int] = None
+        self._bucket_ready = False
+        self._lock = threading.Lock()
+        # Chỉ một thread kiểm tra/tạo bucket; thread khác không chờ request mạng đó
+        self._bucket_lock = threading.Lock()
+
+    def _http_client(self):
+        return urllib3.PoolManager(
+            maxsize=self.pool_maxsize,
+            timeout=urllib3.util.Timeout(connect=self.connect_timeout, read=self.read_timeout),
+            retries=urllib3.Retry(
+                total=self.max_retries,
+                backoff_factor=self.retry_backoff,
+                status_forcelist=self.RETRY_STATUSES
+            )
+        )
+
+    @property
+    def client(self):
+        """Minio client của process hiện tại; bucket được tạo nếu chưa có ở lần dùng đầu tiên"""
+        with self._lock:
+            if self._client is None or self._client_pid != os.getpid():
+                self._client = Minio(
+                    self.endpoint,
+                    access_key=self.access_key,
+                    secret_key=self.secret_key,
+                    secure=self.secure,
+                    http_client=self._http_client()
+                )
+                self._client_pid = os.getpid()
+            client = self._client
+        if not self._bucket_ready:
+            self._ensure_bucket(client)
+        return client
+
+    def _ensure_bucket(self, client) -> None:
+        """
+        Kiểm tra/tạo bucket ngoài self._lock (request mạng có thể chờ tới hết timeout + retry).
+        Thread đang có lần thử khác thì bỏ qua; lỗi -> StorageError cho thao tác hiện tại, lần sau thử lại
+        """
+        if not self._bucket_lock.acquire(blocking=False):
+            return
+        try:
+            if self._bucket_ready:
+                return
+            with _minio_errors():
+                if not client.bucket_exists(self.bucket_name):
+                    client.make_bucket(self.bucket_name)
+                    logger.info(f'Đã tạo bucket: {self.bucket_name}')
+            self._bucket_ready = True
+        finally:
+            self._bucket_lock.release()
+
+    def put(self, key, stream, length, content_type):
+        client = self.client
+        with _minio_errors():
+            client.put_object(self.bucket_name, key, stream, length=length, content_type=content_type,
+                              part_size=self.part_size, num_parallel_uploads=1)
+
+    def copy(self, source_key, key):
+        client = self.client
+        with _minio_errors():
+            client.copy_object(self.bucket_name, key, CopySource(self.bucket_name, source_key))
+
+    def get(self, key):
+        client = self.client
+        with _minio_errors():
+            try:
+                response = client.get_object(self.bucket_name, key)
+            except S3Error as e:
+                if e.code in ('NoSuchKey', 'NoSuchObject'):
+                    return None
+                raise
+            try:
+                return response.read()
+            finally:
+                response.close()
+                response.release_conn()
+
+    def stat(self, key):
+        client = self.client
+        with _minio_errors():
+            try:
+                obj = client.stat_object(self.bucket_name, key)
+            except S3Error as e:
+                if e.code in ('NoSuchKey', 'NoSuchObject'):
+                    return None
+                raise
+        return {'size': obj.size, 'etag': obj.etag, 'content_type': obj.content_type,
+                'last_modified': obj.last_modified}
+
+    def iter_range(self, key, offset, length, chunk_size):
+        client = self.client
+        with _minio_errors():
+            response = client.get_object(self.bucket_name, key, offset=offset, length=length)
+        try:
+            with _minio_errors():
+                yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def delete(self, key):
+        client = self.client
+        with _minio_errors():
+            client.remove_object(self.bucket_name, key)
+
+    def delete_many(self, keys):
+        """Một request S3 DeleteObjects (tối đa 1000 key)"""
+        client = self.client
+        with _minio_errors():
+            errors = client.remove_objects(self.bucket_name, [DeleteObject(key) for key in keys])
+            return [(error.name, error.message) for error in errors]
+
+    def list(self, prefix):
+        client = self.client
+        with _minio_errors():
+            for obj in client.list_objects(self.bucket_name, prefix=prefix, recursive=True):
+                yield obj.object_name, obj.size, obj.last_modified
+
+
+@contextmanager
+def _minio_errors():
+    """Đổi lỗi của minio/urllib3 thành StorageError/StorageUnavailable"""
+    try:
+        yield
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        raise StorageUnavailable(f'Không kết nối được MinIO: {e}') from e
+    except MinioException as e:
+        raise StorageError(f'Lỗi MinIO: {e}') from e
+
+
+class LocalBackend(StorageBackend):
+    """Object là file dưới root (key -> đường dẫn tương đối), ghi qua file tạm rồi rename"""
+
+    name = 'local'
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError('Key không hợp lệ')
+        return path
+
+    def put(self, key, stream, length, content_type):
+        path = self._path(key)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = stream.read(min(self.CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise StorageError('Dữ liệu upload không đầy đủ')
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            os.replace(temp_path, path)
+        except OSError as e:
+            raise StorageError(f'Lỗi ghi file: {e}') from e
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def copy(self, source_key, key):
+        source_path, path = self._path(source_key), self._path(key)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            raise StorageError(f'Lỗi ghi file: {e}') from e
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise StorageError(f'Lỗi đọc file: {e}') from e
+
+    def stat(self, key):
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise StorageError(f'Lỗi đọc file: {e}') from e
+        if not os.path.isfile(path):
+            return None
+        # Key theo nội dung: mtime + size đủ để phân biệt, không cần hash lại file
+        return {'size': st.st_size, 'etag': f'{st.st_mtime_ns:x}-{st.st_size:x}',
+                'content_type': mimetypes.guess_type(path)[0] or 'application/octet-stream',
+                'last_modified': datetime.fromtimestamp(st.st_mtime, timezone.utc)}
+
+    def iter_range(self, key, offset, length, chunk_size):
+        try:
+            f = open(self._path(key), 'rb')
+        except OSError as e:
+            raise StorageError(f'Lỗi đọc file: {e}') from e
+        with f:
+            f.seek(offset)
+            remaining = length or None
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise StorageError(f'Lỗi xóa file: {e}') from e
+
+    def list(self, prefix):
+        # prefix dạng 'books/': duyệt thư mục chứa prefix rồi lọc theo chuỗi
+        directory = os.path.dirname(os.path.join(self.root, prefix))
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield key, st.st_size, datetime.fromtimestamp(st.st_mtime, timezone.utc)
+
+
+class MemoryBackend(StorageBackend):
+    """Object giữ trong dict của process (mất khi restart), cho test"""
+
+    name = 'memory'
+
+    def __init__(self):
+        # key -> (data, content_type, etag, last_modified)
+        self._objects: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, key, data, content_type):
+        entry = (data, content_type, hashlib.md5(data).hexdigest(), datetime.now(timezone.utc))
+        with self._lock:
+            self._objects[key] = entry
+
+    def put(self, key, stream, length, content_type):
+        data = stream.read(length)
+        if len(data) != length:
+            raise StorageError('Dữ liệu upload không đầy đủ')
+        self._store(key, data, content_type)
+
+    def copy(self, source_key, key):
+        with self._lock:
+            entry = self._objects.get(source_key)
+        if entry is None:
+            raise StorageError(f'Object không tồn tại: {source_key}')
+        self._store(key, entry[0], entry[1])
+
+    def get(self, key):
+        with self._lock:
+            entry = self._objects.get(key)
+        return entry[0] if entry else None
+
+    def stat(self, key):
+        with self._lock:
+            entry = self._objects.get(key)
+        if entry is None:
+            return None
+        data, content_type, etag, last_modified = entry
+        return {'size': len(data), 'etag': etag, 'content_type': content_type, 'last_modified': last_modified}
+
+    def iter_range(self, key, offset, length, chunk_size):
+        data = self.get(key)
+        if data is None:
+            raise StorageError(f'Object không tồn tại: {key}')
+        end = offset + length if length else len(data)
+        for start in range(offset, end, chunk_size):
+            yield data[start:min(start + chunk_size, end)]
+
+    def delete(self, key):
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def list(self, prefix):
+        with self._lock:
+            items = sorted((key, len(entry[0]), entry[3]) for key, entry in self._objects.items()
+                           if key.startswith(prefix))
+        yield from items
+
+    def clear(self) -> None:
+        with self._lock:
+            self._objects.clear()
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Backend theo tên (STORAGE_BACKEND), cấu hình đọc từ biến môi trường"""
+    if name == 'minio':
+        return MinioBackend(
+            os.getenv('MINIO_ENDPOINT', 'minio:9000'),
+            os.getenv('MINIO_ACCESS_KEY', 'minioadmin'),
+            os.getenv('MINIO_SECRET_KEY', 'minioadmin'),
+            os.getenv('MINIO_BUCKET', 'bookstore-images'),
+            secure=os.getenv('MINIO_SECURE', 'false').lower() == 'true',
+            part_size=int(os.getenv('MINIO_PART_SIZE', str(MinioBackend.MIN_PART_SIZE))),
+            connect_timeout=float(os.getenv('MINIO_CONNECT_TIMEOUT', '3')),
+            read_timeout=float(os.getenv('MINIO_READ_TIMEOUT', '30')),
+            max_retries=int(os.getenv('MINIO_MAX_RETRIES', '3')),
+            retry_backoff=float(os.getenv('MINIO_RETRY_BACKOFF', '0.2')),
+            pool_maxsize=int(os.getenv('MINIO_POOL_MAXSIZE', '10'))
+        )
+    if name == 'local':
+        return LocalBackend(os.getenv('STORAGE_LOCAL_ROOT', 'storage'))
+    if name == 'memory':
+        return MemoryBackend()
+    raise ValueError(f'STORAGE_BACKEND phải là một trong: {", ".join(STORAGE_BACKENDS)}')
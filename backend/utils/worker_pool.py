@@ -0,0 +1,121 @@
+"""
+Pool giới hạn cho việc nặng CPU (bcrypt, xử lý ảnh) chạy ngoài request thread
+
+- executor: process | thread | inline; pool được tạo lazy trong từng gunicorn worker
+  (sau khi fork), mỗi worker `workers` process/thread
+- Admission control: tối đa `max_pending` thao tác đang chờ/chạy mỗi worker; vượt quá
+  (hoặc chờ quá `timeout` giây) -> WorkerPoolBusy ngay (route trả về 503) thay vì xếp hàng
+  làm nghẽn các request khác
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+
+WORKER_POOL_EXECUTORS = ('process', 'thread', 'inline')
+
+
+def _process_context():
+    """
+    fork (Linux): process con tách từ gunicorn worker lúc tạo pool (lazy, sau khi gunicorn
+    đã fork worker) và chỉ chạy hàm được submit; spawn/forkserver sẽ import lại module __main__ (app)
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('spawn')
+
+
+def _thread_executor(workers: int, name: str) -> Executor:
+    """
+    Thread pool thật (bcrypt/Pillow nhả GIL khi xử lý). Dưới gevent (threading đã bị monkey patch)
+    dùng threadpool của gevent để request chờ kết quả không chặn hub
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(workers)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(workers, thread_name_prefix=name)
+
+
+class WorkerPoolBusy(Exception):
+    """Quá nhiều thao tác đang chờ (hoặc chờ quá lâu)"""
+
+
+class WorkerPool:
+    """Chạy hàm trên pool giới hạn, từ chối sớm khi quá tải"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executor_name = 'inline'
+        self.workers = 0
+        self.timeout = 10.0
+        self._slots = threading.BoundedSemaphore(1)
+        self._executor: Optional[Executor] = None
+        self._executor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def configure(self, executor_name: str, workers: int, max_pending: int, timeout: float) -> None:
+        """Đặt lại cấu hình (gọi từ init_app); pool cũ của process hiện tại bị dừng"""
+        if executor_name not in WORKER_POOL_EXECUTORS:
+            raise ValueError(f'executor phải là một trong: {", ".join(WORKER_POOL_EXECUTORS)}')
+
+        self.workers = workers
+        self.executor_name = executor_name if workers > 0 else 'inline'
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.shutdown()
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.executor_name == 'inline':
+            return None
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                if self.executor_name == 'process':
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=_process_context())
+                else:
+                    self._executor = _thread_executor(self.workers, self.name)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def run(self, fn: Callable, *args):
+        """
+        Chạy fn(*args) trên pool nếu còn slot, ngược lại WorkerPoolBusy.
+        Slot được trả khi thao tác thật sự kết thúc: hết `timeout` thì request nhận
+        WorkerPoolBusy nhưng thao tác vẫn chạy trên pool nên vẫn giữ slot
+        """
+        # configure() có thể thay _slots; trả slot về đúng semaphore đã lấy
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise WorkerPoolBusy()
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args) if executor is not None else None
+        except BaseException:
+            slots.release()
+            raise
+
+        if future is None:
+            try:
+                return fn(*args)
+            finally:
+                slots.release()
+
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise WorkerPoolBusy()
+
+    def shutdown(self) -> None:
+        """Dừng pool của process hiện tại (nếu có)"""
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._executor_pid = None
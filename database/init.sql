@@ -18,5 +18,9 @@
 -- CREATE DATABASE bookstore;
 
 -- Nếu muốn xem cấu trúc, tham khảo backend/models.py
+-- Thay đổi schema (cột, index) được quản lý bằng migrations trong
+-- backend/migrations/versions/ (flask db upgrade)
 -- hoặc xem DOCUMENTATION.md để xem ERD diagram
 
+-- Extension cho tìm kiếm sách (GIN trigram index trên books.search_text)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
@@ -1,6 +1,7 @@
 import React from 'react'
 import { useNavigate } from 'react-router-dom'
 import type { Book } from '../../types'
+import { ResponsiveImage } from './ResponsiveImage'
 
 interface BookCardProps {
   book: Book
@@ -23,8 +24,10 @@ export const BookCard: React.FC<BookCardProps> = ({ book }) => {
     >
       <div className="bg-white rounded-lg overflow-hidden shadow-sm hover:shadow-md transition-shadow">
         <div className="aspect-[3/4] overflow-hidden">
-          <img
+          <ResponsiveImage
             src={book.image_url}
+            variants={book.image_variants}
+            sizes="(min-width: 768px) 20vw, 50vw"
             alt={book.title}
             className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
           />
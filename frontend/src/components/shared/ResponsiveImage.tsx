@@ -0,0 +1,28 @@
+import React from 'react'
+import type { ImageVariantSet } from '../../types'
+
+interface ResponsiveImageProps {
+  src: string
+  alt: string
+  variants?: ImageVariantSet | null
+  sizes?: string
+  eager?: boolean  // Ảnh trên màn hình đầu tiên (banner) không lazy-load
+  className?: string
+}
+
+// Dùng variant set WebP (srcset) khi ảnh được upload qua /api/admin/upload, nếu không thì dùng src gốc
+export const ResponsiveImage: React.FC<ResponsiveImageProps> = ({ src, alt, variants, sizes, eager, className }) => {
+  const srcSet = variants?.sizes?.map((size) => `${size.url} ${size.width}w`).join(', ')
+
+  return (
+    <img
+      src={src}
+      srcSet={srcSet || undefined}
+      sizes={srcSet ? sizes : undefined}
+      alt={alt}
+      loading={eager ? 'eager' : 'lazy'}
+      decoding="async"
+      className={className}
+    />
+  )
+}
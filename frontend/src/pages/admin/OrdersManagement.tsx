@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react'
 import { AdminLayout } from '../../components/layout/AdminLayout'
 import { Button } from '../../components/ui/Button'
 import { Modal } from '../../components/ui/Modal'
-import { Table, ActionMenu, ActionMenuItem } from '../../components/ui/Table'
+import { Table, ActionMenu, ActionMenuItem, Pagination } from '../../components/ui/Table'
 import { adminService } from '../../services/api'
 import { useToast } from '../../components/ui/Toast'
 import { Edit } from 'lucide-react'
@@ -13,17 +13,21 @@ const OrdersManagement: React.FC = () => {
   const [loading, setLoading] = useState(false)
   const [isModalOpen, setIsModalOpen] = useState(false)
   const [editingOrder, setEditingOrder] = useState<Order | null>(null)
+  const [currentPage, setCurrentPage] = useState(1)
+  const [totalPages, setTotalPages] = useState(1)
   const [formData, setFormData] = useState({
     status: 'pending',
     payment_status: 'pending'
   })
   const toast = useToast()
 
-  const fetchOrders = async () => {
+  const fetchOrders = async (page: number = 1) => {
     try {
       setLoading(true)
-      const data = await adminService.getAllOrders()
-      setOrders(data)
+      const data = await adminService.getAllOrders({ page, per_page: 20 })
+      setOrders(data.orders)
+      setCurrentPage(data.page)
+      setTotalPages(data.pages)
     } catch (error) {
       console.error('Failed to fetch orders:', error)
     } finally {
@@ -60,7 +64,7 @@ const OrdersManagement: React.FC = () => {
       setLoading(true)
       await adminService.updateOrderStatus(editingOrder.id, formData)
       toast.success('Đã cập nhật trạng thái đơn hàng')
-      await fetchOrders()
+      await fetchOrders(currentPage)
       handleCloseModal()
     } catch (error) {
       console.error('Failed to update order status:', error)
@@ -129,6 +133,11 @@ const OrdersManagement: React.FC = () => {
               </ActionMenu>
             )}
           />
+          <Pagination
+            currentPage={currentPage}
+            totalPages={totalPages}
+            onPageChange={fetchOrders}
+          />
         </div>
       </div>
 
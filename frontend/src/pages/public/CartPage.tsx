@@ -161,6 +161,9 @@ const CartPage: React.FC = () => {
                   <div className="flex-1">
                     <h3 className="font-medium text-lg mb-2">{item.book.title}</h3>
                     <p className="text-gray-600 mb-4">{formatPrice(item.book.price)}</p>
+                    {item.available_stock != null && (
+                      <p className="text-sm text-gray-500 -mt-3 mb-4">Còn {item.available_stock} cuốn</p>
+                    )}
                     
                     <div className="flex items-center justify-between">
                       <div className="flex items-center gap-2">
@@ -178,7 +181,8 @@ const CartPage: React.FC = () => {
                         />
                         <button
                           onClick={() => handleQuantityChange(item.id, item.quantity + 1)}
-                          className="w-8 h-8 rounded border hover:bg-gray-50"
+                          disabled={item.available_stock != null && item.quantity >= item.available_stock}
+                          className="w-8 h-8 rounded border hover:bg-gray-50 disabled:opacity-50"
                         >
                           <Plus className="h-4 w-4 mx-auto" />
                         </button>
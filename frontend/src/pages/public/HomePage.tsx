@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react'
 import { PublicHeader } from '../../components/layout/PublicHeader'
 import { PublicFooter } from '../../components/layout/PublicFooter'
 import { BookCard } from '../../components/shared/BookCard'
+import { ResponsiveImage } from '../../components/shared/ResponsiveImage'
 import { booksService, bannersService } from '../../services/api'
 import type { Book, Banner } from '../../types'
 import { ChevronLeft, ChevronRight } from 'lucide-react'
@@ -101,9 +102,12 @@ const HomePage: React.FC = () => {
                     >
                       {banner.image_url ? (
                         <div className="relative w-full h-full">
-                          <img 
-                            src={banner.image_url} 
+                          <ResponsiveImage
+                            src={banner.image_url}
+                            variants={banner.image_variants}
+                            sizes="(min-width: 1024px) 66vw, 100vw"
                             alt={banner.title}
+                            eager
                             className="w-full h-full object-cover"
                           />
                           <div className="absolute inset-0 bg-black/30 flex items-center justify-center">
@@ -188,9 +192,12 @@ const HomePage: React.FC = () => {
               >
                 {banner.image_url ? (
                   <div className="relative w-full h-full">
-                    <img 
-                      src={banner.image_url} 
+                    <ResponsiveImage
+                      src={banner.image_url}
+                      variants={banner.image_variants}
+                      sizes="(min-width: 1024px) 33vw, 100vw"
                       alt={banner.title}
+                      eager
                       className="w-full h-full object-cover"
                     />
                     <div className="absolute inset-0 bg-black/20 flex items-center justify-center">
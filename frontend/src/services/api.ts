@@ -250,10 +250,23 @@ export const adminService = {
     }
   },
 
-  async getAllOrders(): Promise<Order[]> {
+  async getAllOrders(params?: {
+    page?: number
+    per_page?: number
+    status?: string
+    user_id?: number
+    date_from?: string
+    date_to?: string
+  }): Promise<{
+    orders: Order[]
+    total: number
+    page: number
+    per_page: number
+    pages: number
+  }> {
     try {
-      const response = await api.get('/admin/orders')
-      return response.data.orders
+      const response = await api.get('/admin/orders', { params })
+      return response.data
     } catch (error) {
       handleError(error as AxiosError)
       throw error
@@ -23,6 +23,19 @@ export interface RegisterRequest {
   full_name: string
 }
 
+// Image Types (variant set WebP tạo khi upload)
+export interface ImageVariant {
+  width: number
+  height: number
+  url: string
+}
+
+export interface ImageVariantSet {
+  format: string
+  sizes: ImageVariant[]
+  thumbnail?: ImageVariant | null
+}
+
 // Book Types
 export interface Book {
   id: number
@@ -33,6 +46,7 @@ export interface Book {
   price: number
   stock: number
   image_url: string
+  image_variants?: ImageVariantSet | null
   publisher?: string
   publish_date?: string
   distributor?: string
@@ -67,6 +81,7 @@ export interface CartItem {
   book: Book
   quantity: number
   created_at: string
+  available_stock?: number | null
 }
 
 export interface AddToCartRequest {
@@ -140,6 +155,7 @@ export interface Banner {
   title: string
   description?: string
   image_url: string
+  image_variants?: ImageVariantSet | null
   link?: string
   bg_color: string
   text_color: string
@@ -22,6 +22,10 @@ export default defineConfig({
       '/api': {
         target: 'http://backend:5000',
         changeOrigin: true,
+      },
+      '/img': {
+        target: 'http://backend:5000',
+        changeOrigin: true,
       }
     }
   }